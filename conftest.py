@@ -5,9 +5,11 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.db.backends.postgresql.features import DatabaseFeatures
 from guardian.shortcuts import assign_perm
 
+from core.api_keys import api_key_cache
 from core.constants import Groups as GroupConstants
 from core.management.commands.load_initial_data import Command as CommandLoadInitialData
 from core.permissions import GROUP_PERMISSIONS
@@ -94,6 +96,16 @@ def enable_db_access_for_all_tests(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # the database is rolled back after each test, the caches must follow
+    cache.clear()
+    api_key_cache.clear()
+    yield
+    cache.clear()
+    api_key_cache.clear()
+
+
 # solr_process = solr_process(
 #   executable=None,
 #   host='solr',
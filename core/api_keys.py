@@ -0,0 +1,121 @@
+"""
+Resolution of the API keys to the users and endpoints they belong to.
+
+Resolving an endpoint key requires hashing it with the (deliberately slow) password hasher,
+so the resolutions are kept in a bounded in-process cache. Entries expire after
+API_KEY_CACHE_TIMEOUT seconds and are dropped whenever an API key changes; the invalidation
+is propagated to the other processes through a generation stamp in the Django cache.
+When that cache is process-local, the other processes would keep accepting a revoked key,
+so the resolutions are not cached at all.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+
+from core.utils import DaisyLogger, is_cache_shared
+
+logger = DaisyLogger(__name__)
+
+GENERATION_KEY = "api-keys:generation"
+
+USER = "user"
+ENDPOINT = "endpoint"
+
+# (USER or ENDPOINT or None, id)
+Resolution = Tuple[Optional[str], Optional[int]]
+UNKNOWN: Resolution = (None, None)
+
+
+def hash_endpoint_key(key: str) -> str:
+    return get_hasher("default").encode(key, salt=settings.SECRET_KEY)
+
+
+def lookup_api_key(key: str) -> Resolution:
+    """
+    Find the owner of the key in the database.
+    """
+    from core.models import Endpoint, User
+
+    if user_id := User.objects.filter(api_key=key).values_list("id", flat=True).first():
+        return USER, user_id
+    endpoint_id = (
+        Endpoint.objects.filter(api_key=hash_endpoint_key(key))
+        .values_list("id", flat=True)
+        .first()
+    )
+    if endpoint_id:
+        return ENDPOINT, endpoint_id
+    return UNKNOWN
+
+
+class ApiKeyCache:
+    def __init__(self, max_size: int = 1024, timeout: float = 300):
+        self.max_size = max_size
+        self.timeout = timeout
+        # digest of the key -> (resolution, expiry, generation)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        # the keys themselves are not kept in memory
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _generation():
+        return cache.get(GENERATION_KEY, 0)
+
+    def resolve(self, key: str) -> Resolution:
+        digest = self._digest(key)
+        generation = self._generation()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                resolution, expiry, entry_generation = entry
+                if expiry > now and entry_generation == generation:
+                    self._entries.move_to_end(digest)
+                    return resolution
+                del self._entries[digest]
+
+        resolution = lookup_api_key(key)
+        with self._lock:
+            self._entries[digest] = (resolution, now + self.timeout, generation)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return resolution
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+api_key_cache = ApiKeyCache(
+    max_size=getattr(settings, "API_KEY_CACHE_SIZE", 1024),
+    timeout=getattr(settings, "API_KEY_CACHE_TIMEOUT", 300),
+)
+
+
+def resolve_api_key(key: str) -> Resolution:
+    """
+    Return the type and id of the owner of the key, or (None, None) if the key is unknown.
+    """
+    if not (api_key_cache.max_size and api_key_cache.timeout and is_cache_shared()):
+        return lookup_api_key(key)
+    return api_key_cache.resolve(key)
+
+
+def invalidate_api_keys():
+    """
+    Drop the cached resolutions, in this process and in the others.
+    """
+    logger.debug("API keys changed, clearing the resolutions")
+    api_key_cache.clear()
+    cache.set(GENERATION_KEY, time.time(), timeout=None)
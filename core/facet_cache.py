@@ -0,0 +1,82 @@
+import hashlib
+import json
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+# the facet counts of a model are keyed by the generation of its index,
+# bumping the generation (when the index is updated) invalidates all of them at once
+GENERATION_KEY = "facet-counts:generation:{}"
+COUNTS_KEY_PREFIX = "facet-counts"
+
+# lookups of the current process, logged to follow the efficiency of the cache
+stats = {"hits": 0, "misses": 0}
+
+
+def get_timeout() -> int:
+    return getattr(settings, "FACET_COUNTS_CACHE_TIMEOUT", 60)
+
+
+def get_generation(label: str) -> float:
+    """
+    Return the time at which the index of the model last changed.
+    """
+    key = GENERATION_KEY.format(label)
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time()
+        cache.add(key, generation, timeout=None)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def invalidate(labels: Iterable[str]):
+    """
+    Mark the facet counts of the given models as stale.
+    """
+    generation = time.time()
+    cache.set_many(
+        {GENERATION_KEY.format(label): generation for label in labels}, timeout=None
+    )
+
+
+def get_key(label: str, filters: dict, query: Optional[str], facets) -> str:
+    """
+    Build the key of the facet counts of a search, which does not depend on the
+    order of the filters nor on the page or the ordering of the results.
+    """
+    search = json.dumps(
+        {
+            "filters": {
+                key: sorted(values) if isinstance(values, (list, tuple)) else [values]
+                for key, values in filters.items()
+            },
+            "query": (query or "").strip(),
+            "facets": sorted(facets),
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(f"{search}:{get_generation(label)!r}".encode())
+    return f"{COUNTS_KEY_PREFIX}:{label}:{digest.hexdigest()}"
+
+
+def get_counts(key: str) -> Optional[dict]:
+    counts = cache.get(key)
+    stats["hits" if counts is not None else "misses"] += 1
+    logger.debug(
+        "facet counts cache " + ("hit" if counts is not None else "miss"),
+        key=key,
+        hits=stats["hits"],
+        misses=stats["misses"],
+    )
+    return counts
+
+
+def set_counts(key: str, counts: dict):
+    cache.set(key, counts, timeout=get_timeout())
@@ -1,10 +1,18 @@
 import json
-import jsonschema
+import math
 import os
-import sys
-import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from itertools import islice
+from typing import List, Tuple
 
+import jsonschema
 from django.conf import settings
+from jsonschema.exceptions import best_match
+from referencing import Registry, Resource
+from referencing.exceptions import NoSuchResource
+from referencing.jsonschema import DRAFT4
 
 from core.exceptions import JSONSchemaValidationError
 from core.utils import DaisyLogger
@@ -15,6 +23,68 @@ logger = DaisyLogger(__name__)
 JSONSCHEMA_BASE_LOCAL_PATH = getattr(settings, "IMPORT_JSON_SCHEMAS_DIR")
 JSONSCHEMA_BASE_REMOTE_URL = getattr(settings, "IMPORT_JSON_SCHEMAS_URI")
 
+# below this number of items per worker, the items are validated in the current process
+MIN_ITEMS_PER_WORKER = 50
+# number of items read at once from the validated list, which may be a stream
+VALIDATION_CHUNK_SIZE = 2000
+
+
+@lru_cache(maxsize=None)
+def get_registry(base_path: str) -> Registry:
+    """
+    Registry of all the schemas of the directory, under their `$id` and their file name,
+    so that the `$ref`s are resolved without fetching anything over the network.
+    """
+    resources = []
+    names = {}
+    for file_name in sorted(os.listdir(base_path)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(base_path, file_name), "r") as opened_file:
+            resource = Resource.from_contents(
+                json.load(opened_file), default_specification=DRAFT4
+            )
+        names[file_name] = resource
+        if resource.id():
+            resources.append((resource.id(), resource))
+        resources.append((file_name, resource))
+
+    def retrieve(uri):
+        # schemas referenced under another base URI (e.g. another version)
+        try:
+            return names[os.path.basename(uri)]
+        except KeyError:
+            raise NoSuchResource(ref=uri)
+
+    return Registry(retrieve=retrieve).with_resources(resources)
+
+
+@lru_cache(maxsize=None)
+def get_validator(base_path: str, schema_name: str) -> jsonschema.Draft4Validator:
+    """
+    Validator of the schema, compiled once per process.
+    """
+    registry = get_registry(base_path)
+    schema = registry.get_or_retrieve(schema_name).value.contents
+    return jsonschema.Draft4Validator(schema, registry=registry)
+
+
+def collect_errors(
+    base_path: str, schema_name: str, indexed_items: List[Tuple[int, dict]]
+) -> List[str]:
+    """
+    Validate the items, return the error of each invalid one with its index.
+    """
+    validator = get_validator(base_path, schema_name)
+    errors = []
+    for index, item in indexed_items:
+        error = best_match(validator.iter_errors(item))
+        if error is not None:
+            name = item.get("name", "N/A") if isinstance(item, dict) else "N/A"
+            location = error.json_path
+            errors.append(f'Item {index} ("{name}") at {location}: {error.message}')
+    return errors
+
 
 class BaseJSONSchemaValidator:
     @property
@@ -23,74 +93,67 @@ class BaseJSONSchemaValidator:
 
     @property
     def validator(self):
-        return self._cached_validator
-
-    def validate_items(self, item_list, logger=None):
-        for item in item_list:
-            try:
-                self.validator.validate(item)
-            except jsonschema.ValidationError as e:
-                raise JSONSchemaValidationError(str(e))
+        return get_validator(self.base_path, self.schema_name)
+
+    def validate_items(self, item_list, logger=None, workers=None):
+        """
+        Validate all the items, read by chunks of VALIDATION_CHUNK_SIZE so that `item_list`
+        can be a stream, across a pool of `workers` processes (IMPORT_VALIDATION_WORKERS
+        by default) for long lists, and raise a JSONSchemaValidationError listing every
+        invalid item.
+        """
+        if workers is None:
+            workers = getattr(settings, "IMPORT_VALIDATION_WORKERS", 1)
+        items = enumerate(item_list)
+        errors, total = [], 0
+        with ExitStack() as stack:
+            executor = None
+            while True:
+                indexed_items = list(islice(items, VALIDATION_CHUNK_SIZE))
+                if not indexed_items:
+                    break
+                total += len(indexed_items)
+                chunk_workers = min(workers, len(indexed_items) // MIN_ITEMS_PER_WORKER)
+                if chunk_workers > 1:
+                    if executor is None:
+                        executor = stack.enter_context(
+                            ProcessPoolExecutor(max_workers=workers)
+                        )
+                    errors.extend(
+                        self._collect_errors_in_pool(
+                            executor, indexed_items, chunk_workers
+                        )
+                    )
+                else:
+                    errors.extend(
+                        collect_errors(self.base_path, self.schema_name, indexed_items)
+                    )
+        if errors:
+            raise JSONSchemaValidationError(
+                f"{len(errors)} of {total} items are invalid:\n" + "\n".join(errors)
+            )
         return True
 
+    def _collect_errors_in_pool(self, executor, indexed_items, workers):
+        chunk_size = math.ceil(len(indexed_items) / workers)
+        chunks = [
+            indexed_items[start : start + chunk_size]
+            for start in range(0, len(indexed_items), chunk_size)
+        ]
+        return [
+            error
+            for chunk_errors in executor.map(
+                collect_errors,
+                [self.base_path] * len(chunks),
+                [self.schema_name] * len(chunks),
+                chunks,
+            )
+            for error in chunk_errors
+        ]
+
     def __init__(self):
         self.base_url = JSONSCHEMA_BASE_REMOTE_URL
         self.base_path = JSONSCHEMA_BASE_LOCAL_PATH
-        self._make_validator()
-
-    def _make_validator(self):
-        schema = self._load_schema(self.schema_name)
-
-        def get_referenced_schema(uri):
-            # TODO: at the moment, all schemas are under same URI directory
-            # the following will probably fail in cases the subschema is in different path
-            schema_name = os.path.basename(uri)
-            referenced_schema = self._load_schema(schema_name)
-            return referenced_schema
-
-        resolver = jsonschema.RefResolver(
-            self.base_path,
-            schema,
-            handlers={
-                "https": get_referenced_schema,
-                "http": get_referenced_schema,
-            },
-        )
-        self._cached_validator = jsonschema.Draft4Validator(schema, resolver=resolver)
-        return
-
-    def _load_schema(self, schema_name):
-        try:
-            return self._load_schema_from_disk(schema_name)
-        except Exception as e:
-            import os
-
-            logger.warning(
-                "Error (1/2) loading schema from disk for JSON validation...: " + str(e)
-            )
-            logger.warning("Working directory = " + os.getcwd())
-            logger.warning("File path = " + os.path.join(self.base_path, schema_name))
-            logger.warning("Will try to load the schema from URL...")
-
-        try:
-            return self._load_schema_from_url(schema_name)
-        except:
-            logger.error(
-                "Error (2/2) loading schema from URI for JSON validation...: " + str(e)
-            )
-            logger.error("URL = " + os.path.join(self.base_url, schema_name))
-
-        raise Exception("Cannot load schema for JSON validation")
-
-    def _load_schema_from_disk(self, schema_name):
-        file_path = os.path.join(self.base_path, schema_name)
-        with open(file_path, "r") as opened_file:
-            return json.load(opened_file)
-
-    def _load_schema_from_url(self, schema_name):
-        file_path = os.path.join(self.base_url, schema_name)
-        with urllib.request.urlopen(file_path) as url:
-            return json.loads(url.read().decode())
 
 
 class DatasetJSONSchemaValidator(BaseJSONSchemaValidator):
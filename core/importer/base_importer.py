@@ -1,15 +1,28 @@
+import io
 import json
 import sys
 import re
+import time
 
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List
-
-from django.conf import settings
-from django.contrib.auth.models import Group
-
-from core.constants import Groups as GroupConstants
-from core.models import Partner, Contact, ContactType, User
+from itertools import islice
+from typing import Dict, Iterable, List
+
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from guardian.utils import get_user_obj_perms_model
+
+from core import search_queue
+from core.importer import json_stream
+from core.importer.change_set import ChangeSet
+from core.constants import Permissions
+from core.importer.reference_data import DatabaseReferenceData, ReferenceData
+from core.models import Contact, ContactType, User
+from core.permissions.cache import clear_permission_cache
+from core.permissions.deferred import defer_assignments
 from core.utils import DaisyLogger
 
 
@@ -30,6 +43,21 @@ class BaseImporter:
 
     logger = DaisyLogger(__name__)
 
+    # bulk mode: the items are imported by batches, each one in a transaction, with the
+    # reference data looked up in memory and the permissions assigned at the end of the batch
+    bulk = False
+    batch_size = 100
+    reference_data = DatabaseReferenceData()
+    # dry run: the import is rolled back at the end, only the changes are reported
+    dry_run = False
+    # number of the imported entities by status...
+    change_counts = None
+    # ...and their changes, kept only in a dry run or in verbose mode
+    change_sets = None
+
+    class DryRunRollback(Exception):
+        pass
+
     def __init__(
         self,
         publish_on_import=False,
@@ -37,12 +65,39 @@ class BaseImporter:
         verbose=False,
         validate=True,
         skip_on_exist=True,
+        bulk=False,
+        batch_size=100,
+        dry_run=False,
     ):
         self.verbose = verbose
         self.publish_on_import = publish_on_import
         self.exit_on_error = exit_on_error
         self.validate = validate
         self.skip_on_exist = skip_on_exist
+        self.bulk = bulk
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.timings = defaultdict(float)
+        self.change_counts = Counter()
+        self.change_sets = []
+        self._deferred_permissions = []
+
+    @contextmanager
+    def timed(self, phase: str):
+        """
+        Add the time spent in the block to the timing of the import phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] += time.perf_counter() - start
+
+    def report_timings(self):
+        timings = ", ".join(
+            f"{phase}: {seconds:.2f}s" for phase, seconds in self.timings.items()
+        )
+        self.logger.info(f"Import timings ({self.__class__.__name__}) - {timings}")
 
     @property
     def json_schema_validator(self):
@@ -67,8 +122,9 @@ class BaseImporter:
         Checks whether the imported JSON has the same "$schema" URI as the importer class (in `json_schema_uri` property)
         """
         try:
-            object = json.loads(json_string)
-            return self.can_process_object(object)
+            # only the header is parsed when "$schema" comes first
+            schema = json_stream.peek_schema(io.StringIO(json_string))
+            return self.can_process_object({"$schema": schema} if schema else {})
         except:
             message = f'Couldn\'t check if the imported object has same "$schema" as the importer ({self.__class__.__name__}: {self.json_schema_uri}) - something went wrong while parsing the file'
             self.logger.warning(message)
@@ -90,18 +146,41 @@ class BaseImporter:
         self.logger.debug(message)
         return False
 
+    def can_process_file(self, path_to_the_file: str) -> bool:
+        """
+        Checks whether the JSON file (possibly gzipped) has the same "$schema" URI as the importer class,
+        reading only the header of the file when "$schema" comes first
+        """
+        try:
+            with json_stream.open_json_file(path_to_the_file) as json_file:
+                schema = json_stream.peek_schema(json_file)
+            return self.can_process_object({"$schema": schema} if schema else {})
+        except:
+            message = f'Couldn\'t check if the imported file has same "$schema" as the importer ({self.__class__.__name__}: {self.json_schema_uri}) - something went wrong while parsing the file'
+            self.logger.warning(message)
+            return False
+
     def import_json_file(self, path_to_the_file: str) -> bool:
         """
-        Opens, loads and imports a JSON file.
+        Opens and imports a JSON file (possibly gzipped), parsing the items one at a time
+        instead of loading the whole file: the file is read once to be validated, and once
+        more to be imported.
         """
         self.logger.info(f"Opening the file: {path_to_the_file}")
-        with open(path_to_the_file, encoding="utf-8") as json_file:
-            json_file_contents = json_file.read()
-            result = self.import_json(json_file_contents)
-            self.logger.info(
-                f"Successfully completed import for the file: {path_to_the_file}"
-            )
-            return result
+        importer_class_name = self.__class__.__name__
+        self.logger.info(
+            f'Attempting to use "{importer_class_name}" to parse and import the JSON'
+        )
+        with json_stream.open_json_file(path_to_the_file) as json_file:
+            self.validate_object_list(json_stream.iter_items(json_file))
+        with json_stream.open_json_file(path_to_the_file) as json_file:
+            result = self.import_objects(json_stream.iter_items(json_file))
+        status = "success" if result else "failed"
+        self.logger.info(f"Import ({importer_class_name}) result: {status}")
+        self.logger.info(
+            f"Successfully completed import for the file: {path_to_the_file}"
+        )
+        return result
 
     def import_json(self, json_string: str) -> bool:
         result = True
@@ -119,24 +198,141 @@ class BaseImporter:
         """
         Validates and imports a list of objects.
         """
-        result = True
-        if self.validate:
-            validator_name = self.json_schema_validator.__class__.__name__
-            self.logger.debug(
-                f'Validating the file with "{validator_name}" against JSON schema...'
-            )
-            self.json_schema_validator.validate_items(json_list, self.logger)
-            self.logger.debug("...JSON schema is OK!")
-        else:
-            self.logger.debug(f"Proceeding without using the validation")
+        self.validate_object_list(json_list)
         count = len(json_list)
         verb = "are" if count > 1 else "is"
         self.logger.debug(
             f"There {verb} {count} object(s) to be imported. Starting the process..."
         )
-        for item in json_list:
-            result = self.import_object(item) and result
+        return self.import_objects(json_list)
+
+    def validate_object_list(self, json_list: Iterable[Dict]):
+        """
+        Validates the objects against the JSON schema (unless the validation is disabled),
+        `json_list` can be a stream, which is not read when the validation is disabled.
+        """
+        if not self.validate:
+            self.logger.debug("Proceeding without using the validation")
+            return
+        validator_name = self.json_schema_validator.__class__.__name__
+        self.logger.debug(
+            f'Validating the file with "{validator_name}" against JSON schema...'
+        )
+        with self.timed("validation"):
+            self.json_schema_validator.validate_items(json_list, self.logger)
+        self.logger.debug("...JSON schema is OK!")
+
+    def import_objects(self, json_list: Iterable[Dict]) -> bool:
+        """
+        Imports the objects, one at a time, `json_list` can be a stream.
+        """
+        result = True
+        with self.dry_run_transaction():
+            if self.bulk:
+                result = self.import_batches(json_list)
+            else:
+                with self.timed("import"):
+                    for item in json_list:
+                        result = self.import_object(item) and result
         self.logger.debug("Finished importing the object(s)")
+        self.report_timings()
+        self.report_changes()
+        return result
+
+    @contextmanager
+    def dry_run_transaction(self):
+        """
+        In a dry run, roll back everything done in the block, the search index updates included.
+        """
+        if not self.dry_run:
+            yield
+            return
+        try:
+            with transaction.atomic():
+                with search_queue.queue_index_updates():
+                    yield
+                raise self.DryRunRollback
+        except self.DryRunRollback:
+            self.logger.info("Dry run - the changes have been rolled back")
+
+    def start_change_set(self, obj, created=False) -> ChangeSet:
+        """
+        Start recording the changes made to the database by the import of the object.
+        """
+        if self.change_sets is None:
+            self.change_sets = []
+        change_set = ChangeSet(obj, created=created)
+        self.change_sets.append(change_set)
+        return change_set
+
+    @property
+    def keep_change_sets(self) -> bool:
+        """
+        Whether the changes of each entity are kept to be reported, or only counted.
+        """
+        return self.dry_run or self.verbose
+
+    def count_changes(self, start: int):
+        """
+        Count the entities of the change sets started since the `start`-th one,
+        and forget their changes unless they are kept.
+        """
+        if not self.change_sets:
+            return
+        if self.change_counts is None:
+            self.change_counts = Counter()
+        self.change_counts.update(
+            change_set.status for change_set in self.change_sets[start:]
+        )
+        if not self.keep_change_sets:
+            del self.change_sets[start:]
+
+    def get_changes_summary(self) -> List[str]:
+        counts = self.change_counts or Counter()
+        summary = [
+            ", ".join(
+                f"{counts[status]} {status}"
+                for status in ("created", "updated", "unchanged")
+            )
+        ]
+        for change_set in self.change_sets or []:
+            if change_set:
+                summary += change_set.lines()
+        return summary
+
+    def report_changes(self):
+        if not self.change_counts:
+            return
+        self.logger.info(
+            f"Import changes ({self.__class__.__name__}):\n"
+            + "\n".join(self.get_changes_summary())
+        )
+
+    def import_batches(self, json_list: Iterable[Dict]) -> bool:
+        """
+        Imports the objects by batches, each one in a transaction; the search index
+        is updated once all of them are imported.
+        """
+        result = True
+        items = iter(json_list)
+        with self.timed("reference data"):
+            self.reference_data = ReferenceData()
+        try:
+            # the permissions are only assigned by flush_permissions()
+            with search_queue.queue_index_updates(), defer_assignments():
+                while True:
+                    batch = list(islice(items, self.batch_size))
+                    if not batch:
+                        break
+                    with transaction.atomic():
+                        with self.timed("import"):
+                            for item in batch:
+                                result = self.import_object(item) and result
+                        with self.timed("permissions"):
+                            self.flush_permissions()
+        finally:
+            self.reference_data = DatabaseReferenceData()
+            self._deferred_permissions = []
         return result
 
     def import_object(self, item: Dict):
@@ -145,9 +341,22 @@ class BaseImporter:
         """
         item_name = item.get("name", "N/A").encode("utf-8")
         self.logger.debug(f'Trying to import item: "{item_name}"')
+        deferred_permissions = len(self._deferred_permissions) if self.bulk else 0
+        change_sets = len(self.change_sets or [])
         try:
-            result = self.process_json(item)
+            if self.bulk or self.dry_run:
+                # a failed item must not abort the transaction of the batch
+                with transaction.atomic():
+                    result = self.process_json(item)
+            else:
+                result = self.process_json(item)
         except Exception as e:
+            # forget the changes of the failed item
+            if self.change_sets:
+                del self.change_sets[change_sets:]
+            if self.bulk:
+                del self._deferred_permissions[deferred_permissions:]
+                self.reference_data = ReferenceData()
             self.logger.error("Import failed: ")
             self.logger.error(str(e))
             if self.verbose:
@@ -158,6 +367,8 @@ class BaseImporter:
             if self.exit_on_error:
                 raise e
             result = False
+        else:
+            self.count_changes(change_sets)
 
         return result
 
@@ -166,6 +377,51 @@ class BaseImporter:
             "Abstract method: Implement this method in the child class."
         )
 
+    def assign_permissions(self, user, obj):
+        """
+        Give the permissions of a local custodian on the object to the user; in bulk mode
+        they are assigned all at once at the end of the batch.
+        """
+        if self.bulk:
+            self._deferred_permissions.append((user, obj))
+        else:
+            getattr(user, f"assign_permissions_to_{obj._meta.model_name}")(obj)
+
+    def flush_permissions(self):
+        """
+        Assign the deferred permissions with one query per model.
+        """
+        deferred = defaultdict(set)
+        for user, obj in self._deferred_permissions:
+            deferred[type(obj)].add((user.pk, obj))
+        self._deferred_permissions = []
+        for model, assignments in deferred.items():
+            permissions = Permission.objects.filter(
+                content_type=ContentType.objects.get_for_model(model),
+                codename__in=[
+                    f"{permission.value}_{model._meta.model_name}"
+                    for permission in (
+                        Permissions.PROTECTED,
+                        Permissions.ADMIN,
+                        Permissions.DELETE,
+                        Permissions.EDIT,
+                    )
+                ],
+            )
+            permission_model = get_user_obj_perms_model(model)
+            permission_model.objects.bulk_create(
+                [
+                    permission_model(
+                        user_id=user_id, permission=permission, content_object=obj
+                    )
+                    for user_id, obj in assignments
+                    for permission in permissions
+                ],
+                ignore_conflicts=True,
+            )
+        if deferred:
+            clear_permission_cache()
+
     def publish_object(self, object) -> bool:
         try:
             object.publish(save=True)
@@ -210,10 +466,8 @@ class BaseImporter:
 
         return local_custodians, local_personnel, external_contacts
 
-    @staticmethod
-    def process_partner(partner_name):
-        partner, _ = Partner.objects.get_or_create(name=partner_name)
-        return partner
+    def process_partner(self, partner_name):
+        return self.reference_data.get_or_create_partner(partner_name)
 
     def process_date(self, date_string):
         regex = r"([0-9]{4})-([0-9]{2})-([0-9]{2})"
@@ -235,9 +489,8 @@ class BaseImporter:
                 f"Couldn't parse the following date: {str(date_string)}"
             )
 
-    @staticmethod
-    def is_local_contact(contact_dict):
-        home_organisation = Partner.objects.get(acronym=settings.COMPANY)
+    def is_local_contact(self, contact_dict):
+        home_organisation = self.reference_data.home_organisation
         _is_local_contact = home_organisation.name in contact_dict.get(
             "affiliations"
         ) or home_organisation.acronym in contact_dict.get("affiliations")
@@ -245,7 +498,7 @@ class BaseImporter:
 
     def validate_contact_type(self, contact_type):
         try:
-            contact_type_obj = ContactType.objects.get(name=contact_type)
+            self.reference_data.get_contact_type(contact_type)
         except ContactType.DoesNotExist:
             self.logger.warning(
                 f'Unknown contact type: {contact_type}. Setting to "Other".'
@@ -256,24 +509,19 @@ class BaseImporter:
     def process_local_contact(
         self, first_name, last_name, email, role_name, affiliations
     ):
-        user = User.objects.filter(
-            first_name__icontains=first_name, last_name__icontains=last_name
-        )
+        find_users = self.reference_data.find_users
+        user = find_users(first_name, last_name)
         if len(user) > 1:
-            users = User.objects.filter(
-                first_name__icontains=first_name,
-                last_name__icontains=last_name,
-                email=email,
-            )
+            users = find_users(first_name, last_name, email)
             if len(users) != 1:
                 msg = (
                     "Something went wrong - there are two contacts with the same first and last name, and it"
                     "s impossible to differentiate them"
                 )
                 self.logger.warning(msg)
-            user = users.first()
+            user = users[0] if users else None
         elif len(user) == 1:
-            user = user.first()
+            user = user[0]
         else:
             user = None
         if user is None:
@@ -293,9 +541,9 @@ class BaseImporter:
             user.staff = True
 
             if role_name == PRINCIPAL_INVESTIGATOR:
-                g = Group.objects.get(name=GroupConstants.VIP.value)
-                user.groups.add(g)
+                user.groups.add(self.reference_data.vip_group)
             user.save()
+            self.reference_data.add_user(user)
         return user
 
     def process_external_contact(
@@ -318,14 +566,12 @@ class BaseImporter:
                 first_name=first_name,
                 last_name=last_name,
                 email=email,
-                type=ContactType.objects.get(name=role_name),
+                type=self.reference_data.get_contact_type(role_name),
             )
             for affiliation in affiliations:
-                partner = Partner.objects.filter(
-                    name=affiliation
-                ) | Partner.objects.filter(acronym=affiliation)
-                if len(partner):
-                    contact.partners.add(partner[0])
+                partner = self.reference_data.find_partner(affiliation)
+                if partner is not None:
+                    contact.partners.add(partner)
                 else:
                     self.logger.warning(
                         f"Cannot link contact '{first_name} {last_name}' to partner. No partner found for the affiliation: {affiliation}"
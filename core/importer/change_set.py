@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, List, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import models
+
+# longest value shown in the summary of the changes
+MAX_VALUE_LENGTH = 80
+
+
+def _normalize(field, value):
+    """
+    Return the value as it is stored, to compare it with the current one
+    (e.g. a date for a datetime, the pk for an object).
+    """
+    if field.is_relation:
+        return value.pk if isinstance(value, models.Model) else value
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        return value
+
+
+def _show(value) -> str:
+    value = repr(value)
+    if len(value) > MAX_VALUE_LENGTH:
+        return value[: MAX_VALUE_LENGTH - 3] + "..."
+    return value
+
+
+class ChangeSet:
+    """
+    Changes made by the import of an entity (and of its sub-entities) to the state
+    of the database; only the changed fields and relations are written.
+    """
+
+    def __init__(self, obj: models.Model, created: bool = False):
+        self.label = f"{obj._meta.verbose_name} '{obj}'"
+        self.created = created
+        # name -> (old value, new value)
+        self.fields: Dict[str, Tuple] = {}
+        # name -> (removed objects, added objects)
+        self.relations: Dict[str, Tuple[List[str], List[str]]] = {}
+
+    def __bool__(self):
+        return self.created or bool(self.fields) or bool(self.relations)
+
+    @property
+    def status(self) -> str:
+        if self.created:
+            return "created"
+        return "updated" if self else "unchanged"
+
+    def update_fields(self, obj: models.Model, values: Dict, prefix: str = "") -> bool:
+        """
+        Set the values which differ from the current ones on the object, without saving it.
+        Returns whether the object has changed and must be saved.
+        """
+        changed = False
+        for name, value in values.items():
+            field = obj._meta.get_field(name)
+            current = getattr(obj, field.attname if field.is_relation else name)
+            if _normalize(field, value) == current:
+                continue
+            self.fields[f"{prefix}{name}"] = (current, value)
+            setattr(obj, name, value)
+            changed = True
+        return changed
+
+    def set_relation(self, name: str, manager, objects: Iterable[models.Model]):
+        """
+        Make the objects the only ones of the many-to-many relation, adding
+        and removing only the ones which differ.
+        """
+        objects = {obj.pk: obj for obj in objects}
+        current = {obj.pk: obj for obj in manager.all()}
+        removed = [obj for pk, obj in current.items() if pk not in objects]
+        added = [obj for pk, obj in objects.items() if pk not in current]
+        if removed:
+            manager.remove(*removed)
+        if added:
+            manager.add(*added)
+        self.record_relation(name, removed, added)
+
+    def add_to_relation(self, name: str, manager, objects: Iterable[models.Model]):
+        """
+        Add the objects which are not in the many-to-many relation yet.
+        """
+        current = set(manager.values_list("pk", flat=True))
+        added = list({obj.pk: obj for obj in objects if obj.pk not in current}.values())
+        if added:
+            manager.add(*added)
+        self.record_relation(name, [], added)
+
+    def record_relation(
+        self, name: str, removed: Iterable[models.Model], added: Iterable[models.Model]
+    ):
+        removed, added = [str(obj) for obj in removed], [str(obj) for obj in added]
+        if not (removed or added):
+            return
+        previous_removed, previous_added = self.relations.get(name, ([], []))
+        self.relations[name] = (previous_removed + removed, previous_added + added)
+
+    def lines(self) -> List[str]:
+        lines = [f"{self.label}: {self.status}"]
+        if not self.created:
+            lines += [
+                f"    {name}: {_show(old)} -> {_show(new)}"
+                for name, (old, new) in self.fields.items()
+            ]
+        for name, (removed, added) in self.relations.items():
+            lines += [f"    {name}: + {_show(obj)}" for obj in added]
+            lines += [f"    {name}: - {_show(obj)}" for obj in removed]
+        return lines
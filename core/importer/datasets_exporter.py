@@ -1,10 +1,10 @@
-import json
 import sys
 
+from core.importer.json_stream import iter_json_document
 from core.models import Dataset, Exposure
+from django.db.models import Prefetch
 from core.utils import DaisyLogger
 from django.conf import settings
-from io import StringIO
 from urllib.parse import urljoin
 
 JSONSCHEMA_BASE_REMOTE_URL = getattr(settings, "IMPORT_JSON_SCHEMAS_URI")
@@ -13,6 +13,9 @@ logger = DaisyLogger(__name__)
 
 
 class DatasetsExporter:
+    # number of datasets fetched from the database at once
+    chunk_size = 100
+
     def __init__(self, objects=None, endpoint_id=-1, include_unpublished=False):
         self.include_unpublished = include_unpublished
         """
@@ -33,8 +36,9 @@ class DatasetsExporter:
     def export_to_file(self, file_handle, stop_on_error=False, verbose=False):
         result = True
         try:
-            buffer = self.export_to_buffer(StringIO())
-            print(buffer.getvalue(), file=file_handle)
+            for chunk in self.export_to_stream(stop_on_error, verbose):
+                file_handle.write(chunk)
+            file_handle.write("\n")
         except Exception as e:
             logger.error("Dataset export failed")
             logger.error(str(e))
@@ -42,8 +46,32 @@ class DatasetsExporter:
         logger.info(f"Dataset export complete see file: {file_handle}")
         return result
 
-    def export_to_buffer(self, buffer, stop_on_error=False, verbose=False):
-        dataset_dicts = []
+    def export_to_buffer(
+        self, buffer, stop_on_error=False, verbose=False, indent=4, extra=None
+    ):
+        for chunk in self.export_to_stream(
+            stop_on_error, verbose, indent=indent, extra=extra
+        ):
+            buffer.write(chunk)
+        return buffer
+
+    def export_to_stream(
+        self, stop_on_error=False, verbose=False, indent=4, extra=None, error_key=None
+    ):
+        """
+        Yield the JSON export chunk by chunk, one dataset at a time.
+        `extra` keys are added to the document after the items,
+        see `iter_json_document` for `error_key`.
+        """
+        return iter_json_document(
+            urljoin(JSONSCHEMA_BASE_REMOTE_URL, "elu-dataset.json"),
+            self.iter_items(stop_on_error, verbose),
+            indent=indent,
+            extra=extra,
+            error_key=error_key,
+        )
+
+    def iter_items(self, stop_on_error=False, verbose=False):
         if self.objects is not None:
             objects = self.objects
         else:
@@ -52,16 +80,25 @@ class DatasetsExporter:
             objects = objects.filter(
                 exposures__endpoint__id=self.endpoint_id
             ).distinct()  # we have deprecated exposures for one dataset
-        for dataset in objects:
+            # the exposures of the endpoint, the most relevant one first
+            objects = objects.prefetch_related(
+                Prefetch(
+                    "exposures",
+                    queryset=Exposure.objects.filter(
+                        endpoint_id=self.endpoint_id
+                    ).order_by("-deprecated_at"),
+                    to_attr="endpoint_exposures",
+                )
+            )
+        objects = objects.for_export()
+        for dataset in objects.iterator(chunk_size=self.chunk_size):
             dataset_repr = str(dataset)
             logger.debug(f' * Exporting dataset: "{dataset_repr}"...')
             try:
                 pd = dataset.to_dict()
                 pd["source"] = settings.SERVER_URL
                 if not self.include_unpublished:
-                    exposure = Exposure.objects.order_by("-deprecated_at").filter(
-                        dataset=dataset, endpoint_id=self.endpoint_id
-                    )[0]
+                    exposure = dataset.endpoint_exposures[0]
                     pd["form_id"] = exposure.form_id
                     pd["deprecated"] = exposure.is_deprecated
                     pd["deprecation_date"] = (
@@ -76,7 +113,7 @@ class DatasetsExporter:
                     )
                     pd["deprecation_notes"] = exposure.deprecation_reason
                     pd["request_pdf_enabled"] = exposure.request_pdf_enabled
-                dataset_dicts.append(pd)
+                yield pd
             except Exception as e:
                 logger.error(f"Export failed for dataset {dataset.title}")
                 logger.error(str(e))
@@ -88,13 +125,3 @@ class DatasetsExporter:
                 if stop_on_error:
                     raise e
             logger.debug("   ... complete!")
-
-        json.dump(
-            {
-                "$schema": urljoin(JSONSCHEMA_BASE_REMOTE_URL, "elu-dataset.json"),
-                "items": dataset_dicts,
-            },
-            buffer,
-            indent=4,
-        )
-        return buffer
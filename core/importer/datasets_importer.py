@@ -12,8 +12,6 @@ from core.models import (
     StorageResource,
     Share,
     UseCondition,
-    PersonalDataType,
-    LegalBasisType,
     LegalBasis,
 )
 from core.models.data_declaration import (
@@ -65,26 +63,33 @@ class DatasetsImporter(BaseImporter):
                 raise DatasetImportError(
                     data=f'Updating published entity is not supported - dataset: "{dataset.title}".'
                 )
+            change_set = self.start_change_set(dataset)
         except Dataset.DoesNotExist:
             dataset = Dataset.objects.create(
                 title=title, elu_accession=dataset_dict.get("external_id", None)
             )
+            change_set = self.start_change_set(dataset, created=True)
 
+        values = {
+            "sensitivity": dataset_dict.get("sensitivity", None),
+            "scientific_metadata": dataset_dict.get("metadata", "{}") or "{}",
+        }
         if "project" in dataset_dict and dataset_dict["project"]:
-            dataset.project = self.process_project(dataset_dict["project"])
-
-        dataset.sensitivity = dataset_dict.get("sensitivity", None)
+            values["project"] = self.process_project(dataset_dict["project"])
+        # only the changed fields are written
+        if change_set.update_fields(dataset, values):
+            dataset.save()
 
         local_custodians, local_personnel, external_contacts = self.process_contacts(
             dataset_dict.get("contacts", [])
         )
 
         if local_custodians:
-            dataset.local_custodians.set(local_custodians, clear=True)
+            change_set.set_relation(
+                "local_custodians", dataset.local_custodians, local_custodians
+            )
 
-        data_locations = self.process_data_locations(dataset, dataset_dict)
-        if data_locations:
-            dataset.data_locations.set(data_locations, bulk=False)
+        self.process_data_locations(dataset, dataset_dict, change_set)
 
         # users_with_access = self.process_user_acl(storage_location_dict)
         # if users_with_access:
@@ -92,28 +97,18 @@ class DatasetsImporter(BaseImporter):
         # if 'storage_acl_notes' in storage_location_dict:
         #     dl.access_notes = storage_location_dict['storage_acl_notes']
 
-        shares = self.process_transfers(dataset_dict, dataset)
-        if shares:
-            dataset.shares.set(shares, bulk=False)
-
-        dataset.scientific_metadata = dataset_dict.get("metadata", "{}") or "{}"
+        self.process_transfers(dataset_dict, dataset, change_set)
 
-        dataset.save()
-        dataset.updated = True
         for local_custodian in local_custodians:
-            local_custodian.assign_permissions_to_dataset(dataset)
+            self.assign_permissions(local_custodian, dataset)
 
-        studies_map = self.process_datadeclarations(dataset_dict, dataset)
+        studies_map = self.process_datadeclarations(dataset_dict, dataset, change_set)
 
         # Must be run after processing data declarations
-        self.process_studies(dataset_dict, studies_map)
+        self.process_studies(dataset_dict, studies_map, change_set)
 
         # Must be run after processing data declarations
-        legal_bases = self.process_legal_bases(dataset_dict, dataset)
-        if legal_bases:
-            dataset.legal_basis_definitions.set(legal_bases, bulk=False)
-
-        dataset.save()
+        self.process_legal_bases(dataset_dict, dataset, change_set)
 
         if self.publish_on_import:
             self.publish_object(dataset)
@@ -138,8 +133,15 @@ class DatasetsImporter(BaseImporter):
             project = Project.objects.create(acronym=acronym, title=acronym)
         return project
 
-    def process_data_locations(self, dataset, dataset_dict):
+    def process_data_locations(self, dataset, dataset_dict, change_set):
+        """
+        Creates the data locations of the dataset which do not exist yet.
+        """
         data_locations = []
+        existing_locations = {
+            (dl.category, dl.backend_id, dl.location_description): dl
+            for dl in dataset.data_locations.all()
+        }
         backend_mapping = {
             "aspera": "lcsb-aspera",
             "atlas": "atlas-server",
@@ -168,7 +170,7 @@ class DatasetsImporter(BaseImporter):
                         data=f'Not a proper backend name: "{backend_name}".'
                     )
                 try:
-                    backend = StorageResource.objects.get(slug=backend_name)
+                    backend = self.reference_data.get_storage_resource(backend_name)
                 except StorageResource.DoesNotExist:
                     raise DatasetImportError(
                         data=f'Cannot find StorageResource with slug: "{backend_name}".'
@@ -177,12 +179,18 @@ class DatasetsImporter(BaseImporter):
 
                 location_delimeted = "\n".join(storage_location_dict["location"])
 
+                dl = existing_locations.get((category, backend.pk, location_delimeted))
+                if dl is not None:
+                    data_locations.append(dl)
+                    continue
                 dl = DataLocation.objects.create(
                     category=category,
                     backend=backend,
                     dataset=dataset,
                     **{"location_description": location_delimeted},
                 )
+                existing_locations[(category, backend.pk, location_delimeted)] = dl
+                change_set.record_relation("data_locations", [], [dl])
                 master_locations = DataLocation.objects.filter(
                     category=StorageLocationCategory.master, dataset=dataset
                 )
@@ -197,7 +205,11 @@ class DatasetsImporter(BaseImporter):
                 data_locations.append(dl)
         return data_locations
 
-    def process_transfers(self, dataset_dict, dataset):
+    def process_transfers(self, dataset_dict, dataset, change_set):
+        """
+        Creates the shares of the dataset which do not exist yet.
+        """
+
         def process_transfer(share_dict, dataset):
             share = Share()
             share.share_notes = share_dict.get("transfer_details")
@@ -223,8 +235,26 @@ class DatasetsImporter(BaseImporter):
             #         share.contract = contract
             return share
 
-        transfers = dataset_dict.get("transfers", [])
-        return [process_transfer(transfer_dict, dataset) for transfer_dict in transfers]
+        def get_key(share):
+            return (
+                share.partner_id,
+                share.share_notes,
+                Share._meta.get_field("granted_on").to_python(share.granted_on),
+            )
+
+        existing_shares = {get_key(share): share for share in dataset.shares.all()}
+        shares = []
+        for transfer_dict in dataset_dict.get("transfers", []):
+            share = process_transfer(transfer_dict, dataset)
+            key = get_key(share)
+            if key in existing_shares:
+                shares.append(existing_shares[key])
+                continue
+            share.save()
+            existing_shares[key] = share
+            change_set.record_relation("shares", [], [share])
+            shares.append(share)
+        return shares
 
     def process_location_category(self, storage_location_dict):
         category_str = storage_location_dict.get("category", "").strip().lower()
@@ -239,19 +269,19 @@ class DatasetsImporter(BaseImporter):
         else:
             return None
 
-    def process_datadeclarations(self, dataset_dict, dataset):
+    def process_datadeclarations(self, dataset_dict, dataset, change_set):
         studies_map = {}
         datadec_dicts = dataset_dict.get("data_declarations", [])
 
         for ddec_dict in datadec_dicts:
             data_declaration, studies_map_key = self.process_datadeclaration(
-                ddec_dict, dataset
+                ddec_dict, dataset, change_set
             )
             studies_map[studies_map_key] = data_declaration
 
         return studies_map
 
-    def process_datadeclaration(self, datadec_dict, dataset):
+    def process_datadeclaration(self, datadec_dict, dataset, change_set):
         try:
             title = datadec_dict["title"]
             title_to_show = title.encode("utf-8")
@@ -268,6 +298,7 @@ class DatasetsImporter(BaseImporter):
             self.logger.warning(msg)
         else:
             datadec = DataDeclaration.objects.create(title=title, dataset=dataset)
+            change_set.record_relation("data_declarations", [], [datadec])
 
         if (
             "source_study" not in datadec_dict
@@ -277,27 +308,34 @@ class DatasetsImporter(BaseImporter):
                 f"Data declaration with title '{title_to_show}' has no `source_study` set - there will be a problem processing study/cohort data."
             )
 
-        datadec.has_special_subjects = datadec_dict.get("has_special_subjects", False)
-        datadec.data_types_notes = datadec_dict.get("data_type_notes", None)
-        datadec.deidentification_method = self.process_deidentification_method(
-            datadec_dict
-        )
-        datadec.subjects_category = self.process_subjects_category(datadec_dict)
-        datadec.special_subjects_description = datadec_dict.get(
-            "special_subjects_description", None
-        )
-        datadec.other_external_id = datadec_dict.get("other_external_id", None)
-        datadec.share_category = self.process_access_category(datadec_dict)
-        datadec.access_procedure = datadec_dict.get("access_procedure", "")
-        datadec.consent_status = self.process_constent_status(datadec_dict)
-        datadec.comments = datadec_dict.get("source_notes", None)
-        datadec.embargo_date = datadec_dict.get("embargo_date", None)
-        datadec.storage_duration_criteria = datadec_dict.get(
-            "storage_duration_criteria", None
-        )
-        datadec.end_of_storage_duration = datadec_dict.get("storage_end_date", None)
+        values = {
+            "has_special_subjects": datadec_dict.get("has_special_subjects", False),
+            "data_types_notes": datadec_dict.get("data_type_notes", None),
+            "deidentification_method": self.process_deidentification_method(
+                datadec_dict
+            ),
+            "subjects_category": self.process_subjects_category(datadec_dict),
+            "special_subjects_description": datadec_dict.get(
+                "special_subjects_description", None
+            ),
+            "other_external_id": datadec_dict.get("other_external_id", None),
+            "share_category": self.process_access_category(datadec_dict),
+            "access_procedure": datadec_dict.get("access_procedure", ""),
+            "consent_status": self.process_constent_status(datadec_dict),
+            "comments": datadec_dict.get("source_notes", None),
+            "embargo_date": datadec_dict.get("embargo_date", None),
+            "storage_duration_criteria": datadec_dict.get(
+                "storage_duration_criteria", None
+            ),
+            "end_of_storage_duration": datadec_dict.get("storage_end_date", None),
+        }
+        prefix = f"data declaration '{datadec}' "
         if "data_types" in datadec_dict:
-            datadec.data_types_received.set(self.process_datatypes(datadec_dict))
+            change_set.set_relation(
+                prefix + "data_types_received",
+                datadec.data_types_received,
+                self.process_datatypes(datadec_dict),
+            )
 
         # if 'contract_obj' not in kwargs:
         #     if 'source_collaboration' in datadec_dict:
@@ -306,10 +344,9 @@ class DatasetsImporter(BaseImporter):
         #     datadec.contract = kwargs.pop('contract_obj')
         # if datadec.contract:
         #     datadec.partner = datadec.contract.partners.first()
-        self.process_use_conditions(datadec, datadec_dict)
-        datadec.dataset = dataset
-        datadec.save()
-        datadec.updated = True
+        self.process_use_conditions(datadec, datadec_dict, change_set)
+        if change_set.update_fields(datadec, values, prefix=prefix):
+            datadec.save()
 
         return datadec, datadec_dict.get("source_study")
 
@@ -318,7 +355,7 @@ class DatasetsImporter(BaseImporter):
         for datatype_str in datadec_dict.get("data_types", []):
             datatype_str = datatype_str.strip()
             try:
-                datatype, _ = DataType.objects.get_or_create(name=datatype_str)
+                datatype = self.reference_data.get_or_create_data_type(datatype_str)
             except DataType.DoesNotExist:
                 self.logger.error("Import failed")
                 raise DatasetImportError(
@@ -413,7 +450,7 @@ class DatasetsImporter(BaseImporter):
     #         contract.save()
     #         return contract
 
-    def process_use_conditions(self, data_dec, datadec_dict):
+    def process_use_conditions(self, data_dec, datadec_dict, change_set):
         use_conditions = []
         for use_condition_dict in datadec_dict["use_conditions"]:
             ga4gh_code = use_condition_dict.get("use_class", "")
@@ -425,13 +462,17 @@ class DatasetsImporter(BaseImporter):
             except KeyError:
                 use_condition_rule = "-"
 
-            use_condition, _ = UseCondition.objects.get_or_create(
+            use_condition, created = UseCondition.objects.get_or_create(
                 data_declaration=data_dec,
                 condition_class=ga4gh_code,
                 notes=notes,
                 use_class_note=use_class_note,
                 use_condition_rule=use_condition_rule,
             )
+            if created:
+                change_set.record_relation(
+                    f"data declaration '{data_dec}' use_conditions", [], [use_condition]
+                )
             use_conditions.append(use_condition)
         return use_conditions
 
@@ -455,7 +496,7 @@ class DatasetsImporter(BaseImporter):
         except KeyError:
             return ConsentStatus.unknown
 
-    def process_legal_bases(self, dataset_dict, dataset_object):
+    def process_legal_bases(self, dataset_dict, dataset_object, change_set):
         """
         This should be called after data-declarations have been processed
         (they rely on data-declaration's acronyms to be properly imported)
@@ -463,10 +504,19 @@ class DatasetsImporter(BaseImporter):
         if "legal_bases" not in dataset_dict:
             return
 
-        return [
+        existing = set(
+            dataset_object.legal_basis_definitions.values_list("pk", flat=True)
+        )
+        legal_bases = [
             self.process_legal_basis(legal_basis, dataset_object)
             for legal_basis in dataset_dict.get("legal_bases")
         ]
+        change_set.record_relation(
+            "legal_basis_definitions",
+            [],
+            {obj.pk: obj for obj in legal_bases if obj.pk not in existing}.values(),
+        )
+        return legal_bases
 
     def process_legal_basis(self, legal_basis, dataset_object):
         """
@@ -478,12 +528,13 @@ class DatasetsImporter(BaseImporter):
         )
         # get only those legal bases with matching data types and basis codes
         legal_basis_types_titles = legal_basis.get("legal_basis_codes", [])
+        personal_data_types_titles = legal_basis.get("personal_data_codes", [])
         legal_basis_types = [
-            LegalBasisType.objects.get(code=code) for code in legal_basis_types_titles
+            self.reference_data.get_legal_basis_type(code)
+            for code in legal_basis_types_titles
         ]
-        personal_data_types_titles = legal_basis.get("personal_data_codes", [])
         personal_data_types = [
-            PersonalDataType.objects.get(code=code)
+            self.reference_data.get_personal_data_type(code)
             for code in personal_data_types_titles
         ]
         datasets_legal_bases = datasets_legal_bases.annotate(
@@ -528,7 +579,7 @@ class DatasetsImporter(BaseImporter):
 
         return legal_basis_obj
 
-    def process_studies(self, dataset_dict, studies_map):
+    def process_studies(self, dataset_dict, studies_map, change_set):
         def _process_study(study):
             name = study.get("name", "")
             safe_name = name.encode("utf-8")
@@ -548,24 +599,26 @@ class DatasetsImporter(BaseImporter):
                 self.logger.warning(msg)
             else:
                 cohort = Cohort.objects.create(title=name)
-
-            cohort.comments = description
-            cohort.ethics_confirmation = has_ethics_approval
-            cohort.ethics_notes = ethics_approval_notes
-            cohort.cohort_web_page = url
-            cohort.scientific_metadata = metadata
-            cohort.save()
-            cohort.updated = True
+                change_set.record_relation("cohorts", [], [cohort])
+
+            values = {
+                "comments": description,
+                "ethics_confirmation": has_ethics_approval,
+                "ethics_notes": ethics_approval_notes,
+                "cohort_web_page": url,
+                "scientific_metadata": metadata,
+            }
+            prefix = f"cohort '{cohort}' "
+            if change_set.update_fields(cohort, values, prefix=prefix):
+                cohort.save()
 
             (
                 local_custodians,
                 local_personnel,
                 external_contacts,
             ) = self.process_contacts(study.get("contacts", []))
-            cohort.owners.set(external_contacts)
+            change_set.set_relation(prefix + "owners", cohort.owners, external_contacts)
 
-            cohort.save()
-            cohort.updated = True
             msg = f"Cohort '{safe_name}' imported successfully. Will try to link it to the data declaration..."
             self.logger.info(msg)
 
@@ -575,8 +628,11 @@ class DatasetsImporter(BaseImporter):
                     raise KeyError()
                 if not isinstance(data_declaration, DataDeclaration):
                     raise KeyError()
-                data_declaration.cohorts.add(cohort)
-                data_declaration.save()
+                change_set.add_to_relation(
+                    f"data declaration '{data_declaration}' cohorts",
+                    data_declaration.cohorts,
+                    [cohort],
+                )
                 safe_title = data_declaration.title.encode("utf8")
                 self.logger.info(
                     f"Cohort '{safe_name}' linked successfully to data declaration '{safe_title}'"
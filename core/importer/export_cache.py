@@ -0,0 +1,91 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+
+# the snapshots are keyed by the generation of the exported data,
+# bumping the generation invalidates all of them at once
+GENERATION_KEY = "export-snapshot:generation"
+SNAPSHOT_KEY_PREFIX = "export-snapshot"
+
+
+def get_snapshot_timeout() -> int:
+    return getattr(settings, "EXPORT_SNAPSHOT_TIMEOUT", 3600)
+
+
+def get_generation() -> float:
+    """
+    Return the time at which the exported data last changed.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time()
+        cache.add(GENERATION_KEY, generation, timeout=None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_snapshots():
+    """
+    Mark all the export snapshots as stale.
+    """
+    cache.set(GENERATION_KEY, time.time(), timeout=None)
+
+
+def get_last_modified() -> datetime:
+    return datetime.fromtimestamp(get_generation(), tz=timezone.utc)
+
+
+def get_etag(key: str) -> str:
+    return hashlib.sha256(f"{key}:{get_generation()!r}".encode()).hexdigest()
+
+
+def get_snapshot(etag: str) -> Optional[str]:
+    return cache.get(f"{SNAPSHOT_KEY_PREFIX}:{etag}")
+
+
+def set_snapshot(etag: str, content: str):
+    """
+    Store the export matching the given etag; the etag must be computed before the
+    export is generated so that changes made in the meantime invalidate it.
+    """
+    cache.set(f"{SNAPSHOT_KEY_PREFIX}:{etag}", content, timeout=get_snapshot_timeout())
+
+
+def get_exported_models(queryset) -> Set[type]:
+    """
+    Return the models read by the export of the queryset: its model and the ones along
+    its select_related and prefetch_related lookups, with the through models of the
+    many-to-many relations on the way.
+    """
+    from django.db.models import Prefetch
+
+    lookups = [
+        lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        for lookup in queryset._prefetch_related_lookups
+    ]
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        lookups += _flatten_select_related(select_related)
+
+    models = {queryset.model}
+    for lookup in lookups:
+        model = queryset.model
+        for name in lookup.split("__"):
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                models.add(
+                    field.through if field.auto_created else field.remote_field.through
+                )
+            model = field.related_model
+            models.add(model)
+    return models
+
+
+def _flatten_select_related(select_related: dict, prefix: str = ""):
+    for name, nested in select_related.items():
+        yield f"{prefix}{name}"
+        yield from _flatten_select_related(nested, f"{prefix}{name}__")
@@ -0,0 +1,76 @@
+import tempfile
+
+from django.core.files import File
+
+from core.importer.datasets_exporter import DatasetsExporter
+from core.importer.projects_exporter import ProjectsExporter
+from core.importer.tabular_exporter import iter_csv, iter_values, write_xlsx
+from core.models import (
+    Cohort,
+    Contact,
+    Contract,
+    Dataset,
+    ExportJob,
+    Partner,
+    Project,
+)
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+EXPORTED_MODELS = {
+    "cohort": Cohort,
+    "contact": Contact,
+    "contract": Contract,
+    "dataset": Dataset,
+    "partner": Partner,
+    "project": Project,
+}
+
+# models which can also be exported as JSON documents
+JSON_EXPORTERS = {
+    "dataset": DatasetsExporter,
+    "project": ProjectsExporter,
+}
+
+
+def produce_export(job: ExportJob):
+    """
+    Write the export of the job to a temporary file, chunk by chunk, and store it as
+    the file of the job, keeping track of the progress in the database.
+    """
+    model = EXPORTED_MODELS[job.object_name]
+    ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.STATUSES.running)
+
+    def progress(processed):
+        ExportJob.objects.filter(pk=job.pk).update(processed=processed)
+
+    logger.info(f"Running export job {job.pk}: {job}")
+    try:
+        with tempfile.TemporaryFile() as output:
+            if job.format == ExportJob.FORMATS.json:
+                exporter = JSON_EXPORTERS[job.object_name](
+                    objects=model.objects.filter(id__in=job.object_ids),
+                    include_unpublished=True,
+                )
+                for chunk in exporter.export_to_stream(stop_on_error=True):
+                    output.write(chunk.encode())
+            elif job.format == ExportJob.FORMATS.csv:
+                for line in iter_csv(iter_values(model, job.object_ids, progress)):
+                    output.write(line.encode())
+            else:
+                write_xlsx(iter_values(model, job.object_ids, progress), output)
+            output.seek(0)
+            job.file.save(
+                f"{job.object_name}s_{job.pk}.{job.format}", File(output), save=False
+            )
+    except Exception as e:
+        logger.error(f"Export job {job.pk} failed: {e}")
+        job.status = ExportJob.STATUSES.failed
+        job.error = str(e)
+        job.save(update_fields=["status", "error", "updated"])
+        return
+    job.status = ExportJob.STATUSES.done
+    job.processed = job.total
+    job.save(update_fields=["status", "processed", "file", "updated"])
+    logger.info(f"Export job {job.pk} complete: {job.file.name}")
@@ -0,0 +1,204 @@
+import gzip
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# number of characters read from the file at once when parsing a document
+READ_SIZE = 64 * 1024
+
+
+def iter_json_document(
+    schema: str,
+    items: Iterable[dict],
+    indent: Optional[int] = 4,
+    extra: Optional[Dict] = None,
+    error_key: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Serialize a {"$schema": ..., "items": [...], **extra} document chunk by chunk, one item
+    at a time, so that the whole document never has to be held in memory.
+    With an indent, the output is identical to json.dump(document, indent=indent);
+    without, the output is compact.
+    With an `error_key`, an error raised once items were yielded ends the list and the
+    document is closed with {error_key: message} in place of `extra`; errors raised
+    before the first item always propagate.
+    """
+    extra = extra or {}
+    if indent is None:
+        yield '{"$schema":' + json.dumps(schema) + ',"items":['
+        first = True
+        try:
+            for item in items:
+                yield ("" if first else ",") + json.dumps(item, separators=(",", ":"))
+                first = False
+        except Exception as e:
+            if error_key is None or first:
+                raise
+            logger.error("Serialization of the JSON document interrupted", exc_info=e)
+            extra = {error_key: str(e)}
+        yield "]"
+        for key, value in extra.items():
+            yield "," + json.dumps(key) + ":" + json.dumps(value, separators=(",", ":"))
+        yield "}"
+        return
+
+    pad = " " * indent
+    yield "{\n" + pad + '"$schema": ' + json.dumps(schema) + ",\n" + pad + '"items": ['
+    first = True
+    try:
+        for item in items:
+            body = json.dumps(item, indent=indent).replace("\n", "\n" + pad * 2)
+            yield ("\n" if first else ",\n") + pad * 2 + body
+            first = False
+    except Exception as e:
+        if error_key is None or first:
+            raise
+        logger.error("Serialization of the JSON document interrupted", exc_info=e)
+        extra = {error_key: str(e)}
+    yield "]" if first else "\n" + pad + "]"
+    for key, value in extra.items():
+        body = json.dumps(value, indent=indent).replace("\n", "\n" + pad)
+        yield ",\n" + pad + json.dumps(key) + ": " + body
+    yield "\n}"
+
+
+def open_json_file(path: str) -> IO[str]:
+    """
+    Open a JSON file for reading, decompressing it on the fly if it is gzipped.
+    """
+    with open(path, "rb") as raw_file:
+        magic = raw_file.read(len(GZIP_MAGIC))
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class _DocumentReader:
+    """
+    Reads the JSON values of a document one by one, keeping in memory only the part
+    of the text that has not been parsed yet.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, text_file: IO[str]):
+        self.text_file = text_file
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        # read more at once when a value spans several reads
+        chunk = self.text_file.read(max(READ_SIZE, len(self.buffer) - self.position))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character, without consuming it ("" at the end).
+        """
+        while True:
+            while self.position < len(self.buffer):
+                if not self.buffer[self.position].isspace():
+                    return self.buffer[self.position]
+                self.position += 1
+            if not self._fill():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            found = repr(character) if character else "the end of the document"
+            raise ValueError(
+                f"Invalid JSON document: expected one of {characters!r}, found {found}"
+            )
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # the value may continue in the part of the file not read yet
+                if not self._fill():
+                    raise
+                continue
+            # a number at the end of the buffer may not be complete
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+
+
+def _iter_keys(reader: _DocumentReader) -> Iterator[str]:
+    """
+    Yield the keys of the object, the caller must read the value of each key.
+    """
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid JSON document: {key!r} is not a key")
+        reader.expect(":")
+        yield key
+        if reader.expect(",}") == "}":
+            return
+
+
+def _iter_array(reader: _DocumentReader) -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def peek_schema(text_file: IO[str]) -> Optional[str]:
+    """
+    Return the "$schema" of a {"$schema": ..., "items": [...]} document, reading only
+    its header when "$schema" comes first (as in the documents of the exporters).
+    """
+    reader = _DocumentReader(text_file)
+    for key in _iter_keys(reader):
+        if key == "$schema":
+            return reader.value()
+        if reader.peek() == "[":
+            # skip the items one at a time rather than loading all of them
+            for _ in _iter_array(reader):
+                pass
+        else:
+            reader.value()
+    return None
+
+
+def iter_items(text_file: IO[str]) -> Iterator[Dict]:
+    """
+    Yield the items of a {"$schema": ..., "items": [...]} document one at a time,
+    so that the whole document never has to be held in memory.
+    """
+    reader = _DocumentReader(text_file)
+    for key in _iter_keys(reader):
+        if key == "items":
+            yield from _iter_array(reader)
+            return
+        reader.value()
+    raise ValueError('Invalid JSON document: there is no "items" list')
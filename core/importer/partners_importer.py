@@ -43,21 +43,25 @@ class PartnersImporter(BaseImporter):
                 raise PartnerImportError(
                     data=f'Updating published entity is not supported - partner: "{partner.name}".'
                 )
+            change_set = self.start_change_set(partner)
         except Partner.DoesNotExist:
             self.logger.info(f'Creating institution "{partner_dict.get("name")}")')
             partner = Partner.objects.create(name=partner_dict["name"])
+            change_set = self.start_change_set(partner, created=True)
 
-        partner.elu_accession = partner_dict["external_id"]
-        partner.is_clinical = partner_dict["is_clinical"]
-        partner.geo_category = partner_dict["geo_category"]
-        partner.scientific_metadata = partner_dict.get("metadata", "{}") or "{}"
-        partner.sector_category = self.process_sector_category(partner_dict)
-        partner.address = (
-            partner_dict.get("address") if partner_dict.get("address") else ""
-        )
-        partner.country_code = partner_dict["country_code"]
-        partner.save()
-        partner.updated = True
+        values = {
+            "elu_accession": partner_dict["external_id"],
+            "is_clinical": partner_dict["is_clinical"],
+            "geo_category": partner_dict["geo_category"],
+            "scientific_metadata": partner_dict.get("metadata", "{}") or "{}",
+            "sector_category": self.process_sector_category(partner_dict),
+            "address": (
+                partner_dict.get("address") if partner_dict.get("address") else ""
+            ),
+        }
+        # only the changed fields are written
+        if change_set.update_fields(partner, values):
+            partner.save()
         if self.publish_on_import:
             self.publish_object(partner)
         return True
@@ -1,10 +1,9 @@
-import json
 import sys
-from io import StringIO
 from urllib.parse import urljoin
 
 from django.conf import settings
 
+from core.importer.json_stream import iter_json_document
 from core.models import Project
 from core.utils import DaisyLogger
 
@@ -14,6 +13,9 @@ logger = DaisyLogger(__name__)
 
 
 class ProjectsExporter:
+    # number of projects fetched from the database at once
+    chunk_size = 100
+
     def __init__(self, objects=None, endpoint_id=-1, include_unpublished=False):
         self.include_unpublished = include_unpublished
         """
@@ -34,8 +36,9 @@ class ProjectsExporter:
     def export_to_file(self, file_handle, stop_on_error=False, verbose=False):
         result = True
         try:
-            buffer = self.export_to_buffer(StringIO())
-            print(buffer.getvalue(), file=file_handle)
+            for chunk in self.export_to_stream(stop_on_error, verbose):
+                file_handle.write(chunk)
+            file_handle.write("\n")
         except Exception as e:
             logger.error("Project export failed")
             logger.error(str(e))
@@ -49,9 +52,38 @@ class ProjectsExporter:
         stop_on_error=False,
         verbose=False,
         fields=None,
+        indent=4,
+        extra=None,
     ):
-        project_dicts = []
+        for chunk in self.export_to_stream(
+            stop_on_error, verbose, fields=fields, indent=indent, extra=extra
+        ):
+            buffer.write(chunk)
+        return buffer
 
+    def export_to_stream(
+        self,
+        stop_on_error=False,
+        verbose=False,
+        fields=None,
+        indent=4,
+        extra=None,
+        error_key=None,
+    ):
+        """
+        Yield the JSON export chunk by chunk, one project at a time.
+        `extra` keys are added to the document after the items,
+        see `iter_json_document` for `error_key`.
+        """
+        return iter_json_document(
+            urljoin(JSONSCHEMA_BASE_REMOTE_URL, "project.json"),
+            self.iter_items(stop_on_error, verbose, fields=fields),
+            indent=indent,
+            extra=extra,
+            error_key=error_key,
+        )
+
+    def iter_items(self, stop_on_error=False, verbose=False, fields=None):
         if self.objects is not None:
             objects = self.objects
         else:
@@ -59,13 +91,14 @@ class ProjectsExporter:
 
         if not self.include_unpublished:
             objects = objects.filter(datasets__exposures__endpoint__id=self.endpoint_id)
+        objects = objects.for_export()
 
-        for project in objects:
+        for project in objects.iterator(chunk_size=self.chunk_size):
             logger.debug(f' * Exporting project: "{project.acronym}"...')
             try:
                 pd = project.to_dict(fields=fields)
                 pd["source"] = settings.SERVER_URL
-                project_dicts.append(pd)
+                yield pd
             except Exception as e:
                 project_repr = str(project)
                 logger.error(f"Export failed for project f{project_repr}")
@@ -78,12 +111,3 @@ class ProjectsExporter:
                 if stop_on_error:
                     raise e
             logger.debug("   ... complete!")
-        json.dump(
-            {
-                "$schema": urljoin(JSONSCHEMA_BASE_REMOTE_URL, "project.json"),
-                "items": project_dicts,
-            },
-            buffer,
-            indent=4,
-        )
-        return buffer
@@ -64,17 +64,25 @@ class ProjectsImporter(BaseImporter):
         except Project.DoesNotExist:
             project = None
 
+        values = {
+            "title": name,
+            "description": description,
+            "has_cner": has_cner,
+            "has_erp": has_erp,
+            "cner_notes": cner_notes,
+            "erp_notes": erp_notes,
+            "scientific_metadata": metadata,
+        }
+        # keep the accession of the project when the file has none
+        if elu_accession:
+            values["elu_accession"] = elu_accession
+        for attribute_name in ("start_date", "end_date"):
+            values.update(self._process_date_attribute(project_dict, attribute_name))
+
         if project is None:
-            project, _ = Project.objects.get_or_create(
-                acronym=acronym,
-                title=name,
-                description=description,
-                has_cner=has_cner,
-                has_erp=has_erp,
-                cner_notes=cner_notes,
-                erp_notes=erp_notes,
-                elu_accession=elu_accession,
-            )
+            project = Project(acronym=acronym, **values)
+            project.save()
+            change_set = self.start_change_set(project, created=True)
         else:
             acronym_to_show = acronym.encode("utf8")
             if self.skip_on_exist:
@@ -85,40 +93,32 @@ class ProjectsImporter(BaseImporter):
             self.logger.warning(
                 f"Project with acronym '{acronym_to_show}' already found. It will be updated."
             )
-            project.title = name
-            project.description = description
-            project.has_cner = has_cner
-            project.has_erp = has_erp
-            project.cner_notes = cner_notes
-            project.erp_notes = erp_notes
-            project.elu_accession = elu_accession
-
-        self._process_date_attribute(project, project_dict, "start_date")
-        self._process_date_attribute(project, project_dict, "end_date")
-
-        project.scientific_metadata = metadata
-        project.save()
+            # only the changed fields are written
+            change_set = self.start_change_set(project)
+            if change_set.update_fields(project, values):
+                project.save()
 
         local_custodians, local_personnel, external_contacts = self.process_contacts(
             project_dict.get("contacts", [])
         )
 
         if local_personnel:
-            project.company_personnel.set(local_personnel, clear=True)
+            change_set.set_relation(
+                "company_personnel", project.company_personnel, local_personnel
+            )
 
         if local_custodians:
-            project.local_custodians.set(local_custodians, clear=True)
+            change_set.set_relation(
+                "local_custodians", project.local_custodians, local_custodians
+            )
 
         if external_contacts:
-            project.contacts.set(external_contacts, clear=True)
+            change_set.set_relation("contacts", project.contacts, external_contacts)
 
-        for publication in publications:
-            project.publications.add(publication)
+        change_set.add_to_relation("publications", project.publications, publications)
 
-        project.updated = True
-        project.save()
         for local_custodian in local_custodians:
-            local_custodian.assign_permissions_to_project(project)
+            self.assign_permissions(local_custodian, project)
 
         if self.publish_on_import:
             self.publish_object(project)
@@ -153,29 +153,30 @@ class ProjectsImporter(BaseImporter):
 
         # Create a new one if it does not exist
         if publication is None:
-            publication = Publication.objects.create(
-                citation=publication_dict.get("citation_string")
+            return Publication.objects.create(
+                citation=publication_dict.get("citation_string"),
+                doi=publication_dict.get("doi"),
             )
 
         # Then proceed to filling the fields
-        if "doi" in publication_dict:
+        if "doi" in publication_dict and publication.doi != publication_dict.get("doi"):
             publication.doi = publication_dict.get("doi")
-
-        publication.save()
+            publication.save()
         return publication
 
-    def _process_date_attribute(self, project_obj, project_dict, attribute_name):
+    def _process_date_attribute(self, project_dict, attribute_name):
+        """
+        Returns {attribute_name: date} if the date is set and valid, {} otherwise.
+        """
         try:
             if (
                 attribute_name in project_dict
                 and project_dict.get(attribute_name)
                 and len(project_dict.get(attribute_name)) > 0
             ):
-                setattr(
-                    project_obj,
-                    attribute_name,
-                    self.process_date(project_dict.get(attribute_name)),
-                )
+                return {
+                    attribute_name: self.process_date(project_dict.get(attribute_name))
+                }
         except self.DateImportException:
             date_str = project_dict.get(attribute_name)
             message = (
@@ -187,3 +188,4 @@ class ProjectsImporter(BaseImporter):
             message = message + f'Was: "{date_str}". '
             message = message + "Continuing with empty value."
             self.logger.warning(message)
+        return {}
@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+
+from core.constants import Groups as GroupConstants
+from core.models import (
+    ContactType,
+    DataType,
+    LegalBasisType,
+    Partner,
+    PersonalDataType,
+    StorageResource,
+    User,
+)
+
+
+def _first_by(objects, attribute) -> Dict:
+    mapping = {}
+    for obj in objects:
+        mapping.setdefault(getattr(obj, attribute), obj)
+    return mapping
+
+
+class DatabaseReferenceData:
+    """
+    Lookups of the reference tables used by the importers, each one queried in the database.
+    `ReferenceData` answers the same lookups from memory.
+    """
+
+    @property
+    def home_organisation(self) -> Partner:
+        return Partner.objects.get(acronym=settings.COMPANY)
+
+    @property
+    def vip_group(self) -> Group:
+        return Group.objects.get(name=GroupConstants.VIP.value)
+
+    def get_or_create_partner(self, name: str) -> Partner:
+        partner, _ = Partner.objects.get_or_create(name=name)
+        return partner
+
+    def find_partner(self, name_or_acronym: str) -> Optional[Partner]:
+        return (
+            Partner.objects.filter(name=name_or_acronym)
+            | Partner.objects.filter(acronym=name_or_acronym)
+        ).first()
+
+    def get_contact_type(self, name: str) -> ContactType:
+        return ContactType.objects.get(name=name)
+
+    def get_storage_resource(self, slug: str) -> StorageResource:
+        return StorageResource.objects.get(slug=slug)
+
+    def get_or_create_data_type(self, name: str) -> DataType:
+        data_type, _ = DataType.objects.get_or_create(name=name)
+        return data_type
+
+    def get_legal_basis_type(self, code: str) -> LegalBasisType:
+        return LegalBasisType.objects.get(code=code)
+
+    def get_personal_data_type(self, code: str) -> PersonalDataType:
+        return PersonalDataType.objects.get(code=code)
+
+    def add_user(self, user: User):
+        pass
+
+    def find_users(
+        self, first_name: str, last_name: str, email: Optional[str] = None
+    ) -> List[User]:
+        """
+        Users whose names contain the given ones, case-insensitively,
+        with the given email if any.
+        """
+        users = User.objects.filter(
+            first_name__icontains=first_name, last_name__icontains=last_name
+        )
+        if email is not None:
+            users = users.filter(email=email)
+        return list(users)
+
+
+class ReferenceData(DatabaseReferenceData):
+    """
+    In-memory lookup maps of the reference tables used by the importers, loaded once
+    per import run instead of being queried for every imported item.
+    The objects created during the import must be registered with the `add_*` methods.
+    """
+
+    def __init__(self):
+        partners = list(Partner.objects.all())
+        self.partners_by_name = _first_by(partners, "name")
+        self.partners_by_acronym = _first_by(partners, "acronym")
+        self.contact_types = _first_by(ContactType.objects.all(), "name")
+        self.storage_resources = _first_by(StorageResource.objects.all(), "slug")
+        self.data_types = _first_by(DataType.objects.all(), "name")
+        self.legal_basis_types = _first_by(LegalBasisType.objects.all(), "code")
+        self.personal_data_types = _first_by(PersonalDataType.objects.all(), "code")
+        self.users = list(User.objects.order_by("pk"))
+        self._vip_group = None
+
+    @property
+    def home_organisation(self) -> Partner:
+        try:
+            return self.partners_by_acronym[settings.COMPANY]
+        except KeyError:
+            raise Partner.DoesNotExist(
+                f"The home organisation ({settings.COMPANY}) does not exist"
+            )
+
+    @property
+    def vip_group(self) -> Group:
+        if self._vip_group is None:
+            self._vip_group = super().vip_group
+        return self._vip_group
+
+    def add_partner(self, partner: Partner):
+        self.partners_by_name.setdefault(partner.name, partner)
+        if partner.acronym:
+            self.partners_by_acronym.setdefault(partner.acronym, partner)
+
+    def get_or_create_partner(self, name: str) -> Partner:
+        partner = self.partners_by_name.get(name)
+        if partner is None:
+            partner = Partner.objects.create(name=name)
+            self.add_partner(partner)
+        return partner
+
+    def find_partner(self, name_or_acronym: str) -> Optional[Partner]:
+        return self.partners_by_name.get(
+            name_or_acronym
+        ) or self.partners_by_acronym.get(name_or_acronym)
+
+    @staticmethod
+    def _get(mapping: Dict, key: str, model):
+        try:
+            return mapping[key]
+        except KeyError:
+            raise model.DoesNotExist(f"Unknown {model._meta.verbose_name}: {key}")
+
+    def get_contact_type(self, name: str) -> ContactType:
+        return self._get(self.contact_types, name, ContactType)
+
+    def get_storage_resource(self, slug: str) -> StorageResource:
+        return self._get(self.storage_resources, slug, StorageResource)
+
+    def get_or_create_data_type(self, name: str) -> DataType:
+        data_type = self.data_types.get(name)
+        if data_type is None:
+            data_type = DataType.objects.create(name=name)
+            self.data_types[name] = data_type
+        return data_type
+
+    def get_legal_basis_type(self, code: str) -> LegalBasisType:
+        return self._get(self.legal_basis_types, code, LegalBasisType)
+
+    def get_personal_data_type(self, code: str) -> PersonalDataType:
+        return self._get(self.personal_data_types, code, PersonalDataType)
+
+    def add_user(self, user: User):
+        self.users.append(user)
+
+    def find_users(
+        self, first_name: str, last_name: str, email: Optional[str] = None
+    ) -> List[User]:
+        """
+        Users whose names contain the given ones, case-insensitively
+        (like the `icontains` lookups), with the given email if any.
+        """
+        first_name, last_name = first_name.upper(), last_name.upper()
+        return [
+            user
+            for user in self.users
+            if first_name in (user.first_name or "").upper()
+            and last_name in (user.last_name or "").upper()
+            and (email is None or user.email == email)
+        ]
@@ -0,0 +1,93 @@
+import csv
+import datetime
+import json
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import xlsxwriter
+
+from core.models import Cohort, Contact, Contract
+
+# number of objects serialized at once
+CHUNK_SIZE = 500
+
+# relations used by `serialize_to_export` of the models without a `for_export` queryset
+EXPORT_PREFETCH = {
+    Cohort: ("owners__partners", "owners__type", "institutes"),
+    Contact: ("partners", "type"),
+    Contract: ("local_custodians__groups", "project"),
+}
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, to stream the CSV rows.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_values(
+    model, ids: List[int], progress: Optional[Callable[[int], None]] = None
+) -> Iterator[dict]:
+    """
+    Serialize the objects with the given ids chunk by chunk, in the order of the ids.
+    `progress` is called with the number of processed ids after each chunk.
+    """
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start : start + CHUNK_SIZE]
+        objects = model.objects.filter(id__in=chunk)
+        if hasattr(objects, "for_export"):
+            objects = objects.for_export()
+        else:
+            objects = objects.prefetch_related(*EXPORT_PREFETCH.get(model, ()))
+        objects = {obj.id: obj for obj in objects}
+        for pk in chunk:
+            if pk in objects:
+                yield objects[pk].serialize_to_export()
+        if progress is not None:
+            progress(start + len(chunk))
+
+
+def to_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def iter_csv(values: Iterable[dict]) -> Iterator[str]:
+    """
+    Yield the CSV lines of the values, the header first.
+    """
+    writer = csv.writer(Echo())
+    values = iter(values)
+    first = next(values, None)
+    if first is None:
+        return
+    header = list(first.keys())
+    yield writer.writerow(header)
+    yield writer.writerow([to_cell(first.get(key)) for key in header])
+    for row in values:
+        yield writer.writerow([to_cell(row.get(key)) for key in header])
+
+
+def write_xlsx(values: Iterable[dict], output):
+    """
+    Write the values to the (binary) output as a xlsx workbook; the rows are flushed
+    to disk as they are written instead of being kept in memory.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet()
+    header = None
+    for index, row in enumerate(values):
+        if header is None:
+            header = list(row.keys())
+            worksheet.write_row(0, 0, header)
+        worksheet.write_row(index + 1, 0, [to_cell(row.get(key)) for key in header])
+    workbook.close()
@@ -2,11 +2,12 @@ import json
 import urllib3
 from datetime import datetime, date, timedelta
 from dateutil.parser import isoparse
-from typing import Dict, Union, Tuple
+from typing import Dict, List, Set, Union, Tuple
 
 from django.conf import settings
 from django.http import HttpRequest
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, signals
 import requests
 
 from core.synchronizers import (
@@ -40,25 +41,6 @@ else:
     synchronizer = DummyAccountSynchronizer(dummy_backend)
 
 
-def check_existence_automatic(item: Dict[str, str]) -> bool:
-    """
-    Checks if an active access automatically created for the same received data already exists
-    """
-    application, resource, user_oidc_id, email, expiration_date = extract_rems_data(
-        item
-    )
-    filter_oidc = Q(user__oidc_id=user_oidc_id) | Q(contact__oidc_id=user_oidc_id)
-    filter_resource_and_status = Q(
-        dataset__elu_accession=resource,
-        grant_expires_on=expiration_date,
-        status=StatusChoices.active,
-    )
-    existing_accesses = Access.objects.filter(
-        filter_resource_and_status & filter_oidc
-    ).all()
-    return any([a.was_generated_automatically for a in existing_accesses])
-
-
 def handle_rems_callback(request: HttpRequest) -> bool:
     """
     Handles an entitlements request coming from REMS
@@ -85,28 +67,133 @@ def handle_rems_callback(request: HttpRequest) -> bool:
         the_type = type(request_post_data)
         message = f'REMS :: Received data with wrong format (it is not a list, but "{the_type}" instead)!'
         raise TypeError(message)
-    # check if accesses already exist for the received data and eventually update them
+    return handle_rems_entitlements(request_post_data)
+
+
+def find_existing_automatic_accesses(
+    entitlements: List[Tuple[int, str, str, str, date]],
+) -> Set[Tuple[str, str, date]]:
+    """
+    Returns the (resource, user_oidc_id, expiration_date) of the given entitlements
+    for which an active access was already created automatically
+    """
+    resources = {resource for _, resource, _, _, _ in entitlements}
+    oidc_ids = {user_oidc_id for _, _, user_oidc_id, _, _ in entitlements}
+    existing_accesses = Access.objects.filter(
+        Q(user__oidc_id__in=oidc_ids) | Q(contact__oidc_id__in=oidc_ids),
+        dataset__elu_accession__in=resources,
+        status=StatusChoices.active,
+        was_generated_automatically=True,
+    ).values_list(
+        "dataset__elu_accession",
+        "user__oidc_id",
+        "contact__oidc_id",
+        "grant_expires_on",
+    )
+    existing = set()
+    for resource, user_oidc_id, contact_oidc_id, expiration_date in existing_accesses:
+        existing.add((resource, user_oidc_id or contact_oidc_id, expiration_date))
+    return existing
+
+
+def retrieve_rems_entity(user_oidc_id: str, email: str) -> Union[User, Contact, None]:
+    """
+    Find (or create) and update the user or contact with the synchronizer,
+    None if it is not possible
+    """
+    try:
+        return synchronizer.retrieve_and_update_user_or_contact(
+            oidc_id=user_oidc_id, email=email, create_contact_if_not_found=True
+        )
+    except ExternalUserNotFoundException as e:
+        logger.error(
+            f"REMS :: User not found in synchronizer for id '{user_oidc_id}'",
+            exc_info=e,
+        )
+    except InconsistentSynchronizerStateException as e:
+        logger.error(
+            f"REMS :: Inconsistent synchronizer state for id '{user_oidc_id}' and email {email}",
+            exc_info=e,
+        )
+    return None
+
+
+def handle_rems_entitlements(items: List[Dict[str, str]]) -> bool:
+    """
+    Handles a batch of entitlements from REMS:
+    the datasets and the existing accesses are resolved with one query each,
+    the synchronizer and REMS are called once per user and per application,
+    and the new accesses are created together in one transaction.
+
+    :returns: True if all the entitlements were processed, False if not
+    """
+    # check if accesses already exist for the received data
     # if all accesses already exist, return True and stop processing to avoid triggering again the synchronizer
     logger.debug(
         "REMS :: check if accesses automatically created already exists for the received data..."
     )
-    already_existing_accesses = {
-        index
-        for index, item in enumerate(request_post_data)
-        if check_existence_automatic(item)
-    }
-    if len(already_existing_accesses) == len(request_post_data):
-        # all accesses already exist, stopping processing
+    entitlements = [extract_rems_data(item) for item in items]
+    existing = find_existing_automatic_accesses(entitlements)
+    pending = {}
+    for entitlement in entitlements:
+        _, resource, user_oidc_id, _, expiration_date = entitlement
+        key = (resource, user_oidc_id, expiration_date)
+        if key not in existing:
+            # the same entitlement sent twice in the batch is granted once
+            pending.setdefault(key, entitlement)
+    if not pending:
         logger.debug("REMS :: all accesses already exists, noop, stopping processing.")
         return True
 
-    logger.debug("REMS :: some accesses do not exist yet")
-    statuses = [
-        handle_rems_entitlement(item)
-        for index, item in enumerate(request_post_data)
-        if index not in already_existing_accesses
-    ]
-    return all(statuses)
+    logger.debug(f"REMS :: {len(pending)} accesses do not exist yet")
+    resources = {resource for resource, _, _ in pending}
+    datasets = Dataset.objects.in_bulk(resources, field_name="elu_accession")
+    for resource in resources - datasets.keys():
+        message = f"REMS :: Dataset with such `elu_accession` ({resource}) does not exist! Quitting"
+        logger.error(f" * {message}")
+        # TODO: E2E: Save and display a notification to DataStewards
+        raise ValueError(message)
+
+    entities = {}
+    external_ids = {}
+    for application, _, user_oidc_id, email, _ in pending.values():
+        if (user_oidc_id, email) not in entities:
+            entities[(user_oidc_id, email)] = retrieve_rems_entity(user_oidc_id, email)
+        if application not in external_ids:
+            external_ids[application] = get_rems_external_id(application)
+
+    system_rems_user = get_or_create_rems_user()
+    new_accesses = []
+    for application, resource, user_oidc_id, email, expiration_date in pending.values():
+        entity = entities[(user_oidc_id, email)]
+        if entity is None:
+            continue
+        new_accesses.append(
+            build_rems_access(
+                entity,
+                datasets[resource],
+                application,
+                external_ids[application],
+                expiration_date,
+                system_rems_user,
+            )
+        )
+
+    with transaction.atomic():
+        Access.objects.bulk_create(new_accesses)
+        for access in new_accesses:
+            # Necessary to manually send the signal because bulk_create does not use object.save()
+            # Without this, auditlog cannot create a LogEntry for the new access
+            signals.post_save.send(
+                sender=Access,
+                instance=access,
+                created=True,
+                raw=False,
+                using=access._state.db,
+                update_fields=None,
+            )
+    logger.debug(f"REMS :: {len(new_accesses)} accesses created")
+    return len(new_accesses) == len(pending)
 
 
 def extract_rems_data(data: Dict[str, str]) -> Tuple[int, str, str, str, date]:
@@ -136,55 +223,18 @@ def build_default_expiration_date():
     )
 
 
-def handle_rems_entitlement(data: Dict[str, str]) -> bool:
-    """
-    Handles a single piece of information about the entitlement from REMS.
-
-    :returns: True if the user was found and the entitlement processed, False if not
-    """
-    application, resource, user_oidc_id, email, expiration_date = extract_rems_data(
-        data
-    )
-    try:
-        Dataset.objects.get(elu_accession=resource)
-    except Dataset.DoesNotExist:
-        message = f"REMS :: Dataset with such `elu_accession` ({resource}) does not exist! Quitting"
-        logger.error(f" * {message}")
-        # TODO: E2E: Save and display a notification to DataStewards
-        raise ValueError(message)
-
-    try:
-        entity = synchronizer.retrieve_and_update_user_or_contact(
-            oidc_id=user_oidc_id, email=email, create_contact_if_not_found=True
-        )
-    except ExternalUserNotFoundException as e:
-        logger.error(
-            f"REMS :: User not found in synchronizer for id '{user_oidc_id}'",
-            exc_info=e,
-        )
-        return False
-    except InconsistentSynchronizerStateException as e:
-        logger.error(
-            f"REMS :: Inconsistent synchronizer state for id '{user_oidc_id}' and email {email}",
-            exc_info=e,
-        )
-        return False
-
-    return create_rems_entitlement(entity, application, resource, expiration_date)
-
-
-def create_rems_entitlement(
-    obj: Union[Access, User], application: int, dataset_id: str, expiration_date: date
-) -> bool:
+def build_rems_access(
+    obj: Union[Contact, User],
+    dataset: Dataset,
+    application: int,
+    external_id: str,
+    expiration_date: date,
+    system_rems_user: User,
+) -> Access:
     """
-    Tries to find a dataset with `elu_accession` equal to `dataset_id`.
-    If it exists, it will add a new logbook entry (Access object) set to the current user/contact
-    Assumes that the Dataset exists, otherwise will throw an exception.
+    Build the (unsaved) logbook entry granting the access to the dataset to the user/contact
     """
-    dataset = Dataset.objects.get(elu_accession=dataset_id)
-    external_id = get_rems_external_id(application)
     notes = build_access_notes_rems(application, external_id)
-    system_rems_user = get_or_create_rems_user()
 
     access_kwargs = {
         "dataset": dataset,
@@ -199,17 +249,13 @@ def create_rems_entitlement(
     }
 
     if isinstance(obj, User):
-        new_logbook_entry = Access(user=obj, **access_kwargs)
+        return Access(user=obj, **access_kwargs)
     elif isinstance(obj, Contact):
-        new_logbook_entry = Access(contact=obj, **access_kwargs)
-    else:
-        klass = obj.__class__.__name__
-        raise TypeError(
-            f"Wrong type of the object - should be Contact or User, is: {klass} instead"
-        )
-
-    new_logbook_entry.save()
-    return True
+        return Access(contact=obj, **access_kwargs)
+    klass = obj.__class__.__name__
+    raise TypeError(
+        f"Wrong type of the object - should be Contact or User, is: {klass} instead"
+    )
 
 
 def build_access_notes_rems(application: int, external_id: str) -> str:
@@ -0,0 +1,107 @@
+"""
+Catalogue of the fields changed in the audit log, per model, and of the users who made the changes.
+
+Building it reads the whole audit log, so it is cached and then kept up to date as the log
+entries are written; the timeout only bounds the drift caused by concurrent updates.
+This requires a cache shared by all the processes writing log entries (web and Celery workers,
+management commands): in a process-local cache, the catalogue is only kept for a minute.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from auditlog.models import LogEntry
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, F, Func
+
+from core.utils import DaisyLogger, is_cache_shared
+
+logger = DaisyLogger(__name__)
+
+CATALOGUE_KEY = "log-entry-fields"
+
+# the other processes do not update the catalogue of a process-local cache
+LOCAL_CACHE_TIMEOUT = 60
+
+
+def get_timeout() -> int:
+    timeout = getattr(settings, "LOG_ENTRY_FIELDS_CACHE_TIMEOUT", 24 * 60 * 60)
+    if not is_cache_shared():
+        return min(timeout, LOCAL_CACHE_TIMEOUT)
+    return timeout
+
+
+def build_catalogue() -> Dict:
+    """
+    Read the changed fields of each model and the actors from the database,
+    with one aggregate query each.
+    """
+    fields = defaultdict(set)
+    keys = (
+        LogEntry.objects.order_by()
+        .alias(
+            changes_type=Func(
+                F("changes"), function="jsonb_typeof", output_field=CharField()
+            )
+        )
+        .filter(changes_type="object")
+        .annotate(
+            key=Func(
+                F("changes"), function="jsonb_object_keys", output_field=CharField()
+            )
+        )
+        .values_list("content_type", "key")
+        .distinct()
+    )
+    for content_type_id, key in keys:
+        fields[content_type_id].add(key)
+    actors = (
+        LogEntry.objects.order_by()
+        .exclude(actor=None)
+        .values_list("actor", flat=True)
+        .distinct()
+    )
+    return {
+        "fields": {
+            content_type_id: sorted(names) for content_type_id, names in fields.items()
+        },
+        "actors": sorted(actors),
+    }
+
+
+def get_catalogue() -> Dict:
+    """
+    Return {"fields": {content type id: [changed fields]}, "actors": [user ids]}.
+    """
+    catalogue = cache.get(CATALOGUE_KEY)
+    if catalogue is None:
+        logger.debug("Building the catalogue of the audit log fields")
+        catalogue = build_catalogue()
+        cache.set(CATALOGUE_KEY, catalogue, timeout=get_timeout())
+    return catalogue
+
+
+def add_entry(log_entry: LogEntry):
+    """
+    Add the fields and the actor of a new log entry to the cached catalogue.
+    """
+    catalogue = cache.get(CATALOGUE_KEY)
+    if catalogue is None:
+        # built on the next read
+        return
+    changes = log_entry.changes if isinstance(log_entry.changes, dict) else {}
+    known_fields: List[str] = catalogue["fields"].get(log_entry.content_type_id, [])
+    new_fields = set(changes) - set(known_fields)
+    new_actor = (
+        log_entry.actor_id is not None and log_entry.actor_id not in catalogue["actors"]
+    )
+    if not (new_fields or new_actor):
+        return
+    if new_fields:
+        catalogue["fields"][log_entry.content_type_id] = sorted(
+            set(known_fields) | new_fields
+        )
+    if new_actor:
+        catalogue["actors"] = sorted(catalogue["actors"] + [log_entry.actor_id])
+    cache.set(CATALOGUE_KEY, catalogue, timeout=get_timeout())
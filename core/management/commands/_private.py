@@ -3,6 +3,7 @@ import os
 from django.core.management import BaseCommand, CommandError
 
 JSON_SUFFIX = ".json"
+GZIPPED_JSON_SUFFIX = ".json.gz"
 
 
 class ImportBaseCommand(BaseCommand):
@@ -12,7 +13,12 @@ class ImportBaseCommand(BaseCommand):
         parser.add_argument(
             "-d", "--directory", help="Directory with JSON files", default=False
         )
-        parser.add_argument("-f", "--file", help="Path to JSON file", default=False)
+        parser.add_argument(
+            "-f",
+            "--file",
+            help="Path to JSON file (gzipped files are decompressed on the fly)",
+            default=False,
+        )
         parser.add_argument(
             "--publish-entities",
             action="store_true",
@@ -35,6 +41,25 @@ class ImportBaseCommand(BaseCommand):
             action="store_true",
             dest="exit",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Import the records by batches, each one in a transaction, with the reference data loaded once; the time spent in each phase is reported.",
+            dest="bulk",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of records imported in a transaction in bulk mode (default: 100)",
+            dest="batch_size",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Import the records in a transaction which is rolled back at the end, and print the changes the import would make.",
+            dest="dry_run",
+        )
         parser.add_argument(
             "--no-validation",
             action="store_false",
@@ -58,6 +83,9 @@ class ImportBaseCommand(BaseCommand):
                 verbose=verbose,
                 validate=validate,
                 skip_on_exist=skip_on_exist,
+                bulk=options.get("bulk"),
+                batch_size=options.get("batch_size"),
+                dry_run=options.get("dry_run"),
             )
             if not (path_to_json_directory or path_to_json_file):
                 raise CommandError(
@@ -72,6 +100,16 @@ class ImportBaseCommand(BaseCommand):
             if path_to_json_file:
                 self.import_file(importer, path_to_json_file)
 
+            if importer.bulk:
+                for phase, seconds in importer.timings.items():
+                    self.stdout.write(f"{phase}: {seconds:.2f}s")
+            if importer.dry_run:
+                for line in importer.get_changes_summary():
+                    self.stdout.write(line)
+                self.stdout.write(
+                    self.style.SUCCESS("Dry run - nothing was written to the database.")
+                )
+                return
             self.stdout.write(self.style.SUCCESS("Import was successful!"))
 
         except Exception as e:
@@ -86,6 +124,9 @@ class ImportBaseCommand(BaseCommand):
         verbose=False,
         validate=True,
         skip_on_exist=False,
+        bulk=False,
+        batch_size=100,
+        dry_run=False,
     ):
         raise NotImplementedError(
             "Abstract method: Implement this method in the child class."
@@ -93,7 +134,7 @@ class ImportBaseCommand(BaseCommand):
 
     def import_directory(self, importer, dir_path):
         for json_file_path in os.listdir(dir_path):
-            if json_file_path.endswith(JSON_SUFFIX):
+            if json_file_path.endswith((JSON_SUFFIX, GZIPPED_JSON_SUFFIX)):
                 correct_path = os.path.join(dir_path, json_file_path)
                 self.import_file(importer, correct_path)
 
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+
+from core.api_keys import api_key_cache
+
+
+class Command(BaseCommand):
+    help = "Measure the throughput of an API view, with and without the API key cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the API view, e.g. /api/datasets")
+        parser.add_argument("api_key", help="User or endpoint API key")
+        parser.add_argument(
+            "-n",
+            "--requests",
+            type=int,
+            default=20,
+            help="Number of requests per run",
+        )
+
+    def handle(self, *args, **options):
+        path = options.get("path")
+        requests = options.get("requests")
+        try:
+            match = resolve(path)
+        except Resolver404:
+            raise CommandError(f"No view found for {path}")
+
+        factory = RequestFactory()
+
+        def run():
+            start = time.perf_counter()
+            for _ in range(requests):
+                request = factory.get(path, HTTP_X_API_KEY=options.get("api_key"))
+                response = match.func(request, *match.args, **match.kwargs)
+                if response.status_code != 200:
+                    raise CommandError(f"{path} answered {response.status_code}")
+            return requests / (time.perf_counter() - start)
+
+        max_size = api_key_cache.max_size
+        try:
+            api_key_cache.max_size = 0
+            without_cache = run()
+        finally:
+            api_key_cache.max_size = max_size
+        api_key_cache.clear()
+        with_cache = run()
+
+        self.stdout.write(f"Without API key cache: {without_cache:.1f} requests/s")
+        self.stdout.write(f"With API key cache: {with_cache:.1f} requests/s")
@@ -12,7 +12,17 @@ class Command(ImportBaseCommand):
         verbose=False,
         validate=True,
         skip_on_exist=False,
+        bulk=False,
+        batch_size=100,
+        dry_run=False,
     ):
         return ProjectsImporter(
-            publish_on_import, exit_on_error, verbose, validate, skip_on_exist
+            publish_on_import,
+            exit_on_error,
+            verbose,
+            validate,
+            skip_on_exist,
+            bulk=bulk,
+            batch_size=batch_size,
+            dry_run=dry_run,
         )
@@ -26,7 +26,14 @@ from core.models import (
     DataLogType,
 )
 from core.models.partner import Partner
-from core.models.term_model import GeneTerm, StudyTerm, DiseaseTerm, PhenotypeTerm
+from core import term_search
+from core.models.term_model import (
+    GeneTerm,
+    StudyTerm,
+    DiseaseTerm,
+    PhenotypeTerm,
+    TermCategory,
+)
 from core.permissions import GROUP_PERMISSIONS
 
 FIXTURE_DIR = os.path.join(settings.BASE_DIR, "core", "fixtures")
@@ -240,6 +247,7 @@ class Command(BaseCommand):
                     StudyTerm(term_id=class_node[0], label=class_node[1])
                 )
             StudyTerm.objects.bulk_create(study_terms)
+            term_search.invalidate(TermCategory.study.value)
 
     @staticmethod
     def create_disease_terms():
@@ -258,6 +266,7 @@ class Command(BaseCommand):
                     DiseaseTerm(term_id=class_node[0], label=class_node[1])
                 )
             DiseaseTerm.objects.bulk_create(disease_terms)
+            term_search.invalidate(TermCategory.disease.value)
 
     @staticmethod
     def create_phenotype_terms():
@@ -276,6 +285,7 @@ class Command(BaseCommand):
                     PhenotypeTerm(term_id=class_node[0], label=class_node[1])
                 )
             PhenotypeTerm.objects.bulk_create(phenotype_terms)
+            term_search.invalidate(TermCategory.phenotype.value)
 
     @staticmethod
     def create_gene_terms():
@@ -306,6 +316,7 @@ class Command(BaseCommand):
                                     )
                                     break
             GeneTerm.objects.bulk_create(gene_terms)
+            term_search.invalidate(TermCategory.gene.value)
 
     @staticmethod
     def create_legal_basis_types():
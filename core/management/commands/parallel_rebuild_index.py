@@ -0,0 +1,139 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.core.management import BaseCommand
+from django.db import connections
+from haystack import connections as haystack_connections
+
+
+def index_chunk(using, model_label, pks, batch_size, prepare_only=False):
+    """
+    Index the objects of the model with the given pks, batch by batch.
+    Returns the number of indexed documents.
+    """
+    model = apps.get_model(model_label)
+    index = haystack_connections[using].get_unified_index().get_index(model)
+    backend = haystack_connections[using].get_backend()
+    for start in range(0, len(pks), batch_size):
+        batch = (
+            index.index_queryset(using=using)
+            .filter(pk__in=pks[start : start + batch_size])
+            .order_by("pk")
+        )
+        if prepare_only:
+            for obj in batch:
+                index.full_prepare(obj)
+        else:
+            backend.update(index, batch, commit=start + batch_size >= len(pks))
+    return len(pks)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search index with a pool of worker processes, each one indexing "
+        "a chunk of the objects, and report the number of documents indexed per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models to index, e.g. core.Dataset (default: all the indexed models)",
+        )
+        parser.add_argument(
+            "-k",
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, each one indexing a chunk of the objects",
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of objects fetched and sent to the search engine at once",
+        )
+        parser.add_argument(
+            "-u",
+            "--using",
+            default="default",
+            help="Search engine connection to update",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Remove the documents of the models from the index first",
+        )
+        parser.add_argument(
+            "--prepare-only",
+            action="store_true",
+            help="Only prepare the documents, without sending them to the search engine, "
+            "to benchmark the database side of the indexing",
+        )
+
+    def handle(self, *args, **options):
+        using = options.get("using")
+        workers = max(options.get("workers"), 1)
+        batch_size = max(options.get("batch_size"), 1)
+        prepare_only = options.get("prepare_only")
+
+        unified_index = haystack_connections[using].get_unified_index()
+        if options.get("models"):
+            models = [apps.get_model(label) for label in options.get("models")]
+        else:
+            models = unified_index.get_indexed_models()
+
+        total_documents, total_time = 0, 0.0
+        for model in models:
+            index = unified_index.get_index(model)
+            if options.get("clear") and not prepare_only:
+                haystack_connections[using].get_backend().clear(models=[model])
+
+            pks = list(
+                index.index_queryset(using=using)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            if not pks:
+                continue
+            chunk_size = math.ceil(len(pks) / workers)
+            chunks = [pks[i : i + chunk_size] for i in range(0, len(pks), chunk_size)]
+
+            label = model._meta.label
+            start = time.perf_counter()
+            if len(chunks) == 1:
+                documents = index_chunk(using, label, pks, batch_size, prepare_only)
+            else:
+                # the workers must open their own database connections
+                # instead of sharing the ones inherited from this process
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                    documents = sum(
+                        executor.map(
+                            index_chunk,
+                            [using] * len(chunks),
+                            [label] * len(chunks),
+                            chunks,
+                            [batch_size] * len(chunks),
+                            [prepare_only] * len(chunks),
+                        )
+                    )
+            elapsed = time.perf_counter() - start
+
+            total_documents += documents
+            total_time += elapsed
+            self.stdout.write(
+                f"{label}: {documents} documents in {elapsed:.2f}s "
+                f"({documents / elapsed:.1f} documents/s)"
+            )
+
+        if total_time:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Indexed {total_documents} documents in {total_time:.2f}s "
+                    f"({total_documents / total_time:.1f} documents/s)"
+                )
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Responsibility
+
+
+class Command(BaseCommand):
+    help = "Rebuild the index of the entities the local custodians are responsible for"
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding the responsibility index...")
+        Responsibility.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Responsibility index rebuilt with {Responsibility.objects.count()} entries."
+            )
+        )
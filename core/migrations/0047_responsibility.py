@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_responsibilities(apps, schema_editor):
+    """
+    Index the local custodians of the existing projects, datasets, contracts and documents,
+    the signals keep the index up to date from now on. The historical models cannot follow
+    the generic relations of the projects and contracts to their documents, the documents
+    are matched through their content type and object id instead.
+    """
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Responsibility = apps.get_model("core", "Responsibility")
+    Project = apps.get_model("core", "Project")
+    Dataset = apps.get_model("core", "Dataset")
+    Contract = apps.get_model("core", "Contract")
+    Document = apps.get_model("core", "Document")
+    content_types = {
+        model: ContentType.objects.get_for_model(model)
+        for model in (Project, Dataset, Contract, Document)
+    }
+
+    def get_custodians(model):
+        custodians = defaultdict(set)
+        for pk, user_id in model.objects.filter(
+            local_custodians__isnull=False
+        ).values_list("pk", "local_custodians"):
+            custodians[pk].add(user_id)
+        return custodians
+
+    # (content type, object id, user id) -> inherited
+    responsibilities = {}
+
+    def add(model, pk, user_ids, inherited):
+        for user_id in user_ids:
+            key = (content_types[model], pk, user_id)
+            # being a direct local custodian prevails over inheriting the responsibility
+            responsibilities[key] = responsibilities.get(key, True) and inherited
+
+    project_custodians = get_custodians(Project)
+    for pk, user_ids in project_custodians.items():
+        add(Project, pk, user_ids, False)
+    for model in (Dataset, Contract):
+        for pk, project_id in model.objects.filter(project__isnull=False).values_list(
+            "pk", "project_id"
+        ):
+            add(model, pk, project_custodians.get(project_id, ()), True)
+        for pk, user_ids in get_custodians(model).items():
+            add(model, pk, user_ids, False)
+
+    contract_custodians = get_custodians(Contract)
+    contract_projects = dict(Contract.objects.values_list("pk", "project_id"))
+    for pk, content_type_id, object_id in Document.objects.values_list(
+        "pk", "content_type_id", "object_id"
+    ):
+        if content_type_id == content_types[Project].pk:
+            user_ids = project_custodians.get(object_id, set())
+        elif content_type_id == content_types[Contract].pk:
+            user_ids = contract_custodians.get(
+                object_id, set()
+            ) | project_custodians.get(contract_projects.get(object_id), set())
+        else:
+            continue
+        add(Document, pk, user_ids, True)
+
+    Responsibility.objects.bulk_create(
+        (
+            Responsibility(
+                content_type=content_type,
+                object_id=object_id,
+                user_id=user_id,
+                inherited=inherited,
+            )
+            for (
+                content_type,
+                object_id,
+                user_id,
+            ), inherited in responsibilities.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0046_alter_document_content"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Responsibility",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "inherited",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the user is local custodian of a parent entity only",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="responsibilities",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["content_type", "object_id"],
+                        name="core_responsibility_object_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "content_type", "object_id"),
+                        name="unique_responsibility",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_responsibilities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0048_exportjob"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="diseaseterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("label"),
+                    name="gin_trgm_ops",
+                ),
+                name="core_diseaseterm_label_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="geneterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("label"),
+                    name="gin_trgm_ops",
+                ),
+                name="core_geneterm_label_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="phenotypeterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("label"),
+                    name="gin_trgm_ops",
+                ),
+                name="core_phenotypeterm_label_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="studyterm",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("label"),
+                    name="gin_trgm_ops",
+                ),
+                name="core_studyterm_label_trgm",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes of the audit log browser on the table of django-auditlog: a GIN index
+    on the changes for the lookups of the changed fields (`changes ? 'field'`),
+    and an index on the entries of a model ordered by their timestamp.
+    """
+
+    dependencies = [
+        ("core", "0049_term_label_trigram_indexes"),
+        ("auditlog", "0015_alter_logentry_changes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS core_logentry_changes_gin "
+            "ON auditlog_logentry USING gin (changes);",
+            reverse_sql="DROP INDEX IF EXISTS core_logentry_changes_gin;",
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS core_logentry_ct_timestamp "
+            'ON auditlog_logentry (content_type_id, "timestamp" DESC);',
+            reverse_sql="DROP INDEX IF EXISTS core_logentry_ct_timestamp;",
+        ),
+    ]
@@ -27,6 +27,8 @@ from .term_model import StudyTerm, GeneTerm, PhenotypeTerm, DiseaseTerm
 from .data_log_type import DataLogType
 from .endpoint import Endpoint
 from .exposure import Exposure
+from .responsibility import Responsibility
+from .export_job import ExportJob
 
 # They need to be after User because of the inner references
 from .user import User
@@ -64,6 +66,8 @@ __all__ = [
     "DataLogType",
     "Endpoint",
     "Exposure",
+    "Responsibility",
+    "ExportJob",
     "User",
     "DAC",
     "DacMembership",
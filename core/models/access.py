@@ -1,7 +1,7 @@
 import logging
 import typing
 
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from typing import List
 
 from django.conf import settings
@@ -268,6 +268,16 @@ class Access(CoreModel, NotifyMixin):
     def get_absolute_url(self) -> str:
         return self.dataset.get_absolute_url()
 
+    notification_dates = {"grant_expires_on": NotificationVerb.expire}
+    # the local custodians of the dataset and of its project
+    notification_recipient_path = "dataset__responsibilities__user"
+
+    @classmethod
+    def get_notification_objects(cls):
+        return cls.objects.filter(status=StatusChoices.active).select_related(
+            "dataset", "user", "contact"
+        )
+
     @staticmethod
     def get_notification_recipients():
         """
@@ -280,37 +290,12 @@ class Access(CoreModel, NotifyMixin):
             .distinct()
         )
 
-    @classmethod
-    def make_notifications_for_user(
-        cls, day_offset: timedelta, exec_date: date, user: "User"
-    ):
-        # Considering users that are indirectly responsible for the dataset (through projects)
-        possible_datasets = set(user.datasets.all())
-        possible_datasets.update(
-            [
-                dataset
-                for project in user.project_set.all()
-                for dataset in project.datasets.all()
-            ]
-        )
-        # Fetch all necessary data at once before the loop
-        dataset_ids = [dataset.id for dataset in possible_datasets]
-        accesses = Access.objects.filter(
-            Q(dataset_id__in=dataset_ids) & Q(status=StatusChoices.active)
-        )
-
-        for access in accesses:
-            # Check if the dataset has an access that is about to expire
-            if (
-                access.grant_expires_on
-                and access.grant_expires_on - day_offset == exec_date
-            ):
-                cls.notify(user, access, NotificationVerb.expire)
-
     @staticmethod
-    def notify(user: "User", obj: "Access", verb: "NotificationVerb"):
+    def build_notification(
+        user: "User", obj: "Access", verb: "NotificationVerb"
+    ) -> Notification:
         """
-        Notifies concerning users about the entity.
+        Builds the notification of the user about the entity.
         """
         dispatch_by_email = user.notification_setting.send_email
         dispatch_in_app = user.notification_setting.send_in_app
@@ -320,7 +305,7 @@ class Access(CoreModel, NotifyMixin):
 
         logger.info(f"Creating a notification for {user} : {msg}")
 
-        Notification.objects.create(
+        return Notification(
             recipient=user,
             verb=verb,
             message=msg,
@@ -329,7 +314,7 @@ class Access(CoreModel, NotifyMixin):
             dispatch_in_app=dispatch_in_app,
             content_type=ContentType.objects.get_for_model(obj),
             object_id=obj.id,
-        ).save()
+        )
 
 
 auditlog.register(Access)
@@ -5,7 +5,6 @@ from django.urls import reverse
 from enumchoicefield import EnumChoiceField, ChoiceEnum
 
 from core import constants
-from core.models import DataType
 from .utils import CoreModel, TextFieldWithInputWidget
 
 
@@ -326,9 +325,10 @@ class DataDeclaration(CoreModel):
 
     @property
     def data_types(self):
-        return set(
-            DataType.objects.filter(data_declarations_generated=self).all()
-        ).union(set(DataType.objects.filter(data_declarations_received=self).all()))
+        # go through the relations, so that prefetched data types are used
+        return set(self.data_types_generated.all()).union(
+            set(self.data_types_received.all())
+        )
 
     def publish_subentities(self):
         if self.partner:
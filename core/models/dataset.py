@@ -1,14 +1,13 @@
 import uuid
-import datetime
-from datetime import timedelta
 import typing
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
+from django.db.models import OuterRef, Prefetch, Q, Subquery
 from django.urls import reverse
 from django.utils.module_loading import import_string
 from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
@@ -29,6 +28,36 @@ if typing.TYPE_CHECKING:
 logger = DaisyLogger(__name__)
 
 
+class DatasetQuerySet(models.QuerySet):
+    def for_export(self):
+        """
+        Fetch everything needed by `to_dict`, so that the export of the datasets
+        runs in a fixed number of queries whatever the number of datasets.
+        """
+        from core.models import ConditionClass, UseCondition
+
+        use_conditions = UseCondition.objects.annotate(
+            condition_class_label=Subquery(
+                ConditionClass.objects.filter(code=OuterRef("condition_class")).values(
+                    "name"
+                )[:1]
+            )
+        )
+        return self.select_related("project").prefetch_related(
+            "local_custodians__groups",
+            "data_locations__backend",
+            "data_locations__accesses",
+            "shares__partner",
+            "legal_basis_definitions__legal_basis_types",
+            "legal_basis_definitions__personal_data_types",
+            "legal_basis_definitions__data_declarations",
+            "data_declarations__cohorts",
+            "data_declarations__data_types_generated",
+            "data_declarations__data_types_received",
+            Prefetch("data_declarations__data_use_conditions", queryset=use_conditions),
+        )
+
+
 class Dataset(CoreTrackedModel, NotifyMixin):
     class ExposureStatus:
         PUBLISHED = "published"
@@ -61,6 +90,9 @@ class Dataset(CoreTrackedModel, NotifyMixin):
         help_text="Local custodians are the local responsibles for the dataset, this list must include a PI.",
     )
 
+    # index of the direct and indirect local custodians, see Responsibility
+    responsibilities = GenericRelation("core.Responsibility")
+
     other_external_id = TextFieldWithInputWidget(
         blank=True,
         null=True,
@@ -113,6 +145,8 @@ class Dataset(CoreTrackedModel, NotifyMixin):
         help_text="Data Access Committee (DAC) is responsible for reviewing and approving data access requests for this dataset.",
     )
 
+    objects = DatasetQuerySet.as_manager()
+
     @property
     def is_published(self):
         return self.exposures.filter(is_deprecated=False).exists()
@@ -284,6 +318,18 @@ class Dataset(CoreTrackedModel, NotifyMixin):
             if orig.dac_id and self.dac_id != orig.dac_id:
                 raise ValidationError("You cannot change the DAC once it is set.")
 
+    # the events of the datasets are the dates of their data declarations
+    notification_dates = {
+        "embargo_date": NotificationVerb.embargo_end,
+        "end_of_storage_duration": NotificationVerb.end,
+    }
+    # the local custodians of the dataset and of its project
+    notification_recipient_path = "dataset__responsibilities__user"
+
+    @classmethod
+    def get_notification_objects(cls):
+        return DataDeclaration.objects.select_related("dataset")
+
     @staticmethod
     def get_notification_recipients():
         """
@@ -296,33 +342,12 @@ class Dataset(CoreTrackedModel, NotifyMixin):
             .distinct()
         )
 
-    @classmethod
-    def make_notifications_for_user(
-        cls, day_offset: timedelta, exec_date: datetime.date, user: "User"
-    ):
-        # Considering users that are indirectly responsible for the dataset (through projects)
-        possible_datasets = set(user.datasets.all())
-        for project in user.project_set.all():
-            possible_datasets.update(project.datasets.all())
-        for dataset in possible_datasets:
-            # Data Declaration (Embargo Date & End of Storage Duration)
-            for data_declaration in dataset.data_declarations.all():
-                if (
-                    data_declaration.embargo_date
-                    and data_declaration.embargo_date - day_offset == exec_date
-                ):
-                    cls.notify(user, data_declaration, NotificationVerb.embargo_end)
-                if (
-                    data_declaration.end_of_storage_duration
-                    and data_declaration.end_of_storage_duration - day_offset
-                    == exec_date
-                ):
-                    cls.notify(user, data_declaration, NotificationVerb.end)
-
     @staticmethod
-    def notify(user: "User", obj: "DataDeclaration", verb: "NotificationVerb"):
+    def build_notification(
+        user: "User", obj: "DataDeclaration", verb: "NotificationVerb"
+    ) -> Notification:
         """
-        Notifies concerning users about the entity.
+        Builds the notification of the user about the entity.
         """
         dispatch_by_email = user.notification_setting.send_email
         dispatch_in_app = user.notification_setting.send_in_app
@@ -336,7 +361,7 @@ class Dataset(CoreTrackedModel, NotifyMixin):
 
         logger.info(f"Creating a notification for {user} : {msg}")
 
-        Notification.objects.create(
+        return Notification(
             recipient=user,
             verb=verb,
             message=msg,
@@ -345,7 +370,7 @@ class Dataset(CoreTrackedModel, NotifyMixin):
             dispatch_in_app=dispatch_in_app,
             content_type=ContentType.objects.get_for_model(obj.dataset),
             object_id=obj.dataset.id,
-        ).save()
+        )
 
 
 # faster lookup for permissions
@@ -1,7 +1,5 @@
 import os
 import typing
-import datetime
-from datetime import timedelta
 from typing import Optional
 from model_utils import Choices
 
@@ -9,7 +7,7 @@ from django.db import models
 from django.conf import settings
 from django.db.models import Q
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django.db.models.signals import post_delete
@@ -63,6 +61,9 @@ class Document(CoreModel, NotifyMixin):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey("content_type", "object_id")
 
+    # index of the local custodians of the projects and contracts, see Responsibility
+    responsibilities = GenericRelation("core.Responsibility")
+
     content = models.FileField(upload_to=get_file_name, blank=False, max_length=255)
     content_url = models.URLField(verbose_name="Document Url", null=True, blank=True)
     content_notes = models.TextField(
@@ -101,6 +102,10 @@ class Document(CoreModel, NotifyMixin):
     def size(self):
         return self.content.size
 
+    notification_dates = {"expiry_date": NotificationVerb.expire}
+    # the local custodians of the projects and contracts, and of the projects of the contracts
+    notification_recipient_path = "responsibilities__user"
+
     @staticmethod
     def get_notification_recipients():
         """
@@ -113,25 +118,12 @@ class Document(CoreModel, NotifyMixin):
             .distinct()
         )
 
-    @classmethod
-    def make_notifications_for_user(
-        cls, day_offset: timedelta, exec_date: datetime.date, user: "User"
-    ):
-        docs = set()
-        [docs.update(p.legal_documents.all()) for p in user.project_set.all()]
-        [docs.update(c.legal_documents.all()) for c in user.contracts.all()]
-        # Also add all the documents of all contracts of all projects to address the indirect LCs of parent projects
-        for p in user.project_set.all():
-            _ = [docs.update(c.legal_documents.all()) for c in p.contracts.all()]
-
-        for doc in docs:
-            if doc.expiry_date and doc.expiry_date - day_offset == exec_date:
-                cls.notify(user, doc, NotificationVerb.expire)
-
     @staticmethod
-    def notify(user: "User", obj: "Document", verb: "NotificationVerb"):
+    def build_notification(
+        user: "User", obj: "Document", verb: "NotificationVerb"
+    ) -> Notification:
         """
-        Notifies concerning users about the entity.
+        Builds the notification of the user about the entity.
         """
         dispatch_by_email = user.notification_setting.send_email
         dispatch_in_app = user.notification_setting.send_in_app
@@ -141,7 +133,7 @@ class Document(CoreModel, NotifyMixin):
 
         logger.info(f"Creating a notification for {user} : {msg}")
 
-        Notification.objects.create(
+        return Notification(
             recipient=user,
             verb=verb,
             message=msg,
@@ -150,7 +142,7 @@ class Document(CoreModel, NotifyMixin):
             dispatch_in_app=dispatch_in_app,
             content_type=ContentType.objects.get_for_model(obj),
             object_id=obj.id,
-        ).save()
+        )
 
 
 @receiver(post_delete, sender=Document, dispatch_uid="document_delete")
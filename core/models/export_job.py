@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db import models
+from django.urls import reverse
+from model_utils import Choices
+
+from .utils import CoreModel
+
+
+class ExportJob(CoreModel):
+    """
+    Export of a selection of records produced in the background by the
+    `run_export_job` task, downloadable once done.
+    """
+
+    class Meta:
+        app_label = "core"
+        ordering = ["-added"]
+
+    FORMATS = Choices(
+        ("xlsx", "Excel (xlsx)"),
+        ("csv", "CSV"),
+        ("json", "JSON"),
+    )
+    STATUSES = Choices(
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="export_jobs",
+    )
+    object_name = models.CharField(
+        max_length=32, help_text="Name of the exported model, e.g. dataset"
+    )
+    format = models.CharField(max_length=8, choices=FORMATS, default=FORMATS.xlsx)
+    object_ids = models.JSONField(
+        default=list, help_text="Ids of the exported records, in the export order"
+    )
+    status = models.CharField(max_length=16, choices=STATUSES, default=STATUSES.pending)
+    processed = models.PositiveIntegerField(
+        default=0, help_text="Number of records exported so far"
+    )
+    file = models.FileField(upload_to="exports/", blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Export of {self.total} {self.object_name}s as {self.format}"
+
+    @property
+    def total(self) -> int:
+        return len(self.object_ids)
+
+    @property
+    def progress(self) -> int:
+        """
+        Percentage of the records exported so far.
+        """
+        if not self.total:
+            return 100
+        return min(100, self.processed * 100 // self.total)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUSES.done, self.STATUSES.failed)
+
+    def get_absolute_url(self):
+        return reverse("export_job", kwargs={"pk": self.pk})
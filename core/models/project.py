@@ -1,6 +1,4 @@
-import datetime
 import typing
-from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
@@ -30,6 +28,21 @@ if typing.TYPE_CHECKING:
 logger = DaisyLogger(__name__)
 
 
+class ProjectQuerySet(models.QuerySet):
+    def for_export(self):
+        """
+        Fetch everything needed by `to_dict`, so that the export of the projects
+        runs in a fixed number of queries whatever the number of projects.
+        """
+        return self.prefetch_related(
+            "contacts__partners",
+            "contacts__type",
+            "local_custodians__groups",
+            "company_personnel",
+            "publications",
+        )
+
+
 class Project(CoreTrackedModel, NotifyMixin):
     class Meta:
         app_label = "core"
@@ -155,6 +168,9 @@ class Project(CoreTrackedModel, NotifyMixin):
 
     legal_documents = GenericRelation("core.Document", related_query_name="projects")
 
+    # index of the local custodians, see Responsibility
+    responsibilities = GenericRelation("core.Responsibility")
+
     umbrella_project = models.ForeignKey(
         "core.Project",
         null=True,
@@ -217,6 +233,8 @@ class Project(CoreTrackedModel, NotifyMixin):
         help_text="Custodians are the local responsibles for the project. This list must include a PI.",
     )
 
+    objects = ProjectQuerySet.as_manager()
+
     def __str__(self):
         return self.acronym or self.title or "undefined"
 
@@ -346,6 +364,12 @@ class Project(CoreTrackedModel, NotifyMixin):
 
         super().save(*args, **kwargs)
 
+    notification_dates = {
+        "start_date": NotificationVerb.start,
+        "end_date": NotificationVerb.end,
+    }
+    notification_recipient_path = "responsibilities__user"
+
     @staticmethod
     def get_notification_recipients():
         """
@@ -354,22 +378,12 @@ class Project(CoreTrackedModel, NotifyMixin):
 
         return get_user_model().objects.filter(Q(project_set__isnull=False)).distinct()
 
-    @classmethod
-    def make_notifications_for_user(
-        cls, day_offset: timedelta, exec_date: datetime.date, user: "User"
-    ):
-        for project in user.project_set.all():
-            # Project start date
-            if project.start_date and project.start_date - day_offset == exec_date:
-                cls.notify(user, project, NotificationVerb.start)
-            # Project end date
-            if project.end_date and project.end_date - day_offset == exec_date:
-                cls.notify(user, project, NotificationVerb.end)
-
     @staticmethod
-    def notify(user: "User", obj: "Project", verb: "NotificationVerb"):
+    def build_notification(
+        user: "User", obj: "Project", verb: "NotificationVerb"
+    ) -> Notification:
         """
-        Notifies concerning users about the entity.
+        Builds the notification of the user about the entity.
         """
         dispatch_by_email = user.notification_setting.send_email
         dispatch_in_app = user.notification_setting.send_in_app
@@ -383,7 +397,7 @@ class Project(CoreTrackedModel, NotifyMixin):
 
         logger.info(f"Creating a notification for {user} : {msg}")
 
-        Notification.objects.create(
+        return Notification(
             recipient=user,
             verb=verb,
             message=msg,
@@ -392,7 +406,7 @@ class Project(CoreTrackedModel, NotifyMixin):
             dispatch_in_app=dispatch_in_app,
             content_type=ContentType.objects.get_for_model(obj),
             object_id=obj.id,
-        ).save()
+        )
 
 
 # faster lookup for permissions
@@ -0,0 +1,180 @@
+from typing import Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Q
+
+# model name -> (lookup of the direct local custodians,
+#                lookups of the local custodians the responsibility is inherited from)
+CUSTODIAN_LOOKUPS = {
+    "project": ("local_custodians", ()),
+    "dataset": ("local_custodians", ("project__local_custodians",)),
+    "contract": ("local_custodians", ("project__local_custodians",)),
+    "document": (
+        None,
+        (
+            "projects__local_custodians",
+            "contracts__local_custodians",
+            "contracts__project__local_custodians",
+        ),
+    ),
+}
+
+
+class ResponsibilityManager(models.Manager):
+    @staticmethod
+    def get_models():
+        return [apps.get_model("core", name) for name in CUSTODIAN_LOOKUPS]
+
+    @staticmethod
+    def compute(model, pks: Optional[Iterable[int]] = None) -> dict:
+        """
+        Compute the responsibilities on the objects of the model with the given pks
+        (all of them when None), as a (user id, object id) -> inherited mapping.
+        """
+        objects = model._default_manager.all()
+        if pks is not None:
+            objects = objects.filter(pk__in=pks)
+        direct, inherited = CUSTODIAN_LOOKUPS[model._meta.model_name]
+        rows = {}
+        for lookup in inherited:
+            for user_id, pk in objects.filter(
+                **{f"{lookup}__isnull": False}
+            ).values_list(lookup, "pk"):
+                rows[(user_id, pk)] = True
+        # being a direct local custodian prevails over inheriting the responsibility
+        if direct:
+            for user_id, pk in objects.filter(
+                **{f"{direct}__isnull": False}
+            ).values_list(direct, "pk"):
+                rows[(user_id, pk)] = False
+        return rows
+
+    def refresh(self, model, pks: Optional[Iterable[int]] = None):
+        """
+        Recompute the responsibilities on the objects of the model with the given pks,
+        all of them when None.
+        """
+        if pks is not None:
+            pks = list(pks)
+            if not pks:
+                return
+        content_type = ContentType.objects.get_for_model(model)
+        rows = self.compute(model, pks)
+        with transaction.atomic():
+            self.forget(model, pks)
+            self.bulk_create(
+                self.model(
+                    user_id=user_id,
+                    content_type=content_type,
+                    object_id=pk,
+                    inherited=inherited,
+                )
+                for (user_id, pk), inherited in rows.items()
+            )
+
+    def refresh_tree(self, model, pks: Iterable[int]):
+        """
+        Recompute the responsibilities on the objects of the model with the given pks
+        and on the objects inheriting them: the datasets, contracts and documents
+        of the projects, the documents of the contracts.
+        """
+        Project, Dataset, Contract, Document = self.get_models()
+        pks = list(pks)
+        if not pks:
+            return
+        self.refresh(model, pks)
+        if model is Project:
+            self.refresh(
+                Dataset,
+                Dataset.objects.filter(project__in=pks).values_list("pk", flat=True),
+            )
+            self.refresh(
+                Contract,
+                Contract.objects.filter(project__in=pks).values_list("pk", flat=True),
+            )
+            documents = Document.objects.filter(
+                Q(projects__in=pks) | Q(contracts__project__in=pks)
+            )
+        elif model is Contract:
+            documents = Document.objects.filter(contracts__in=pks)
+        else:
+            return
+        self.refresh(Document, set(documents.values_list("pk", flat=True)))
+
+    def forget(self, model, pks: Optional[Iterable[int]] = None):
+        """
+        Drop the responsibilities on the objects of the model with the given pks,
+        all of them when None.
+        """
+        stale = self.filter(content_type=ContentType.objects.get_for_model(model))
+        if pks is not None:
+            stale = stale.filter(object_id__in=pks)
+        stale.delete()
+
+    def rebuild(self):
+        """
+        Recompute the whole index.
+        """
+        with transaction.atomic():
+            self.all().delete()
+            for model in self.get_models():
+                self.refresh(model)
+
+    def get_objects(self, user, model, inherited: Optional[bool] = None):
+        """
+        Return the objects of the model the user is responsible for, directly or
+        through a parent entity (only one of them when inherited is given).
+        """
+        responsibilities = self.filter(
+            user=user, content_type=ContentType.objects.get_for_model(model)
+        )
+        if inherited is not None:
+            responsibilities = responsibilities.filter(inherited=inherited)
+        return model._default_manager.filter(
+            pk__in=responsibilities.values("object_id")
+        )
+
+
+class Responsibility(models.Model):
+    """
+    Denormalised index of the projects, datasets, contracts and documents a user is
+    local custodian of, either directly or through the project (or contract) they belong to.
+    It is kept up to date by the signals, `rebuild_responsibilities` recomputes it.
+    """
+
+    class Meta:
+        app_label = "core"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "content_type", "object_id"],
+                name="unique_responsibility",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["content_type", "object_id"],
+                name="core_responsibility_object_idx",
+            )
+        ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="responsibilities",
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    inherited = models.BooleanField(
+        default=False,
+        help_text="Whether the user is local custodian of a parent entity only",
+    )
+
+    objects = ResponsibilityManager()
+
+    def __str__(self):
+        return f"{self.user} responsible for {self.content_type.model} {self.object_id}"
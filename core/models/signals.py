@@ -1,14 +1,60 @@
 import logging
+from auditlog.models import LogEntry
 from django.conf import settings
-from django.db.models.signals import post_save, m2m_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
+from guardian.models import GroupObjectPermission, UserObjectPermission
 
-from core.models import Dataset, Project, User, Contract, DAC
-from core.search_indexes import DatasetIndex, ProjectIndex, ContractIndex, DACIndex
+from core.api_keys import invalidate_api_keys
+from core.importer.export_cache import get_exported_models, invalidate_snapshots
+from core.models import (
+    ConditionClass,
+    Dataset,
+    Project,
+    User,
+    Contract,
+    DAC,
+    Document,
+    Endpoint,
+    Exposure,
+    Responsibility,
+)
+from core.models.dataset import (
+    DatasetGroupObjectPermission,
+    DatasetUserObjectPermission,
+)
+from core.models.project import (
+    ProjectGroupObjectPermission,
+    ProjectUserObjectPermission,
+)
+from core.permissions.cache import clear_permission_cache
+from core.permissions.deferred import are_assignments_deferred
+from core import log_entry_fields, search_queue
 
 logger = logging.getLogger("daisy.signals")
 
 
+def update_responsibilities(model, instance, action, reverse, pk_set):
+    """
+    Refresh the responsibility index after the local custodians of the model changed.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif pk_set is not None:
+        pks = pk_set
+    else:
+        # the user was removed from all the objects, the index still knows which ones
+        pks = (
+            Responsibility.objects.get_objects(instance, model, inherited=False)
+            .values_list("pk", flat=True)
+            .distinct()
+        )
+    Responsibility.objects.refresh_tree(model, pks)
+
+
 @receiver(
     m2m_changed,
     sender=Dataset.local_custodians.through,
@@ -18,6 +64,7 @@ def dataset_local_custodians_changed(sender, instance, action, pk_set, **kwargs)
     """
     Dataset m2m changed
     * Change custodians permissions
+    * Update responsibility index
     * Index dataset
     """
     if action == "post_add":
@@ -26,8 +73,10 @@ def dataset_local_custodians_changed(sender, instance, action, pk_set, **kwargs)
         logger.debug(
             f'[dataset_local_custodians_changed] action: {action} on "{instance}". Adding custodians: {pk_set} .'
         )
-        for custodian in added_custodians:
-            custodian.assign_permissions_to_dataset(instance)
+        # the bulk importers assign them at once at the end of their batches
+        if not are_assignments_deferred():
+            for custodian in added_custodians:
+                custodian.assign_permissions_to_dataset(instance)
     elif action == "post_remove":
         removed_custodians_ids = pk_set
         removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
@@ -36,7 +85,9 @@ def dataset_local_custodians_changed(sender, instance, action, pk_set, **kwargs)
         )
         for custodian in removed_custodians:
             custodian.remove_permissions_to_dataset(instance)
-    DatasetIndex().update_object(instance)
+    update_responsibilities(Dataset, instance, action, kwargs.get("reverse"), pk_set)
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_queue.enqueue_update(instance)
 
 
 @receiver(
@@ -48,6 +99,7 @@ def contract_local_custodians_changed(sender, instance, action, pk_set, **kwargs
     """
     Dataset m2m changed
     * Change custodians permissions
+    * Update responsibility index
     * Index dataset
     """
     if action == "post_add":
@@ -60,7 +112,9 @@ def contract_local_custodians_changed(sender, instance, action, pk_set, **kwargs
         removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
         for custodian in removed_custodians:
             custodian.remove_permissions_to_contract(instance)
-    ContractIndex().update_object(instance)
+    update_responsibilities(Contract, instance, action, kwargs.get("reverse"), pk_set)
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_queue.enqueue_update(instance)
 
 
 @receiver(
@@ -72,6 +126,7 @@ def project_local_custodians_changed(sender, **kwargs):
     """
     Project m2m changed
     * Change custodians permissions
+    * Update responsibility index
     * Index project
     """
     instance = kwargs.get("instance")
@@ -81,14 +136,18 @@ def project_local_custodians_changed(sender, **kwargs):
     if action == "post_add":
         added_custodians_ids = pk_set
         added_custodians = User.objects.filter(pk__in=added_custodians_ids)
-        for custodian in added_custodians:
-            custodian.assign_permissions_to_project(instance)
+        # the bulk importers assign them at once at the end of their batches
+        if not are_assignments_deferred():
+            for custodian in added_custodians:
+                custodian.assign_permissions_to_project(instance)
     elif action == "post_remove":
         removed_custodians_ids = pk_set
         removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
         for custodian in removed_custodians:
             custodian.remove_permissions_to_project(instance)
-    ProjectIndex().update_object(instance)
+    update_responsibilities(Project, instance, action, kwargs.get("reverse"), pk_set)
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_queue.enqueue_update(instance)
 
 
 @receiver(
@@ -112,4 +171,169 @@ def dac_local_custodians_changed(sender, instance, action, pk_set, **kwargs):
         removed_custodians = User.objects.filter(pk__in=removed_custodians_ids)
         for custodian in removed_custodians:
             custodian.remove_permissions_to_dac(instance)
-    DACIndex().update_object(instance)
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_queue.enqueue_update(instance)
+
+
+@receiver(post_save, sender=Dataset, dispatch_uid="dataset_responsibilities_saved")
+@receiver(post_save, sender=Contract, dispatch_uid="contract_responsibilities_saved")
+@receiver(post_save, sender=Document, dispatch_uid="document_responsibilities_saved")
+def responsibility_parent_saved(sender, instance, update_fields=None, **kwargs):
+    """
+    Dataset, contract or document saved
+    * Update responsibility index, their project or attached entity may have changed
+    """
+    if update_fields is not None and not {
+        "project",
+        "content_type",
+        "object_id",
+    }.intersection(update_fields):
+        return
+    Responsibility.objects.refresh_tree(sender, [instance.pk])
+
+
+@receiver(pre_delete, sender=Project, dispatch_uid="project_responsibilities_deleting")
+def project_deleting(sender, instance, **kwargs):
+    """
+    Project about to be deleted
+    * Remember its datasets and contracts, they are detached without signals
+    """
+    instance._responsibility_children = (
+        list(instance.datasets.values_list("pk", flat=True)),
+        list(instance.contracts.values_list("pk", flat=True)),
+    )
+
+
+@receiver(post_delete, sender=Project, dispatch_uid="project_responsibilities_deleted")
+@receiver(post_delete, sender=Dataset, dispatch_uid="dataset_responsibilities_deleted")
+@receiver(
+    post_delete, sender=Contract, dispatch_uid="contract_responsibilities_deleted"
+)
+@receiver(
+    post_delete, sender=Document, dispatch_uid="document_responsibilities_deleted"
+)
+def responsibility_entity_deleted(sender, instance, **kwargs):
+    """
+    Project, dataset, contract or document deleted
+    * Update responsibility index
+    """
+    Responsibility.objects.forget(sender, [instance.pk])
+    datasets, contracts = getattr(instance, "_responsibility_children", ([], []))
+    Responsibility.objects.refresh(Dataset, datasets)
+    Responsibility.objects.refresh_tree(Contract, contracts)
+
+
+def object_permission_changed(sender, **kwargs):
+    """
+    Object permission granted or revoked
+    * Invalidate the permission cache of the current request
+    """
+    clear_permission_cache()
+
+
+for object_permission_model in (
+    UserObjectPermission,
+    GroupObjectPermission,
+    DatasetUserObjectPermission,
+    DatasetGroupObjectPermission,
+    ProjectUserObjectPermission,
+    ProjectGroupObjectPermission,
+):
+    post_save.connect(
+        object_permission_changed,
+        sender=object_permission_model,
+        dispatch_uid=f"{object_permission_model.__name__}_saved",
+    )
+    post_delete.connect(
+        object_permission_changed,
+        sender=object_permission_model,
+        dispatch_uid=f"{object_permission_model.__name__}_deleted",
+    )
+
+
+@receiver(
+    m2m_changed,
+    sender=User.groups.through,
+    dispatch_uid="user_groups_changed",
+)
+def user_groups_changed(sender, action, **kwargs):
+    """
+    User groups changed
+    * Invalidate the permission cache of the current request
+    """
+    if action in ("post_add", "post_remove", "post_clear"):
+        clear_permission_cache()
+
+
+# fields written without changing the exports (e.g. on each login)
+UNEXPORTED_FIELDS = {"last_login"}
+
+
+def exported_entity_changed(sender, update_fields=None, **kwargs):
+    """
+    Exported entity changed
+    * Invalidate the export snapshots of the API
+    """
+    if update_fields is not None and set(update_fields) <= UNEXPORTED_FIELDS:
+        return
+    invalidate_snapshots()
+
+
+# every model read by the exports: the ones of their prefetch plans, the exposures
+# selecting the exported datasets and the labels of the use condition classes
+EXPORTED_MODELS = (
+    get_exported_models(Dataset.objects.for_export())
+    | get_exported_models(Project.objects.for_export())
+    | {Exposure, ConditionClass}
+)
+
+for exported_model in EXPORTED_MODELS:
+    label = exported_model._meta.label_lower
+    post_save.connect(
+        exported_entity_changed,
+        sender=exported_model,
+        dispatch_uid=f"{label}_export_saved",
+    )
+    post_delete.connect(
+        exported_entity_changed,
+        sender=exported_model,
+        dispatch_uid=f"{label}_export_deleted",
+    )
+    # the many-to-many relations changed with add(), remove(), set() or clear()
+    m2m_changed.connect(
+        exported_entity_changed,
+        sender=exported_model,
+        dispatch_uid=f"{label}_export_changed",
+    )
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_api_key_saved")
+@receiver(post_save, sender=Endpoint, dispatch_uid="endpoint_api_key_saved")
+def api_key_saved(sender, update_fields=None, **kwargs):
+    """
+    User or Endpoint saved
+    * Invalidate the resolved API keys, unless the key was left untouched
+    """
+    if update_fields is None or "api_key" in update_fields:
+        invalidate_api_keys()
+
+
+@receiver(post_delete, sender=User, dispatch_uid="user_api_key_deleted")
+@receiver(post_delete, sender=Endpoint, dispatch_uid="endpoint_api_key_deleted")
+def api_key_deleted(sender, **kwargs):
+    """
+    User or Endpoint deleted
+    * Invalidate the resolved API keys
+    """
+    invalidate_api_keys()
+
+
+@receiver(post_save, sender=LogEntry, dispatch_uid="log_entry_fields_saved")
+def log_entry_saved(sender, instance, created, **kwargs):
+    """
+    Log entry written
+    * Add its changed fields and its actor to the catalogue of the audit log,
+      once committed so that rolled back entries are not listed
+    """
+    if created:
+        transaction.on_commit(lambda: log_entry_fields.add_entry(instance))
@@ -1,6 +1,9 @@
 from enum import Enum
 from core.models.utils import CoreModel
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Case, IntegerField, When
+from django.db.models.functions import Length, Upper
 
 
 class TermCategory(Enum):
@@ -10,40 +13,78 @@ class TermCategory(Enum):
     gene = "gene"
 
 
+class TermQuerySet(models.QuerySet):
+    def search(self, text):
+        """
+        Terms whose label contains the text: the exact matches first, then the labels
+        starting with the text, then the others, the shortest labels first.
+        The (case-insensitive) lookups are served by the trigram index of the labels.
+        """
+        return (
+            self.filter(label__icontains=text)
+            .annotate(
+                match_rank=Case(
+                    When(label__iexact=text, then=0),
+                    When(label__istartswith=text, then=1),
+                    default=2,
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("match_rank", Length("label"), "id")
+        )
+
+
 class TermModel(CoreModel):
     class Meta:
         abstract = True
+        indexes = [
+            # the lookups on the label compare upper-cased values
+            GinIndex(
+                OpClass(Upper("label"), name="gin_trgm_ops"),
+                name="%(app_label)s_%(class)s_label_trgm",
+            )
+        ]
 
     term_id = models.CharField(max_length=200, blank=False)
     label = models.CharField(max_length=300, blank=False)
 
+    objects = TermQuerySet.as_manager()
+
     def __str__(self):
         return self.label
 
 
 class StudyTerm(TermModel):
-    class Meta:
+    class Meta(TermModel.Meta):
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
 
 
 class GeneTerm(TermModel):
-    class Meta:
+    class Meta(TermModel.Meta):
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
 
 
 class PhenotypeTerm(TermModel):
-    class Meta:
+    class Meta(TermModel.Meta):
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
 
 
 class DiseaseTerm(TermModel):
-    class Meta:
+    class Meta(TermModel.Meta):
         app_label = "core"
         get_latest_by = "added"
         ordering = ["added"]
+
+
+TERM_MODELS = {
+    TermCategory.disease.value: DiseaseTerm,
+    TermCategory.study.value: StudyTerm,
+    TermCategory.phenotype.value: PhenotypeTerm,
+    TermCategory.gene.value: GeneTerm,
+}
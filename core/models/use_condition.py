@@ -84,11 +84,13 @@ class UseCondition(CoreModel):
         """
         Used for import/export - the keys are conformant to the schema
         """
+        # label may have been annotated by Dataset.objects.for_export()
+        use_class_label = getattr(self, "condition_class_label", None)
+        if use_class_label is None:
+            use_class_label = ConditionClass.objects.get(code=self.condition_class).name
         return {
             "use_class": self.condition_class,
-            "use_class_label": ConditionClass.objects.get(
-                code=self.condition_class
-            ).name,
+            "use_class_label": use_class_label,
             "use_class_note": self.use_class_note,
             "use_condition_note": self.notes,
             "use_condition_rule": self.use_condition_rule,
@@ -154,6 +154,9 @@ class User(AbstractUser):
         """
         Check if user is part of the group or goups given.
         """
+        if "groups" in getattr(self, "_prefetched_objects_cache", {}):
+            names = {str(arg) for arg in args}
+            return any(group.name in names for group in self.groups.all())
         if len(args) == 1:
             return self.groups.filter(name=args[0]).exists()
         return self.groups.filter(name__in=args).exists()
@@ -1,2 +1,3 @@
 from .checker import *
 from .mapping import *
+from .queryset import *
@@ -0,0 +1,138 @@
+"""
+Request-scoped cache of permission checks.
+
+The cache is attached to the request by PermissionCacheMiddleware and made available
+to the checkers through a context variable, so that decorators, view mixins, template filters
+and User methods evaluated during the same request share the verdicts and the guardian cache.
+"""
+
+import logging
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple, Union, TYPE_CHECKING
+
+from guardian.core import ObjectPermissionChecker
+
+if TYPE_CHECKING:
+    from django.contrib.auth.models import Group
+    from django.db.models import Model
+    from core.models.user import User
+
+
+logger = logging.getLogger("daisy.permissions")
+
+_current_cache: ContextVar[Optional["PermissionCache"]] = ContextVar(
+    "daisy_permission_cache", default=None
+)
+
+
+class PermissionCache:
+    """
+    Store permission verdicts keyed by (user, perm, model, pk),
+    and one guardian ObjectPermissionChecker per user or group.
+    """
+
+    def __init__(self) -> None:
+        self._verdicts: Dict[Tuple, bool] = {}
+        self._checkers: Dict[Tuple, ObjectPermissionChecker] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _owner_key(user_or_group: Union["User", "Group"]) -> Tuple:
+        return user_or_group.__class__.__name__, user_or_group.pk
+
+    def _make_key(
+        self, user_or_group: Union["User", "Group"], perm: str, obj: "Model", **kwargs
+    ) -> Optional[Tuple]:
+        if obj is None or obj.pk is None:
+            return None
+        return (
+            self._owner_key(user_or_group),
+            perm,
+            obj._meta.label_lower,
+            obj.pk,
+            tuple(sorted(kwargs.items())),
+        )
+
+    def get_checker(
+        self, user_or_group: Union["User", "Group"]
+    ) -> ObjectPermissionChecker:
+        key = self._owner_key(user_or_group)
+        if key not in self._checkers:
+            self._checkers[key] = ObjectPermissionChecker(user_or_group)
+        return self._checkers[key]
+
+    def get(
+        self, user_or_group: Union["User", "Group"], perm: str, obj: "Model", **kwargs
+    ) -> Optional[bool]:
+        key = self._make_key(user_or_group, perm, obj, **kwargs)
+        if key is not None and key in self._verdicts:
+            self.hits += 1
+            return self._verdicts[key]
+        self.misses += 1
+        return None
+
+    def set(
+        self,
+        user_or_group: Union["User", "Group"],
+        perm: str,
+        obj: "Model",
+        value: bool,
+        **kwargs,
+    ) -> None:
+        key = self._make_key(user_or_group, perm, obj, **kwargs)
+        if key is not None:
+            self._verdicts[key] = value
+
+    def clear(self) -> None:
+        self._verdicts.clear()
+        self._checkers.clear()
+
+
+def get_permission_cache() -> Optional[PermissionCache]:
+    """
+    Return the permission cache of the current request, if any.
+    """
+    return _current_cache.get()
+
+
+def clear_permission_cache() -> None:
+    """
+    Forget the cached verdicts, e.g. after permissions have been granted or revoked.
+    """
+    cache = get_permission_cache()
+    if cache is not None:
+        cache.clear()
+
+
+@contextmanager
+def permission_cache_scope() -> Iterator[PermissionCache]:
+    """
+    Make a fresh permission cache current for the duration of the block.
+    """
+    cache = PermissionCache()
+    token = _current_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_cache.reset(token)
+
+
+class PermissionCacheMiddleware:
+    """
+    Attach a PermissionCache to each request, so that every permission is resolved once per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with permission_cache_scope() as cache:
+            request.permission_cache = cache
+            response = self.get_response(request)
+        logger.debug(
+            f'[PermissionCacheMiddleware] "{request.path}": {cache.hits} hits, {cache.misses} misses.'
+        )
+        return response
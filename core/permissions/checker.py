@@ -4,12 +4,14 @@ Module that handle permission management.
 
 import logging
 
-from typing import Union, Optional, TYPE_CHECKING
+from collections import defaultdict
+from typing import Dict, Iterable, List, Union, Optional, TYPE_CHECKING
 from abc import ABCMeta, abstractmethod
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
+from django.db.models import prefetch_related_objects
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils.functional import wraps
@@ -17,6 +19,7 @@ from guardian.core import ObjectPermissionChecker
 from guardian.mixins import PermissionRequiredMixin
 
 from core.exceptions import DaisyError
+from core.permissions.cache import get_permission_cache
 
 if TYPE_CHECKING:
     from django.db.models import Model
@@ -50,7 +53,12 @@ class AbstractChecker(metaclass=ABCMeta):
         self.user_or_group = user_or_group
         self.checker = checker
         if checker is None:
-            self.checker = ObjectPermissionChecker(user_or_group)
+            # share guardian cache with the other checks of the current request
+            cache = get_permission_cache()
+            if cache is not None:
+                self.checker = cache.get_checker(user_or_group)
+            else:
+                self.checker = ObjectPermissionChecker(user_or_group)
 
     def _set_perm(self, perm: str) -> str:
         # transform Permission enum to its str value
@@ -69,6 +77,33 @@ class AbstractChecker(metaclass=ABCMeta):
         """
         pass
 
+    def prefetch(self, perm: str, objects: List["Model"], **kwargs) -> None:
+        """
+        Load, in a fixed number of queries, everything needed to check `perm` on `objects`
+        (object permissions of the objects and of the parents they inherit from).
+        Subsequent calls to `check` on those objects are then served from the checker cache.
+        """
+        if not objects or self.user_or_group.has_perm(perm):
+            return
+        self._prefetch(perm, objects, **kwargs)
+
+    def _prefetch(self, perm: str, objects: List["Model"], **kwargs) -> None:
+        self._prefetch_perms(objects)
+
+    def _prefetch_perms(self, objects: Iterable["Model"]) -> None:
+        """
+        Fill the guardian cache with the object permissions of the given objects (all of the same model).
+        """
+        cache = self.checker._obj_perms_cache
+        to_fetch = {}
+        for obj in objects:
+            if obj is None or obj.pk is None:
+                continue
+            if self.checker.get_local_cache_key(obj) not in cache:
+                to_fetch[obj.pk] = obj
+        if to_fetch:
+            self.checker.prefetch_perms(list(to_fetch.values()))
+
 
 class ProjectChecker(AbstractChecker):
     """
@@ -105,6 +140,17 @@ class DatasetChecker(AbstractChecker):
         except ObjectDoesNotExist:
             return False
 
+    def _prefetch(self, perm: str, objects: List["Dataset"], **kwargs) -> None:
+        self._prefetch_perms(objects)
+        if kwargs.get("nofollow", False):
+            return
+        prefetch_related_objects(objects, "project")
+        ProjectChecker(self.user_or_group, checker=self.checker).prefetch(
+            perm.replace("dataset", "project"),
+            [obj.project for obj in objects if obj.project is not None],
+            **kwargs,
+        )
+
 
 class DataDeclarationChecker(AbstractChecker):
     """Check permissions on data declaration"""
@@ -114,6 +160,12 @@ class DataDeclarationChecker(AbstractChecker):
             perm, obj.dataset, **kwargs
         )
 
+    def _prefetch(self, perm: str, objects: List["DataDeclaration"], **kwargs) -> None:
+        prefetch_related_objects(objects, "dataset")
+        DatasetChecker(self.user_or_group, checker=self.checker).prefetch(
+            perm, [obj.dataset for obj in objects], **kwargs
+        )
+
 
 class ContractChecker(AbstractChecker):
     """
@@ -133,6 +185,17 @@ class ContractChecker(AbstractChecker):
             project_perm, obj.project, **kwargs
         )
 
+    def _prefetch(self, perm: str, objects: List["Contract"], **kwargs) -> None:
+        self._prefetch_perms(objects)
+        if kwargs.get("nofollow", False):
+            return
+        prefetch_related_objects(objects, "project")
+        ProjectChecker(self.user_or_group, checker=self.checker).prefetch(
+            perm.replace("contract", "project"),
+            [obj.project for obj in objects if obj.project is not None],
+            **kwargs,
+        )
+
 
 class CohortChecker(AbstractChecker):
     """
@@ -170,6 +233,17 @@ class DACChecker(AbstractChecker):
             contract_perm, obj.contract, **kwargs
         )
 
+    def _prefetch(self, perm: str, objects: List["DAC"], **kwargs) -> None:
+        self._prefetch_perms(objects)
+        if kwargs.get("nofollow", False):
+            return
+        prefetch_related_objects(objects, "contract")
+        ContractChecker(self.user_or_group, checker=self.checker).prefetch(
+            perm.replace("dac", "contract"),
+            [obj.contract for obj in objects if obj.contract is not None],
+            **kwargs,
+        )
+
 
 class PartnerChecker(AbstractChecker):
     """
@@ -188,6 +262,10 @@ class ContractEntityChecker(ContractChecker):
     def _check(self, perm: str, obj: Union["PartnerRole"], **kwargs) -> bool:
         return super()._check(perm, obj.contract, **kwargs)
 
+    def _prefetch(self, perm: str, objects: List["PartnerRole"], **kwargs) -> None:
+        prefetch_related_objects(objects, "contract")
+        super()._prefetch(perm, [obj.contract for obj in objects], **kwargs)
+
 
 class DocumentChecker(AbstractChecker):
     """
@@ -228,11 +306,42 @@ class DocumentChecker(AbstractChecker):
                 self._perm, obj.content_object, **kwargs
             )
 
+    def prefetch(self, perm: str, objects: List["Document"], **kwargs) -> None:
+        if not objects:
+            return
+        # does not check global perm for document.
+        prefetch_related_objects(objects, "content_type", "content_object")
+        self._prefetch_perms(objects)
+        if kwargs.get("nofollow", False):
+            return
+        targets = defaultdict(list)
+        for obj in objects:
+            if obj.content_object is not None:
+                targets[obj.content_object.__class__].append(obj.content_object)
+        for target_class, target_objects in targets.items():
+            target = target_class.__name__.lower()
+            target_perm = (
+                perm.replace("document", target) if perm.endswith("document") else perm
+            )
+            if target == "project":
+                checker_class = ProjectChecker
+            elif target == "dataset":
+                checker_class = DatasetChecker
+            else:
+                checker_class = ContractChecker
+            checker_class(self.user_or_group, checker=self.checker).prefetch(
+                target_perm, target_objects, **kwargs
+            )
+
 
 class UserChecker(AbstractChecker):
     def _check(self, perm: str, obj: "User", **kwargs) -> bool:
         return self.user_or_group.is_staff
 
+    def _prefetch(self, perm: str, objects: List["User"], **kwargs) -> None:
+        # no object permission involved
+        pass
+
 
 class DatasetEntityChecker(DatasetChecker):
     def check(
@@ -240,6 +349,15 @@ class DatasetEntityChecker(DatasetChecker):
     ) -> bool:
         return super().check(perm, obj.dataset, **kwargs)
 
+    def prefetch(
+        self,
+        perm: str,
+        objects: List[Union["DataDeclaration", "LegalBasis", "Share"]],
+        **kwargs,
+    ) -> None:
+        prefetch_related_objects(objects, "dataset")
+        super().prefetch(perm, [obj.dataset for obj in objects], **kwargs)
+
 
 class AccessChecker(AbstractChecker):
     def check(self, perm: str, obj: "Access", **kwargs) -> bool:
@@ -250,6 +368,12 @@ class AccessChecker(AbstractChecker):
         parent_checker = DatasetChecker(self.user_or_group, checker=self.checker)
         return parent_checker.check(perm, parent_dataset)
 
+    def prefetch(self, perm: str, objects: List["Access"], **kwargs) -> None:
+        prefetch_related_objects(objects, "dataset")
+        DatasetChecker(self.user_or_group, checker=self.checker).prefetch(
+            perm, [obj.dataset for obj in objects]
+        )
+
 
 class AutoChecker(AbstractChecker):
     """
@@ -274,6 +398,11 @@ class AutoChecker(AbstractChecker):
         "DAC": DACChecker,
     }
 
+    def _get_checker(self, obj: "Model") -> AbstractChecker:
+        return self.__mapping[obj.__class__.__name__](
+            self.user_or_group, checker=self.checker
+        )
+
     # override default check method
     def check(self, perm: str, obj: "Model", **kwargs) -> bool:
         return self._check(perm, obj, **kwargs)
@@ -283,25 +412,65 @@ class AutoChecker(AbstractChecker):
         Check the permission on the object.
         Automatically determines which permission class to use.
         """
-        if not isinstance(perm, list):
-            value = self.__mapping[obj.__class__.__name__](
-                self.user_or_group, checker=self.checker
-            ).check(perm, obj, **kwargs)
+        return self._check_many(perm, [obj], **kwargs)[0]
+
+    def check_many(
+        self, perm: Union[str, List[str]], objects: Iterable["Model"], **kwargs
+    ) -> Dict["Model", bool]:
+        """
+        Check the permission on several objects at once.
+        Object permissions of the objects and of their parents (project, contract, ...) are
+        prefetched for the whole set, so the number of queries does not depend on the number of objects.
+        Returns a dict mapping each object to the result of the check.
+        """
+        objects = list(objects)
+        return dict(zip(objects, self._check_many(perm, objects, **kwargs)))
+
+    def _check_many(
+        self, perm: Union[str, List[str]], objects: List["Model"], **kwargs
+    ) -> List[bool]:
+        perms = perm if isinstance(perm, list) else [perm]
+        cache = get_permission_cache()
+
+        verdicts = {}
+        if cache is not None:
+            for index, obj in enumerate(objects):
+                for perm_unit in perms:
+                    value = cache.get(self.user_or_group, perm_unit, obj, **kwargs)
+                    if value is not None:
+                        verdicts[(index, perm_unit)] = value
+
+        to_check = [
+            obj
+            for index, obj in enumerate(objects)
+            if any((index, perm_unit) not in verdicts for perm_unit in perms)
+        ]
+        if len(to_check) > 1:
+            by_class = defaultdict(list)
+            for obj in to_check:
+                by_class[obj.__class__].append(obj)
+            for instances in by_class.values():
+                checker = self._get_checker(instances[0])
+                for perm_unit in perms:
+                    checker.prefetch(perm_unit, instances, **kwargs)
+
+        results = []
+        for index, obj in enumerate(objects):
+            value = []
+            for perm_unit in perms:
+                if (index, perm_unit) not in verdicts:
+                    verdict = self._get_checker(obj).check(
+                        perm_unit, obj, **dict(kwargs)
+                    )
+                    if cache is not None:
+                        cache.set(self.user_or_group, perm_unit, obj, verdict, **kwargs)
+                    verdicts[(index, perm_unit)] = verdict
+                value.append(verdicts[(index, perm_unit)])
             logger.debug(
                 f'[AutoChecker] Checking permission "{perm}" on {obj.__class__.__name__}: "{obj}" for "{self.user_or_group}": {value}.'
             )
-            return value
-        else:
-            value = [
-                self.__mapping[obj.__class__.__name__](
-                    self.user_or_group, checker=self.checker
-                ).check(perm_unit, obj, **kwargs)
-                for perm_unit in perm
-            ]
-            logger.debug(
-                f'[AutoChecker] Checking permissions "{perm}" on {obj.__class__.__name__}: "{obj}" for "{self.user_or_group}": {value}.'
-            )
-            return all(value)
+            results.append(all(value))
+        return results
 
 
 def permission_required(perm, target, lookup_variables):
@@ -327,9 +496,6 @@ def permission_required(perm, target, lookup_variables):
             obj = get_object_or_404(model, **lookup_dict)
 
             # check permission
-            has_perm = AutoChecker(request.user).check(
-                f"core.{perm.value}_{target}", obj
-            )
             if not AutoChecker(request.user).check(f"core.{perm.value}_{target}", obj):
                 raise PermissionDenied
             return view_func(request, *args, **kwargs)
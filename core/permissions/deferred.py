@@ -0,0 +1,29 @@
+"""
+Deferred assignment of the permissions of the local custodians.
+
+In the bulk mode of the importers, the permissions of the local custodians are assigned with
+one query per model at the end of each batch (see `BaseImporter.flush_permissions`), so the
+receivers of the changes of the local custodians must not assign them row by row meanwhile.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_deferred: ContextVar[bool] = ContextVar("daisy_permissions_deferred", default=False)
+
+
+def are_assignments_deferred() -> bool:
+    return _deferred.get()
+
+
+@contextmanager
+def defer_assignments() -> Iterator[None]:
+    """
+    Leave the permissions of the local custodians added in the block to the caller.
+    """
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
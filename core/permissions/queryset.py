@@ -0,0 +1,66 @@
+"""
+Queryset-level counterpart of the checkers: filter objects on a permission in SQL,
+following the same inheritance rules (a dataset or a contract inherits the permissions
+of its project, a DAC the ones of its contract).
+"""
+
+from typing import Optional, TYPE_CHECKING
+
+from django.db.models import Q, QuerySet
+from guardian.shortcuts import get_objects_for_user
+
+if TYPE_CHECKING:
+    from core.models.user import User
+
+__all__ = ["filter_by_permission"]
+
+
+# model name -> field of the entity the permissions are inherited from
+INHERITED_FROM = {
+    "dataset": "project",
+    "contract": "project",
+    "dac": "contract",
+}
+
+
+def _get_permission_q(user: "User", perm: str, model) -> Optional[Q]:
+    """
+    Return the condition selecting the objects of the model on which the perm is granted,
+    None meaning every object.
+    """
+    # global perm grants access to all the objects, as in AbstractChecker.check
+    if user.has_perm(perm):
+        return None
+    direct = get_objects_for_user(
+        user,
+        perm,
+        klass=model,
+        use_groups=True,
+        accept_global_perms=False,
+        with_superuser=False,
+    )
+    condition = Q(pk__in=direct.values("pk"))
+
+    model_name = model._meta.model_name
+    field = INHERITED_FROM.get(model_name)
+    if field is None:
+        return condition
+    parent_model = model._meta.get_field(field).related_model
+    parent_perm = perm.replace(model_name, parent_model._meta.model_name)
+    parent_condition = _get_permission_q(user, parent_perm, parent_model)
+    if parent_condition is None:
+        return condition | Q(**{f"{field}__isnull": False})
+    parent_objects = parent_model._default_manager.filter(parent_condition)
+    return condition | Q(**{f"{field}__in": parent_objects.values("pk")})
+
+
+def filter_by_permission(user: "User", perm: str, queryset: QuerySet) -> QuerySet:
+    """
+    Restrict the queryset to the objects on which the perm (e.g. 'core.protected_dataset')
+    is granted, directly, through a group, globally or through the inheritance rules
+    of the checkers. Everything is resolved in a single query.
+    """
+    condition = _get_permission_q(user, perm, queryset.model)
+    if condition is None:
+        return queryset
+    return queryset.filter(condition)
@@ -9,7 +9,6 @@ from core.models import (
     Cohort,
     Contact,
     Partner,
-    GDPRRole,
     DAC,
 )
 
@@ -18,6 +17,19 @@ class DataDeclarationIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return DataDeclaration
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model()
+            .objects.select_related("dataset__project")
+            .prefetch_related(
+                "cohorts",
+                "data_types_generated",
+                "data_types_received",
+                "data_use_conditions",
+                "dataset__local_custodians",
+            )
+        )
+
     def get_updated_field(self):
         return "updated"
 
@@ -89,6 +101,9 @@ class CohortIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Cohort
 
+    def index_queryset(self, using=None):
+        return self.get_model().objects.prefetch_related("owners__type", "institutes")
+
     def get_updated_field(self):
         return "updated"
 
@@ -116,6 +131,17 @@ class DatasetIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Dataset
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model()
+            .objects.select_related("project")
+            .prefetch_related(
+                "local_custodians",
+                "data_declarations__data_types_generated",
+                "data_declarations__data_types_received",
+            )
+        )
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
 
@@ -161,6 +187,20 @@ class ContractIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Contract
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model()
+            .objects.select_related("project")
+            .prefetch_related(
+                "local_custodians",
+                "legal_documents",
+                "data_declarations",
+                "partners_roles__partner",
+                "partners_roles__roles",
+                "partners_roles__contacts__type",
+            )
+        )
+
     def get_updated_field(self):
         return "updated"
 
@@ -189,8 +229,13 @@ class ContractIndex(CelerySearchIndex, indexes.Indexable):
         return [u.full_name for u in obj.local_custodians.all()]
 
     def prepare_partners_roles(self, obj):
-        roles = GDPRRole.objects.filter(partners_roles__contract=obj).distinct()
-        return [str(r) for r in roles]
+        # distinct roles, from the prefetched partner roles
+        roles = {
+            r.pk: r
+            for partner_role in obj.partners_roles.all()
+            for r in partner_role.roles.all()
+        }
+        return [str(r) for r in roles.values()]
 
     def prepare_contacts(self, obj):
         contacts = []
@@ -262,6 +307,11 @@ class ContactIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Contact
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model().objects.select_related("type").prefetch_related("partners")
+        )
+
     def get_updated_field(self):
         return "updated"
 
@@ -292,6 +342,24 @@ class ProjectIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return Project
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model()
+            .objects.select_related("umbrella_project")
+            .prefetch_related(
+                "contacts__type",
+                "company_personnel",
+                "funding_sources",
+                "publications",
+                "local_custodians",
+                "legal_documents",
+                "disease_terms",
+                "gene_terms",
+                "phenotype_terms",
+                "study_terms",
+            )
+        )
+
     def get_updated_field(self):
         return "updated"
 
@@ -400,6 +468,13 @@ class DACIndex(CelerySearchIndex, indexes.Indexable):
     def get_model(self):
         return DAC
 
+    def index_queryset(self, using=None):
+        return (
+            self.get_model()
+            .objects.select_related("contract__project")
+            .prefetch_related("local_custodians")
+        )
+
     # needed
     text = indexes.CharField(document=True, use_template=True)
 
@@ -0,0 +1,188 @@
+"""
+Coalescing queue of the search index updates.
+
+The objects to reindex (or to remove from the index) are collected during a request, or during
+a transaction outside of requests, deduplicated, and sent once the changes are committed to
+a single `update_search_index` task, which updates all of them with one request per model.
+The task checks that the objects to remove are gone: the removals queued in a savepoint
+that was rolled back afterwards are turned into updates there.
+The queue is used when HAYSTACK_SIGNAL_PROCESSOR is `core.search_queue.CoalescingSignalProcessor`,
+with the other signal processors the updates are made immediately.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import connection, models, transaction
+from haystack import connections as haystack_connections
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+from haystack.utils import get_identifier
+
+from core import facet_cache
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+_local = threading.local()
+
+
+class IndexUpdateBatch:
+    def __init__(self):
+        # model label -> pks of the objects to reindex
+        self.updates = defaultdict(set)
+        # identifiers of the documents to remove
+        self.removals = set()
+
+    def add(self, instance):
+        self.updates[instance._meta.label].add(instance.pk)
+
+    def remove(self, instance):
+        self.updates[instance._meta.label].discard(instance.pk)
+        self.removals.add(get_identifier(instance))
+
+    def __bool__(self):
+        return any(self.updates.values()) or bool(self.removals)
+
+    def flush(self):
+        if not self:
+            return
+        updates = {label: sorted(pks) for label, pks in self.updates.items() if pks}
+        removals = sorted(self.removals)
+        self.updates.clear()
+        self.removals.clear()
+        dispatch(updates, removals)
+
+
+def dispatch(updates, removals):
+    from core.tasks import update_search_index
+
+    logger.debug(
+        f"Dispatching the index update of {sum(map(len, updates.values()))} objects "
+        f"and the removal of {len(removals)} documents"
+    )
+    update_search_index.delay(updates, removals)
+
+
+def is_enabled() -> bool:
+    signal_processor = getattr(
+        apps.get_app_config("haystack"), "signal_processor", None
+    )
+    return isinstance(signal_processor, CoalescingSignalProcessor)
+
+
+def is_indexed(model) -> bool:
+    try:
+        haystack_connections["default"].get_unified_index().get_index(model)
+    except NotHandled:
+        return False
+    return True
+
+
+def _get_batch() -> IndexUpdateBatch:
+    """
+    Return the batch of the current request, or else of the current transaction.
+    """
+    scopes = getattr(_local, "scopes", None)
+    if scopes:
+        return scopes[0]
+    batch = getattr(_local, "transaction_batch", None)
+    # the callback of a rolled back transaction is discarded, start a new batch then
+    if batch is None or not any(
+        callback == batch.flush for _, callback, _ in connection.run_on_commit
+    ):
+        batch = IndexUpdateBatch()
+        _local.transaction_batch = batch
+        transaction.on_commit(batch.flush)
+    return batch
+
+
+def enqueue_update(instance):
+    """
+    Reindex the object once the changes are committed.
+    """
+    if not is_indexed(type(instance)):
+        return
+    if not is_enabled():
+        haystack_connections["default"].get_unified_index().get_index(
+            type(instance)
+        ).update_object(instance)
+        facet_cache.invalidate([instance._meta.label])
+        return
+    if not getattr(_local, "scopes", None) and not connection.in_atomic_block:
+        dispatch({instance._meta.label: [instance.pk]}, [])
+        return
+    _get_batch().add(instance)
+
+
+def enqueue_removal(instance):
+    """
+    Remove the document of the object from the index once the changes are committed.
+    """
+    if not is_indexed(type(instance)):
+        return
+    if not is_enabled():
+        haystack_connections["default"].get_unified_index().get_index(
+            type(instance)
+        ).remove_object(instance)
+        facet_cache.invalidate([instance._meta.label])
+        return
+    if not getattr(_local, "scopes", None) and not connection.in_atomic_block:
+        dispatch({}, [get_identifier(instance)])
+        return
+    _get_batch().remove(instance)
+
+
+@contextmanager
+def queue_index_updates():
+    """
+    Collect the index updates made in the block and send them at once when it ends
+    (when the transaction is committed if the block ends within one).
+    Nested blocks are merged into the outermost one.
+    """
+    scopes = getattr(_local, "scopes", None)
+    if scopes is None:
+        scopes = _local.scopes = []
+    batch = scopes[0] if scopes else IndexUpdateBatch()
+    scopes.append(batch)
+    try:
+        yield batch
+    finally:
+        scopes.pop()
+        if not scopes:
+            transaction.on_commit(batch.flush)
+
+
+class SearchIndexQueueMiddleware:
+    """
+    Send the index updates of a request at once, at the end of it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with queue_index_updates():
+            return self.get_response(request)
+
+
+class CoalescingSignalProcessor(BaseSignalProcessor):
+    """
+    Queue the index updates of the saved and deleted objects.
+    """
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        enqueue_update(instance)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        enqueue_removal(instance)
@@ -1,8 +1,17 @@
-from datetime import date
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List
 
 from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from haystack import connection_router, connections
 
+from core import facet_cache
+from core.importer.export_jobs import produce_export
 from core.models.access import Access
+from core.models.export_job import ExportJob
 from core.lcsb.rems import synchronizer, bulk_update_rems_external_ids
 
 
@@ -29,3 +38,57 @@ def update_rems_access_external_id():
     Task to update external id for REMS accesses
     """
     bulk_update_rems_external_ids()
+
+
+@shared_task
+def update_search_index(updates: Dict[str, List[int]], removals: List[str]):
+    """
+    Task to update the search index documents of the given objects (model label -> pks)
+    and to remove the given documents, with one request per model.
+    The documents to remove whose object still exists (its deletion was rolled back)
+    are reindexed instead.
+    """
+    objects_pks = defaultdict(set)
+    for label, pks in updates.items():
+        objects_pks[label].update(pks)
+    for identifier in removals:
+        app_label, model_name, pk = identifier.split(".", 2)
+        model = apps.get_model(app_label, model_name)
+        objects_pks[model._meta.label].add(model._meta.pk.to_python(pk))
+
+    for using in connection_router.for_write():
+        backend = connections[using].get_backend()
+        unified_index = connections[using].get_unified_index()
+        for label, pks in objects_pks.items():
+            model = apps.get_model(label)
+            index = unified_index.get_index(model)
+            objects = list(index.index_queryset(using=using).filter(pk__in=pks))
+            if objects:
+                backend.update(index, objects)
+            # the objects deleted in the meantime
+            for pk in pks.difference(obj.pk for obj in objects):
+                backend.remove(f"{model._meta.label_lower}.{pk}")
+    facet_cache.invalidate(set(objects_pks))
+
+
+@shared_task
+def run_export_job(job_id: int):
+    """
+    Task to produce the file of an export job
+    """
+    produce_export(ExportJob.objects.get(pk=job_id))
+
+
+@shared_task
+def delete_expired_export_jobs():
+    """
+    Task to delete the export jobs older than EXPORT_JOBS_RETENTION_DAYS, with their files
+    """
+    retention_days = getattr(settings, "EXPORT_JOBS_RETENTION_DAYS", 7)
+    expired = ExportJob.objects.filter(
+        added__lt=timezone.now() - timedelta(days=retention_days)
+    )
+    for job in expired:
+        if job.file:
+            job.file.delete(save=False)
+    expired.delete()
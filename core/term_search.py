@@ -0,0 +1,67 @@
+import hashlib
+import time
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models.term_model import TERM_MODELS
+from core.utils import DaisyLogger
+
+logger = DaisyLogger(__name__)
+
+PAGE_SIZE = 25
+
+# the results of a category are keyed by the generation of its terms,
+# bumping the generation (when the terms are reloaded) invalidates all of them at once
+GENERATION_KEY = "term-search:generation:{}"
+RESULTS_KEY_PREFIX = "term-search"
+
+
+def get_timeout() -> int:
+    return getattr(settings, "TERM_SEARCH_CACHE_TIMEOUT", 300)
+
+
+def get_generation(category: str) -> float:
+    key = GENERATION_KEY.format(category)
+    generation = cache.get(key)
+    if generation is None:
+        generation = time.time()
+        cache.add(key, generation, timeout=None)
+        generation = cache.get(key, generation)
+    return generation
+
+
+def invalidate(category: str):
+    """
+    Drop the cached results of the category, e.g. once its terms are reloaded.
+    """
+    cache.set(GENERATION_KEY.format(category), time.time(), timeout=None)
+
+
+def search_terms(category: str, search: str, page: int) -> Tuple[List[dict], bool]:
+    """
+    Return a page of the terms of the category matching the search, as select2 results,
+    and whether there are more; the page after the last one has no results.
+    The terms following the page are not counted, one more term is fetched instead.
+    """
+    search = search.strip()
+    key = hashlib.sha256(
+        f"{search.lower()}:{page}:{get_generation(category)!r}".encode()
+    ).hexdigest()
+    key = f"{RESULTS_KEY_PREFIX}:{category}:{key}"
+    timeout = get_timeout()
+    if timeout and (cached := cache.get(key)) is not None:
+        return cached
+
+    start = (page - 1) * PAGE_SIZE
+    terms = list(
+        TERM_MODELS[category]
+        .objects.search(search)
+        .values_list("id", "label")[start : start + PAGE_SIZE + 1]
+    )
+    results = [{"id": pk, "text": label} for pk, label in terms[:PAGE_SIZE]]
+    more = len(terms) > PAGE_SIZE
+    if timeout:
+        cache.set(key, (results, more), timeout=timeout)
+    return results, more
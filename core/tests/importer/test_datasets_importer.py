@@ -4,6 +4,7 @@ import pytest
 
 from core.importer.datasets_importer import DatasetsImporter
 from core.models import Dataset, Project, DataDeclaration
+from core.permissions.deferred import defer_assignments
 from test import factories
 
 
@@ -14,7 +15,9 @@ def test_dummy(celery_session_worker, storage_resources, can_defer_constraint_ch
 
 
 @pytest.mark.django_db
+@pytest.mark.parametrize("bulk", [False, True])
 def test_import_datasets(
+    bulk,
     celery_session_worker,
     storage_resources,
     contact_types,
@@ -47,7 +50,9 @@ def test_import_datasets(
     data_file = os.path.join(
         os.path.dirname(os.path.realpath(__file__)), "../data/datasets.json"
     )
-    importer = DatasetsImporter(exit_on_error=True, verbose=False, validate=True)
+    importer = DatasetsImporter(
+        exit_on_error=True, verbose=False, validate=True, bulk=bulk, batch_size=2
+    )
     importer.import_json_file(data_file)
 
     assert 5 == Dataset.objects.all().count()
@@ -57,6 +62,7 @@ def test_import_datasets(
     assert ["Igor Teal"] == [
         custodian.full_name for custodian in d1.local_custodians.all()
     ]
+    assert d1.local_custodians.get().has_perm("core.protected_dataset", d1)
     assert 1 == d1.data_locations.all().count()
     shares = d1.shares.all()
     share1 = shares[0]
@@ -100,3 +106,18 @@ def test_import_datasets(
     d1.refresh_from_db()
     assert d1.elu_accession == d1_id
     assert d1.elu_accession == "DATASET-123"
+
+
+@pytest.mark.django_db
+def test_deferred_permission_assignments():
+    user = factories.UserFactory()
+    dataset = factories.DatasetFactory()
+    # in bulk mode, the importer assigns the permissions itself
+    with defer_assignments():
+        dataset.local_custodians.add(user)
+    assert not user.has_perm("core.protected_dataset", dataset)
+
+    dataset.local_custodians.remove(user)
+    dataset.local_custodians.add(user)
+    user = type(user).objects.get(pk=user.pk)
+    assert user.has_perm("core.protected_dataset", dataset)
@@ -2,9 +2,13 @@ import json
 import pytest
 from io import StringIO
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from core.importer.datasets_exporter import DatasetsExporter
 from core.importer.partners_exporter import PartnersExporter
 from core.importer.projects_exporter import ProjectsExporter
+from core.models import Dataset, Project
 from core.importer.JSONSchemaValidator import (
     ProjectJSONSchemaValidator,
     DatasetJSONSchemaValidator,
@@ -137,3 +141,117 @@ def test_export_datasets(
 
     schema = DatasetJSONSchemaValidator()
     assert schema.validate_items(dataset_dicts)
+
+
+def _count_export_queries(exporter):
+    with CaptureQueriesContext(connection) as context:
+        items = export_entities(exporter)
+    return items, len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_export_query_count_independent_of_size(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    VIP = factories.VIPGroup()
+    custodians = [
+        factories.UserFactory.create(groups=[VIP]),
+        factories.UserFactory.create(),
+    ]
+
+    def make_datasets(count):
+        datasets = []
+        for _ in range(count):
+            project = factories.ProjectFactory.create(local_custodians=custodians)
+            dataset = factories.DatasetFactory.create(
+                project=project, local_custodians=custodians
+            )
+            factories.DataLocationFactory.create(dataset=dataset)
+            factories.LegalBasisFactory.create(dataset=dataset)
+            factories.DataDeclarationFactory.create(dataset=dataset)
+            datasets.append(dataset)
+        return datasets
+
+    few = make_datasets(2)
+    many = make_datasets(6)
+
+    items, few_queries = _count_export_queries(
+        DatasetsExporter(
+            objects=Dataset.objects.filter(pk__in=[d.pk for d in few]),
+            include_unpublished=True,
+        )
+    )
+    assert 2 == len(items)
+    items, many_queries = _count_export_queries(
+        DatasetsExporter(
+            objects=Dataset.objects.filter(pk__in=[d.pk for d in many]),
+            include_unpublished=True,
+        )
+    )
+    assert 6 == len(items)
+    assert few_queries == many_queries
+
+    items, few_queries = _count_export_queries(
+        ProjectsExporter(
+            objects=Project.objects.filter(datasets__in=few), include_unpublished=True
+        )
+    )
+    assert 2 == len(items)
+    items, many_queries = _count_export_queries(
+        ProjectsExporter(
+            objects=Project.objects.filter(datasets__in=many), include_unpublished=True
+        )
+    )
+    assert 6 == len(items)
+    assert few_queries == many_queries
+
+
+@pytest.mark.django_db
+def test_export_endpoint_query_count_independent_of_size(
+    celery_session_worker,
+    contact_types,
+    partners,
+    gdpr_roles,
+    storage_resources,
+    can_defer_constraint_checks,
+):
+    endpoint = factories.EndpointFactory.create()
+    other_endpoint = factories.EndpointFactory.create()
+
+    def make_exposed_datasets(count):
+        datasets = []
+        for _ in range(count):
+            dataset = factories.DatasetFactory.create()
+            factories.ExposureFactory.create(
+                dataset=dataset, endpoint=endpoint, form_id=2
+            )
+            factories.ExposureFactory.create(
+                dataset=dataset, endpoint=other_endpoint, form_id=3
+            )
+            datasets.append(dataset)
+        return datasets
+
+    few = make_exposed_datasets(2)
+    many = make_exposed_datasets(6)
+
+    items, few_queries = _count_export_queries(
+        DatasetsExporter(
+            objects=Dataset.objects.filter(pk__in=[d.pk for d in few]),
+            endpoint_id=endpoint.id,
+        )
+    )
+    assert 2 == len(items)
+    assert all(item["form_id"] == 2 for item in items)
+    items, many_queries = _count_export_queries(
+        DatasetsExporter(
+            objects=Dataset.objects.filter(pk__in=[d.pk for d in many]),
+            endpoint_id=endpoint.id,
+        )
+    )
+    assert 6 == len(items)
+    assert few_queries == many_queries
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+import pytest
+
+from core.importer.export_jobs import produce_export
+from core.models import ExportJob
+from test import factories
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_produce_csv_export(media_root):
+    datasets = factories.DatasetFactory.create_batch(3)
+    job = ExportJob.objects.create(
+        user=factories.UserFactory(),
+        object_name="dataset",
+        format=ExportJob.FORMATS.csv,
+        object_ids=[dataset.pk for dataset in reversed(datasets)],
+    )
+
+    produce_export(job)
+
+    job.refresh_from_db()
+    assert job.status == ExportJob.STATUSES.done
+    assert job.progress == 100
+    with job.file.open("rb") as fh:
+        rows = list(csv.DictReader(io.StringIO(fh.read().decode())))
+    assert [row["name"] for row in rows] == [d.title for d in reversed(datasets)]
+
+
+@pytest.mark.django_db
+def test_produce_json_export(media_root):
+    projects = factories.ProjectFactory.create_batch(2)
+    job = ExportJob.objects.create(
+        user=factories.UserFactory(),
+        object_name="project",
+        format=ExportJob.FORMATS.json,
+        object_ids=[project.pk for project in projects],
+    )
+
+    produce_export(job)
+
+    job.refresh_from_db()
+    assert job.status == ExportJob.STATUSES.done
+    with job.file.open("rb") as fh:
+        assert len(json.loads(fh.read())["items"]) == 2
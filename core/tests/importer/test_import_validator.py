@@ -2,6 +2,8 @@ import os
 
 import pytest
 
+from core.exceptions import JSONSchemaValidationError
+from core.importer.JSONSchemaValidator import ProjectJSONSchemaValidator
 from core.models import Dataset, Project, DataDeclaration
 from test import factories
 from django.conf import settings
@@ -32,7 +34,20 @@ def test_json_schema_version(
     )
 
 
-@pytest.mark.skip("TBD")
-def test_json_schema_validation():
-    # Test validators on demo data
-    pass
+def test_json_schema_validation_reports_all_invalid_items():
+    data_file = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "../data/projects.json"
+    )
+    with open(data_file) as f:
+        items = loads(f.read())["items"]
+    validator = ProjectJSONSchemaValidator()
+    assert validator.validate_items(items)
+
+    items = [items[0], 42, items[1], {"name": "No source"}]
+    with pytest.raises(JSONSchemaValidationError) as e:
+        validator.validate_items(items)
+    message = str(e.value.data)
+    assert "2 of 4 items are invalid" in message
+    assert "Item 1 " in message
+    assert 'Item 3 ("No source")' in message
+    assert "Item 0 " not in message
@@ -1,7 +1,10 @@
+import gzip
+import json
 import os
 
 import pytest
 
+from core.importer.json_stream import iter_json_document
 from core.importer.projects_importer import ProjectsImporter
 from core.models import Project
 from test import factories
@@ -62,6 +65,66 @@ def test_import_projects(celery_session_worker, contact_types, partners):
     assert project2.elu_accession == project2_id
 
 
+@pytest.mark.django_db
+def test_import_gzipped_projects(
+    celery_session_worker, contact_types, partners, tmp_path
+):
+    factories.VIPGroup()
+    projects_json = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "../data/projects.json"
+    )
+    with open(projects_json, encoding="utf-8") as json_file:
+        items = json.load(json_file)["items"]
+    gzipped_json = tmp_path / "projects.json.gz"
+    with gzip.open(gzipped_json, "wt", encoding="utf-8") as json_file:
+        json_file.writelines(
+            iter_json_document(ProjectsImporter.json_schema_uri, items)
+        )
+
+    importer = ProjectsImporter(exit_on_error=True, verbose=False, validate=True)
+    assert importer.can_process_file(str(gzipped_json))
+    assert importer.import_json_file(str(gzipped_json))
+    assert 2 == Project.objects.count()
+
+
+@pytest.mark.django_db
+def test_import_projects_changes(celery_session_worker, contact_types, partners):
+    factories.VIPGroup()
+    projects_json = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "../data/projects.json"
+    )
+    ProjectsImporter(exit_on_error=True).import_json_file(projects_json)
+    Project.objects.filter(acronym="In vitro disease modeling").update(
+        erp_notes="changed notes"
+    )
+    last_updated = Project.objects.get(acronym="CCCC deficiency").updated
+
+    importer = ProjectsImporter(exit_on_error=True, skip_on_exist=False, dry_run=True)
+    assert importer.import_json_file(projects_json)
+    changes = {change_set.label: change_set for change_set in importer.change_sets}
+    changed = changes["project 'In vitro disease modeling'"]
+    assert "updated" == changed.status
+    assert {"erp_notes": ("changed notes", "test notes 123")} == changed.fields
+    assert "unchanged" == changes["project 'CCCC deficiency'"].status
+    # nothing is written in a dry run
+    assert (
+        "changed notes"
+        == Project.objects.get(acronym="In vitro disease modeling").erp_notes
+    )
+
+    importer = ProjectsImporter(exit_on_error=True, skip_on_exist=False)
+    assert importer.import_json_file(projects_json)
+    # outside of a dry run, only the number of changes is kept
+    assert {"updated": 1, "unchanged": 1} == importer.change_counts
+    assert [] == importer.change_sets
+    assert (
+        "test notes 123"
+        == Project.objects.get(acronym="In vitro disease modeling").erp_notes
+    )
+    # the unchanged projects are not saved again
+    assert last_updated == Project.objects.get(acronym="CCCC deficiency").updated
+
+
 @pytest.mark.django_db
 def test_process_publication(*args, **kwargs):
     pass
@@ -0,0 +1,69 @@
+from core.models import Contract, Dataset, Document, Project, Responsibility
+from test.factories import (
+    ContractDocumentFactory,
+    ContractFactory,
+    DatasetFactory,
+    ProjectFactory,
+    UserFactory,
+)
+
+
+def get_index():
+    return set(
+        Responsibility.objects.values_list(
+            "user_id", "content_type__model", "object_id", "inherited"
+        )
+    )
+
+
+def test_responsibility_index():
+    """
+    Tests that the responsibility index follows the changes of the local custodians
+    and of the parent entities, and matches a full rebuild
+    """
+    project_lc, dataset_lc, contract_lc = UserFactory.create_batch(3)
+    project = ProjectFactory(local_custodians=[project_lc])
+    dataset = DatasetFactory(project=project, local_custodians=[dataset_lc])
+    contract = ContractFactory(project=project, local_custodians=[contract_lc])
+    document = ContractDocumentFactory(content_object=contract)
+
+    assert set(Responsibility.objects.get_objects(project_lc, Dataset)) == {dataset}
+    assert set(Responsibility.objects.get_objects(project_lc, Document)) == {document}
+    assert set(Responsibility.objects.get_objects(contract_lc, Document)) == {document}
+    assert not Responsibility.objects.get_objects(dataset_lc, Contract).exists()
+    assert set(
+        Responsibility.objects.get_objects(dataset_lc, Dataset, inherited=False)
+    ) == {dataset}
+
+    # a direct local custodian is not an inherited one
+    dataset.local_custodians.add(project_lc)
+    assert set(
+        Responsibility.objects.get_objects(project_lc, Dataset, inherited=False)
+    ) == {dataset}
+
+    # the project custodians changes are inherited by the whole tree
+    project.local_custodians.remove(project_lc)
+    assert not Responsibility.objects.get_objects(project_lc, Document).exists()
+    assert not Responsibility.objects.get_objects(project_lc, Project).exists()
+    project.local_custodians.add(project_lc)
+    assert set(Responsibility.objects.get_objects(project_lc, Document)) == {document}
+    project.local_custodians.clear()
+    assert not Responsibility.objects.get_objects(project_lc, Contract).exists()
+
+    # moving a dataset to another project
+    other_lc = UserFactory()
+    dataset.project = ProjectFactory(local_custodians=[other_lc])
+    dataset.save()
+    assert set(Responsibility.objects.get_objects(other_lc, Dataset)) == {dataset}
+
+    index = get_index()
+    Responsibility.objects.rebuild()
+    assert get_index() == index
+
+    # deleting the project detaches its contract without signals
+    contract.project = project
+    contract.save()
+    project.local_custodians.add(other_lc)
+    project.delete()
+    assert not Responsibility.objects.get_objects(other_lc, Contract).exists()
+    assert not Responsibility.objects.get_objects(other_lc, Document).exists()
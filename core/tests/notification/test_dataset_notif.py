@@ -9,7 +9,7 @@ from test.factories import (
     DataDeclarationFactory,
     ProjectFactory,
 )
-from core.models import Dataset
+from core.models import Dataset, Responsibility
 from notification.models import Notification, NotificationSetting
 
 
@@ -88,6 +88,26 @@ def test_dataset_project_lc_notification(event, offset):
     assert len(Notification.objects.filter(recipient=p2_lc)) == 1
 
 
+def test_dataset_recipients_read_from_responsibilities():
+    today = datetime.date.today()
+    event_date = today + timedelta(days=30)
+
+    p_lc = UserFactory.create(email="p_lc@uni.lu")
+    NotificationSetting(user=p_lc, notification_offset=30).save()
+    project = ProjectFactory.create(title="Test project", local_custodians=[p_lc])
+    dataset = DatasetFactory.create(title="Test dataset", project=project)
+    DataDeclarationFactory(dataset=dataset, embargo_date=event_date)
+
+    # the index is the source of the recipients
+    Responsibility.objects.all().delete()
+    Dataset.make_notifications(today)
+    assert Notification.objects.count() == 0
+
+    Responsibility.objects.rebuild()
+    Dataset.make_notifications(today)
+    assert list(Notification.objects.values_list("recipient", flat=True)) == [p_lc.pk]
+
+
 def test_dataset_handles_no_recipients():
     exec_date = datetime.date.today()
     Dataset.make_notifications(exec_date)
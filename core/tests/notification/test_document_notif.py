@@ -2,6 +2,8 @@ import datetime
 from datetime import timedelta
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from test.factories import (
     ProjectDocumentFactory,
@@ -87,6 +89,32 @@ def test_document_project_lc_notification(offset):
     assert len(Notification.objects.filter(recipient=p2_lc)) == 1
 
 
+def test_document_notification_query_count_independent_of_size():
+    today = datetime.date.today()
+    event_date = today + timedelta(days=30)
+
+    def count_queries(size):
+        Notification.objects.all().delete()
+        for _ in range(size):
+            user = UserFactory.create()
+            NotificationSetting(user=user, notification_offset=30).save()
+            project = ProjectFactory.create(local_custodians=[user])
+            contract = ContractFactory.create(project=project, local_custodians=[user])
+            ProjectDocumentFactory.create(
+                content_object=project, expiry_date=event_date
+            )
+            ContractDocumentFactory.create(
+                content_object=contract, expiry_date=event_date
+            )
+        with CaptureQueriesContext(connection) as context:
+            Document.make_notifications(today)
+        return len(context.captured_queries)
+
+    assert count_queries(2) == count_queries(5)
+    # one notification per document, even when the user is reachable by several paths
+    assert Notification.objects.count() == 14
+
+
 def test_document_handles_no_recipients():
     exec_date = datetime.date.today()
     Document.make_notifications(exec_date)
@@ -53,3 +53,33 @@ def test_project_handles_no_recipients():
     exec_date = datetime.date.today()
     Project.make_notifications(exec_date)
     assert Notification.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_project_notification_settings_of_each_custodian():
+    today = datetime.date.today()
+
+    muted_user = UserFactory.create(email="muted@uni.lu")
+    NotificationSetting(
+        user=muted_user, notification_offset=30, send_email=False, send_in_app=False
+    ).save()
+    user = UserFactory.create(email="lc@uni.lu")
+    NotificationSetting(
+        user=user, notification_offset=90, send_email=True, send_in_app=False
+    ).save()
+    project = ProjectFactory.create(
+        title="Test project",
+        local_custodians=[muted_user, user],
+        start_date=today + timedelta(days=30),
+    )
+
+    # due for the muted user only, who gets no notification
+    Project.make_notifications(today)
+    assert Notification.objects.count() == 0
+
+    project.start_date = today + timedelta(days=90)
+    project.save()
+    Project.make_notifications(today)
+    assert [user] == [
+        notification.recipient for notification in Notification.objects.all()
+    ]
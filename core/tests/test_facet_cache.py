@@ -0,0 +1,33 @@
+from core import facet_cache
+
+FACETS = ("local_custodians", "data_types")
+
+
+def test_key_does_not_depend_on_filters_order():
+    key = facet_cache.get_key(
+        "core.Dataset", {"data_types": ["Omics", "Samples"]}, " cancer", FACETS
+    )
+    assert key == facet_cache.get_key(
+        "core.Dataset", {"data_types": ["Samples", "Omics"]}, "cancer ", FACETS[::-1]
+    )
+    assert key != facet_cache.get_key(
+        "core.Dataset", {"data_types": ["Omics"]}, "cancer", FACETS
+    )
+    assert key != facet_cache.get_key(
+        "core.Project", {"data_types": ["Omics", "Samples"]}, "cancer", FACETS
+    )
+
+
+def test_counts_are_invalidated_by_index_updates():
+    key = facet_cache.get_key("core.Dataset", {}, None, FACETS)
+    assert facet_cache.get_counts(key) is None
+    facet_cache.set_counts(key, {"fields": {"data_types": [("Omics", 2)]}})
+    assert facet_cache.get_counts(key) == {"fields": {"data_types": [("Omics", 2)]}}
+
+    facet_cache.invalidate(["core.Project"])
+    assert facet_cache.get_key("core.Dataset", {}, None, FACETS) == key
+
+    facet_cache.invalidate(["core.Dataset"])
+    new_key = facet_cache.get_key("core.Dataset", {}, None, FACETS)
+    assert new_key != key
+    assert facet_cache.get_counts(new_key) is None
@@ -7,11 +7,11 @@ import requests_mock
 
 from core.lcsb.oidc import KeycloakSynchronizationBackend
 from core.lcsb.rems import (
-    create_rems_entitlement,
     extract_rems_data,
     build_default_expiration_date,
-    check_existence_automatic,
+    find_existing_automatic_accesses,
     get_rems_external_id,
+    handle_rems_entitlements,
     bulk_update_rems_external_ids,
 )
 from core.models.access import Access
@@ -157,7 +157,29 @@ def test_extract_rems_data_with_expiration():
     assert expiration_date == datetime.date(2023, 8, 3)
 
 
-def test_check_existence_automatic_positive():
+def grant_rems_entitlement(mocker, user, application_id, resource_id, expiration_date):
+    mocker.patch(
+        "core.synchronizers.DummySynchronizationBackend.get_external_user_info",
+        return_value={"email": user.email, "id": user.oidc_id},
+    )
+    data = {
+        "application": application_id,
+        "resource": resource_id,
+        "user": user.oidc_id,
+        "mail": user.email,
+        "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
+    }
+    assert handle_rems_entitlements([data])
+
+
+def exists_automatic(data):
+    entitlement = extract_rems_data(data)
+    _, resource, user_oidc_id, _, expiration_date = entitlement
+    existing = find_existing_automatic_accesses([entitlement])
+    return (resource, user_oidc_id, expiration_date) in existing
+
+
+def test_find_existing_automatic_accesses_positive(mocker):
     resource_id = "TEST-2-5591E3-1"
     expiration_date = datetime.date.today() + datetime.timedelta(days=1)
     user = UserFactory(oidc_id="12345", email="example@example.org")
@@ -167,7 +189,7 @@ def test_check_existence_automatic_positive():
     )
     dataset.save()
     application_id = 4056
-    create_rems_entitlement(user, application_id, resource_id, expiration_date)
+    grant_rems_entitlement(mocker, user, application_id, resource_id, expiration_date)
     email = "john.doe@uni.lu"
     data = {
         "application": application_id,
@@ -176,14 +198,14 @@ def test_check_existence_automatic_positive():
         "mail": email,
         "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
     }
-    assert check_existence_automatic(data)
+    assert exists_automatic(data)
 
     access = Access.objects.get(application_id=application_id)
     assert access
     assert not access.application_external_id
 
 
-def test_check_existence_automatic_negative_mismatch():
+def test_find_existing_automatic_accesses_negative_mismatch(mocker):
     resource_id = "TEST-2-5591E3-1"
     expiration_date = datetime.date.today() + datetime.timedelta(days=1)
     user = UserFactory(oidc_id="12345", email="example@example.org")
@@ -192,7 +214,7 @@ def test_check_existence_automatic_negative_mismatch():
         title="Test", local_custodians=[user], elu_accession=resource_id
     )
     dataset.save()
-    create_rems_entitlement(user, 1, resource_id, expiration_date)
+    grant_rems_entitlement(mocker, user, 1, resource_id, expiration_date)
     application_id = 4056
     email = "john.doe@uni.lu"
     # resource id is different
@@ -203,7 +225,7 @@ def test_check_existence_automatic_negative_mismatch():
         "mail": email,
         "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
     }
-    assert not check_existence_automatic(data)
+    assert not exists_automatic(data)
     # user id is different
     data = {
         "application": application_id,
@@ -212,7 +234,7 @@ def test_check_existence_automatic_negative_mismatch():
         "mail": email,
         "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
     }
-    assert not check_existence_automatic(data)
+    assert not exists_automatic(data)
     # expiration date is different
     data = {
         "application": application_id,
@@ -221,10 +243,10 @@ def test_check_existence_automatic_negative_mismatch():
         "mail": email,
         "end": datetime.date.today().strftime("%Y-%m-%d") + "T23:59:59.000Z",
     }
-    assert not check_existence_automatic(data)
+    assert not exists_automatic(data)
 
 
-def test_check_existence_automatic_negative_manually_created():
+def test_find_existing_automatic_accesses_negative_manually_created():
     resource_id = "TEST-2-5591E3-1"
     expiration_date = datetime.date.today() + datetime.timedelta(days=1)
     email = "john.doe@uni.lu"
@@ -247,10 +269,10 @@ def test_check_existence_automatic_negative_manually_created():
         "mail": email,
         "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
     }
-    assert not check_existence_automatic(data)
+    assert not exists_automatic(data)
 
 
-def test_add_rems_entitlements():
+def test_add_rems_entitlements(mocker):
     elu_accession = "12345678"
     expiration_date = datetime.date.today() + datetime.timedelta(days=1)
 
@@ -262,7 +284,7 @@ def test_add_rems_entitlements():
     )
     dataset.save()
 
-    create_rems_entitlement(user, 1, elu_accession, expiration_date)
+    grant_rems_entitlement(mocker, user, 1, elu_accession, expiration_date)
     user.delete()
 
 
@@ -347,7 +369,7 @@ def test_get_rems_external_id_(requests_mock):
     assert not rems_external_id
 
 
-def test_create_access_with_external_id():
+def test_create_access_with_external_id(mocker):
     resource_id = "TEST-2-5591E3-1"
     expiration_date = datetime.date.today() + datetime.timedelta(days=1)
     application_id = 4056
@@ -365,7 +387,9 @@ def test_create_access_with_external_id():
 
     with requests_mock.Mocker() as m:
         m.get(request_url, json={"application/external-id": external_id})
-        create_rems_entitlement(user, application_id, resource_id, expiration_date)
+        grant_rems_entitlement(
+            mocker, user, application_id, resource_id, expiration_date
+        )
 
     access = Access.objects.get(application_id=application_id)
     assert access
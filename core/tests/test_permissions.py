@@ -1,7 +1,11 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from core import constants
-from core.permissions import GROUP_PERMISSIONS
+from core.permissions import GROUP_PERMISSIONS, AutoChecker, filter_by_permission
+from core.models import DAC, Contract, Project
+from core.permissions.cache import permission_cache_scope
 from test.factories import *
 
 
@@ -396,3 +400,116 @@ def test_project_entity_permissions(permissions, group, entity_factory):
         assert user.has_permission_on_object(
             f"core.{constants.Permissions.EDIT.value}_project", new_entity
         )
+
+
+def _count_check_many_queries(user, perm, objects):
+    # fresh user instance, so that no permission is cached on it
+    user = User.objects.get(pk=user.pk)
+    with CaptureQueriesContext(connection) as context:
+        verdicts = AutoChecker(user).check_many(perm, objects)
+    return verdicts, len(context.captured_queries)
+
+
+@pytest.mark.parametrize("group", [VIPGroup, DataStewardGroup])
+def test_check_many_dataset_permissions(permissions, group):
+    """
+    check_many returns the same verdicts as individual checks,
+    with a number of queries that does not depend on the number of objects
+    """
+    user = UserFactory(groups=[group()])
+    perm = f"core.{constants.Permissions.PROTECTED.value}_dataset"
+
+    def make_datasets(count):
+        datasets = []
+        for index in range(count):
+            dataset = DatasetFactory()
+            if index % 3 == 0:
+                dataset.local_custodians.set([user])
+            elif index % 3 == 1:
+                dataset.project.local_custodians.set([user])
+            datasets.append(dataset)
+        return datasets
+
+    few = make_datasets(3)
+    many = make_datasets(9)
+
+    verdicts, few_queries = _count_check_many_queries(
+        user, perm, Dataset.objects.filter(pk__in=[d.pk for d in few])
+    )
+    for dataset, verdict in verdicts.items():
+        assert verdict == user.has_permission_on_object(perm, dataset)
+
+    verdicts, many_queries = _count_check_many_queries(
+        user, perm, Dataset.objects.filter(pk__in=[d.pk for d in many])
+    )
+    for dataset, verdict in verdicts.items():
+        assert verdict == user.has_permission_on_object(perm, dataset)
+
+    assert few_queries == many_queries
+
+
+def test_check_many_documents_permissions(permissions):
+    user = UserFactory(groups=[VIPGroup()])
+    project = ProjectFactory()
+    project.local_custodians.set([user])
+    contract = ContractFactory()
+    documents = [
+        ProjectDocumentFactory(content_object=project),
+        ProjectDocumentFactory(content_object=ProjectFactory()),
+        ContractDocumentFactory(content_object=contract),
+    ]
+
+    verdicts = AutoChecker(user).check_many(
+        f"core.{constants.Permissions.PROTECTED.value}_document", documents
+    )
+    assert verdicts == {documents[0]: True, documents[1]: False, documents[2]: False}
+
+
+def test_permission_cache_shared_within_scope(permissions):
+    """
+    Within a permission cache scope, a permission is resolved once,
+    and the cache is invalidated when object permissions change
+    """
+    user = UserFactory(groups=[VIPGroup()])
+    dataset = DatasetFactory()
+    perm = f"core.{constants.Permissions.PROTECTED.value}_dataset"
+
+    with permission_cache_scope() as cache:
+        assert not user.can_see_protected(dataset)
+        assert cache.misses == 1
+        with CaptureQueriesContext(connection) as context:
+            assert not user.has_permission_on_object(perm, dataset)
+        assert len(context.captured_queries) == 0
+        assert cache.hits == 1
+
+        dataset.local_custodians.set([user])
+        assert user.has_permission_on_object(perm, dataset)
+
+
+@pytest.mark.parametrize("group", [VIPGroup, DataStewardGroup, LegalGroup])
+@pytest.mark.parametrize(
+    "model, factory",
+    [(Project, ProjectFactory), (Dataset, DatasetFactory), (Contract, ContractFactory)],
+)
+def test_filter_by_permission(permissions, group, model, factory):
+    """
+    filter_by_permission selects the same objects as the checkers
+    """
+    user = UserFactory(groups=[group()])
+    objects = [factory() for _ in range(4)]
+    objects[0].local_custodians.set([user])
+    if model is not Project:
+        objects[1].project.local_custodians.set([user])
+    dac = DACFactory(contract=ContractFactory())
+    dac.contract.project.local_custodians.set([user])
+
+    for perm_type in (constants.Permissions.PROTECTED, constants.Permissions.EDIT):
+        perm = f"core.{perm_type.value}_{model.__name__.lower()}"
+        queryset = model.objects.filter(pk__in=[obj.pk for obj in objects])
+        permitted = set(filter_by_permission(user, perm, queryset))
+        for obj in objects:
+            assert (obj in permitted) == AutoChecker(user).check(perm, obj)
+
+    perm = f"core.{constants.Permissions.EDIT.value}_dac"
+    permitted = filter_by_permission(user, perm, DAC.objects.filter(pk=dac.pk))
+    assert permitted.exists() == AutoChecker(user).check(perm, dac)
@@ -0,0 +1,44 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.search_indexes import ContractIndex, DatasetIndex, ProjectIndex
+from test.factories import (
+    ContractFactory,
+    DataDeclarationFactory,
+    DatasetFactory,
+    PartnerRoleFactory,
+    ProjectFactory,
+    UserFactory,
+)
+
+
+def _count_prepare_queries(index):
+    with CaptureQueriesContext(connection) as context:
+        for obj in index.index_queryset():
+            index.full_prepare(obj)
+    return len(context.captured_queries)
+
+
+def _create_entities(number):
+    for _ in range(number):
+        user = UserFactory()
+        project = ProjectFactory(local_custodians=[user])
+        dataset = DatasetFactory(project=project, local_custodians=[user])
+        contract = ContractFactory(project=project, local_custodians=[user])
+        DataDeclarationFactory(dataset=dataset, contract=contract)
+        PartnerRoleFactory(contract=contract)
+
+
+def test_index_queryset_query_count_independent_of_size():
+    indexes = [DatasetIndex(), ProjectIndex(), ContractIndex()]
+    _create_entities(2)
+    counts = [_count_prepare_queries(index) for index in indexes]
+    _create_entities(3)
+    assert [_count_prepare_queries(index) for index in indexes] == counts
+
+
+def test_parallel_rebuild_index_prepare_only(capsys):
+    _create_entities(2)
+    call_command("parallel_rebuild_index", "core.Dataset", "--prepare-only")
+    assert "core.Dataset: 2 documents" in capsys.readouterr().out
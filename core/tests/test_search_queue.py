@@ -0,0 +1,51 @@
+from core import search_queue
+from core.models import Dataset
+from core.tasks import update_search_index
+from test.factories import DatasetFactory, ProjectFactory
+
+
+def test_index_updates_are_coalesced(monkeypatch, django_capture_on_commit_callbacks):
+    dispatched = []
+    monkeypatch.setattr(search_queue, "is_enabled", lambda: True)
+    monkeypatch.setattr(
+        search_queue,
+        "dispatch",
+        lambda updates, removals: dispatched.append((updates, removals)),
+    )
+    project = ProjectFactory()
+    dataset = DatasetFactory(project=project)
+    removed = DatasetFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with search_queue.queue_index_updates():
+            for _ in range(3):
+                search_queue.enqueue_update(dataset)
+            with search_queue.queue_index_updates():
+                search_queue.enqueue_update(project)
+            search_queue.enqueue_update(removed)
+            search_queue.enqueue_removal(removed)
+        assert dispatched == []
+
+    assert dispatched == [
+        (
+            {"core.Dataset": [dataset.pk], "core.Project": [project.pk]},
+            [f"core.dataset.{removed.pk}"],
+        )
+    ]
+
+
+def test_rolled_back_removals_are_reindexed(mocker):
+    mocker.patch("core.tasks.connection_router.for_write", return_value=["default"])
+    haystack_connection = mocker.patch("core.tasks.connections")["default"]
+    backend = haystack_connection.get_backend.return_value
+    index = haystack_connection.get_unified_index.return_value.get_index.return_value
+    index.index_queryset.return_value = Dataset.objects.all()
+    kept = DatasetFactory()
+    deleted = DatasetFactory()
+    deleted_identifier = f"core.dataset.{deleted.pk}"
+    deleted.delete()
+
+    update_search_index({}, [f"core.dataset.{kept.pk}", deleted_identifier])
+
+    backend.update.assert_called_once_with(index, [kept])
+    backend.remove.assert_called_once_with(deleted_identifier)
@@ -30,6 +30,22 @@ class DaisyLogger:
         return wrap
 
 
+def is_cache_shared() -> bool:
+    """
+    Whether the default cache is shared by all the processes (web workers, Celery workers,
+    management commands), so that an invalidation made by one of them reaches the others.
+    Guessed from the cache backend unless CACHE_IS_SHARED is set.
+    """
+    shared = getattr(settings, "CACHE_IS_SHARED", None)
+    if shared is not None:
+        return shared
+    from django.core.cache import caches
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(caches["default"], (DummyCache, LocMemCache))
+
+
 class BootstrapChecker:
     """
     This is a small helper class to find any problems with missing values
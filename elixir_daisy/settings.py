@@ -78,7 +78,7 @@ if SOLR_URL_TEST := env("SOLR_URL_TEST", default=None):
     )
 HAYSTACK_SIGNAL_PROCESSOR = env(
     "HAYSTACK_SIGNAL_PROCESSOR",
-    default="celery_haystack.signals.CelerySignalProcessor",
+    default="core.search_queue.CoalescingSignalProcessor",
 )
 
 # Application definition
@@ -111,9 +111,11 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.permissions.cache.PermissionCacheMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "auditlog.middleware.AuditlogMiddleware",
+    "core.search_queue.SearchIndexQueueMiddleware",
     "django.contrib.auth.middleware.LoginRequiredMiddleware",
 ]
 
@@ -343,6 +345,14 @@ FACET_FIELDS = {
 # Notifications settings
 NOTIFICATIONS_DISABLED = env.bool("NOTIFICATIONS_DISABLED", default=False)
 ADMIN_NOTIFICATIONS_EMAIL = env("ADMIN_NOTIFICATIONS_EMAIL", default="")
+# number of users whose notifications are e-mailed by a single task
+NOTIFICATIONS_DISPATCH_CHUNK_SIZE = env.int(
+    "NOTIFICATIONS_DISPATCH_CHUNK_SIZE", default=200
+)
+# seconds the number of unread notifications shown in the navbar is cached
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT = env.int(
+    "NOTIFICATIONS_UNREAD_COUNT_TIMEOUT", default=300
+)
 
 # Placeholders on login page
 LOGIN_USERNAME_PLACEHOLDER = env("LOGIN_USERNAME_PLACEHOLDER", default="")
@@ -356,6 +366,8 @@ IMPORT_JSON_SCHEMAS_URI = (
     "https://raw.githubusercontent.com/elixir-luxembourg/json-schemas/v0.0.6/schemas/"
 )
 IMPORT_JSON_SCHEMAS_DIR = os.path.join(BASE_DIR, "core", "fixtures", "json_schemas")
+# number of processes validating the items of large import files
+IMPORT_VALIDATION_WORKERS = env.int("IMPORT_VALIDATION_WORKERS", default=1)
 
 ACCESS_DEFAULT_EXPIRATION_DAYS = env.int("ACCESS_DEFAULT_EXPIRATION_DAYS", default=90)
 IDSERVICE_FUNCTION = env(
@@ -411,6 +423,37 @@ if DEBUG:
 
 GLOBAL_API_KEY = env("GLOBAL_API_KEY")
 
+# resolutions of the user and endpoint API keys kept by each process (0 to disable),
+# only when the cache is shared, for the revocations to reach all the processes
+API_KEY_CACHE_SIZE = env.int("API_KEY_CACHE_SIZE", default=1024)
+API_KEY_CACHE_TIMEOUT = env.int("API_KEY_CACHE_TIMEOUT", default=300)
+
+# must be shared between the web and worker processes for the invalidations to reach all of them
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+# whether the cache is shared, guessed from its backend when not set; the export snapshots,
+# the API key resolutions and the audit log catalogue are not kept in a process-local cache
+CACHE_IS_SHARED = env.bool("CACHE_IS_SHARED", default=None)
+
+# how long (in seconds) the exports of the API are served from their snapshot
+EXPORT_SNAPSHOT_TIMEOUT = env.int("EXPORT_SNAPSHOT_TIMEOUT", default=3600)
+
+# exports of more records are produced in the background by an export job, 0 disables the jobs
+EXPORT_ASYNC_THRESHOLD = env.int("EXPORT_ASYNC_THRESHOLD", default=1000)
+# how long (in days) the files of the export jobs are kept
+EXPORT_JOBS_RETENTION_DAYS = env.int("EXPORT_JOBS_RETENTION_DAYS", default=7)
+
+# how long (in seconds) the results of the term searches are cached, 0 disables the cache
+TERM_SEARCH_CACHE_TIMEOUT = env.int("TERM_SEARCH_CACHE_TIMEOUT", default=300)
+
+# how long (in seconds) the facet counts of the list pages are cached, 0 disables the cache
+FACET_COUNTS_CACHE_TIMEOUT = env.int("FACET_COUNTS_CACHE_TIMEOUT", default=60)
+
+# how long (in seconds) the catalogue of the fields changed in the audit log is cached, it is
+# kept up to date as the log entries are written in the meantime (at most 60s in a process-local cache)
+LOG_ENTRY_FIELDS_CACHE_TIMEOUT = env.int(
+    "LOG_ENTRY_FIELDS_CACHE_TIMEOUT", default=24 * 60 * 60
+)
+
 # if LDAP authentication will be used and user definitions will be bulk imported from LDAP
 if LDAP_ENABLED := env.bool("LDAP_ENABLED", default=False):
     import ldap
@@ -500,6 +543,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "core.tasks.update_rems_access_external_id",
         "schedule": crontab(minute=0, hour=3),  # Execute task at 3am
     },
+    "delete-expired-export-jobs-every-day": {
+        "task": "core.tasks.delete_expired_export_jobs",
+        "schedule": crontab(minute=30, hour=3),
+    },
 }
 
 
@@ -1,16 +1,25 @@
 import typing
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional
 from datetime import timedelta
 
 if typing.TYPE_CHECKING:
     from django.conf import settings
+    from django.db.models import QuerySet
     from datetime import date
-    from notification.models import NotificationVerb
+    from notification.models import Notification, NotificationVerb
 
     User = settings.AUTH_USER_MODEL
 
 
 class NotifyMixin:
+    # Set-based generation of the notifications, used when the entity declares
+    # the date fields of its events with their verb...
+    notification_dates: Dict[str, "NotificationVerb"] = {}
+    # ...and the lookup from the objects carrying these dates to the users to notify,
+    # through the Responsibility index of their local custodians
+    notification_recipient_path: Optional[str] = None
+
     @staticmethod
     def get_notification_recipients() -> List["User"]:
         """
@@ -19,6 +28,13 @@ class NotifyMixin:
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    @classmethod
+    def get_notification_objects(cls) -> "QuerySet":
+        """
+        Returns the objects carrying the dates of `notification_dates`.
+        """
+        return cls.objects.all()
+
     @classmethod
     def make_notifications(cls, exec_date: "date"):
         """
@@ -28,6 +44,9 @@ class NotifyMixin:
         Params:
             exec_date: The date of execution of the task.
         """
+        if cls.notification_dates:
+            cls.make_notifications_in_bulk(exec_date)
+            return
         recipients = cls.get_notification_recipients()
         for user in recipients:
             notification_setting = cls.get_notification_setting(user)
@@ -38,6 +57,72 @@ class NotifyMixin:
             day_offset = timedelta(days=notification_setting.notification_offset)
             cls.make_notifications_for_user(day_offset, exec_date, user)
 
+    @classmethod
+    def make_notifications_in_bulk(cls, exec_date: "date"):
+        """
+        Creates the notifications of the events due on the execution date, i.e. whose date
+        minus the notification offset of the recipient is the execution date.
+        The events are selected with one query per date field, and the notifications
+        are written at once.
+
+        Params:
+            exec_date: The date of execution of the task.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db.models import DateField, F, Q, Value
+        from django.db.models.expressions import CombinedExpression
+        from notification.models import (
+            Notification,
+            NotificationSetting,
+            invalidate_unread_counts,
+        )
+
+        NotificationSetting.objects.bulk_create(
+            NotificationSetting(user=user)
+            for user in cls.get_notification_recipients().filter(
+                notification_setting__isnull=True
+            )
+        )
+
+        objects = cls.get_notification_objects()
+        # (object id, verb) -> ids of the users to notify
+        due = defaultdict(set)
+        path = cls.notification_recipient_path
+        setting = f"{path}__notification_setting"
+        for date_field, verb in cls.notification_dates.items():
+            # the conditions on the recipient are given in a single filter() call,
+            # so that they all use the same join on the (many-valued) path
+            rows = objects.filter(
+                Q(**{f"{setting}__send_email": True})
+                | Q(**{f"{setting}__send_in_app": True}),
+                **{
+                    date_field: CombinedExpression(
+                        Value(exec_date),
+                        "+",
+                        F(f"{setting}__notification_offset"),
+                        output_field=DateField(),
+                    )
+                },
+            ).values_list("pk", path)
+            for pk, user_id in rows:
+                due[(pk, verb)].add(user_id)
+        if not due:
+            return
+
+        instances = objects.in_bulk({pk for pk, _ in due})
+        users = (
+            get_user_model()
+            .objects.select_related("notification_setting")
+            .in_bulk({user_id for user_ids in due.values() for user_id in user_ids})
+        )
+        Notification.objects.bulk_create(
+            cls.build_notification(users[user_id], instances[pk], verb)
+            for (pk, verb), user_ids in due.items()
+            for user_id in user_ids
+        )
+        # bulk_create does not send post_save
+        invalidate_unread_counts(users)
+
     @classmethod
     def make_notifications_for_user(
         cls, day_offset: "timedelta", exec_date: "date", user: "User"
@@ -53,12 +138,21 @@ class NotifyMixin:
         raise NotImplementedError("Subclasses must implement this method")
 
     @staticmethod
-    def notify(user: "User", obj: object, verb: "NotificationVerb"):
+    def build_notification(
+        user: "User", obj: object, verb: "NotificationVerb"
+    ) -> "Notification":
         """
-        Notify the user about the entity.
+        Returns the (unsaved) notification of the user about the entity.
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    @classmethod
+    def notify(cls, user: "User", obj: object, verb: "NotificationVerb"):
+        """
+        Notify the user about the entity.
+        """
+        cls.build_notification(user, obj, verb).save()
+
     @staticmethod
     def get_notification_setting(user: "User"):
         """
@@ -5,38 +5,59 @@ from django.core.exceptions import PermissionDenied
 from django.db.models import QuerySet
 from django.http import JsonResponse
 
-from notification.models import Notification
+from notification.models import (
+    Notification,
+    get_unread_count,
+    invalidate_unread_counts,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
-def jsonify(data):
+def jsonify(data, **extra):
     if isinstance(data, QuerySet) or isinstance(data, list):
         data = [o.to_json() for o in data]
     else:
         data = data.to_json()
 
-    return JsonResponse({"data": data}, status=200)
+    return JsonResponse({"data": data, **extra}, status=200)
+
+
+def paginate(request, notifications):
+    """
+    Opt-in keyset pagination of the notifications, most recent first: `?limit=<n>&after=<id>`
+    selects the n notifications following the one with the given id.
+    Returns the notifications of the page and the cursor of the next one (None on the last page),
+    the notifications are left as they are without `limit`.
+    Raises ValueError on invalid parameters.
+    """
+    if "limit" not in request.GET:
+        return notifications, None
+    notifications = notifications.order_by("-pk")
+    limit = int(request.GET.get("limit"))
+    if limit < 1:
+        raise ValueError("'limit' must be positive")
+    if "after" in request.GET:
+        notifications = notifications.filter(pk__lt=int(request.GET.get("after")))
+    page = list(notifications[: limit + 1])
+    next_cursor = page[limit - 1].pk if len(page) > limit else None
+    return page[:limit], next_cursor
 
 
 @require_http_methods(["PATCH"])
 def api_dismiss_notification(request, pk):
-    notification = Notification.objects.get(pk=pk)
+    notification = Notification.objects.with_content_objects().get(pk=pk)
     if request.user != notification.recipient:
         raise PermissionDenied(
             "You cannot dismiss a notification you are not the recipient of"
         )
     logger.debug(f"Dismissing user {request.user.pk} notification {notification.pk}")
-    notification.dismissed = True
-    notification.save()
+    Notification.objects.filter(pk=notification.pk).update(dismissed=True)
+    invalidate_unread_counts([request.user.pk])
 
-    notification_list = Notification.objects.filter(
-        recipient=request.user,
-        content_type=notification.content_type,
-        dispatch_in_app=True,
-    )
-    return jsonify(notification_list)
+    notification.dismissed = True
+    return jsonify([notification])
 
 
 @require_http_methods(["PATCH"])
@@ -47,19 +68,18 @@ def api_dismiss_all_notifications(request, object_type):
         content_type__model=object_type,
         dispatch_in_app=True,
     )
-    for notif in notification_list:
-        notif.dismissed = True
-        notif.save()
+    dismissed = notification_list.update(dismissed=True)
+    invalidate_unread_counts([request.user.pk])
 
     logger.debug(
-        f"Successfully dismissed {len(notification_list)} notifications for user {request.user.pk}"
+        f"Successfully dismissed {dismissed} notifications for user {request.user.pk}"
     )
-    return jsonify(notification_list)
+    return jsonify(notification_list.with_content_objects())
 
 
 @require_http_methods(["GET"])
 def api_get_notifications(request):
-    notifications_list = Notification.objects.filter(
+    notifications_list = Notification.objects.with_content_objects().filter(
         dispatch_in_app=True,
     )
     if request.GET.get("show_dismissed") != "true":
@@ -71,15 +91,20 @@ def api_get_notifications(request):
             recipient__pk=request.GET.get("recipient")
         )
 
-    return jsonify(notifications_list.all())
+    try:
+        notifications_list, next_cursor = paginate(request, notifications_list)
+    except ValueError:
+        return JsonResponse(
+            {"success": False, "error": "Invalid 'limit' or 'after' parameter"},
+            status=400,
+        )
+    if "limit" in request.GET:
+        return jsonify(list(notifications_list), next=next_cursor)
+    return jsonify(notifications_list)
 
 
 @require_http_methods(["GET"])
 def api_get_notifications_number(request):
-    number = Notification.objects.filter(
-        recipient=request.user,
-        dismissed=False,
-        dispatch_in_app=True,
-    ).count()
+    number = get_unread_count(request.user)
 
     return JsonResponse({"success": True, "data": number}, status=200)
@@ -10,9 +10,12 @@ from django.conf import settings
 SUBJECT_PREFIX = "[DAISY]"
 
 
-def send_the_email(sender_email, recipients, subject, template, context):
+def build_the_email(
+    sender_email, recipients, subject, template, context, connection=None
+):
     """
-    Send an email to the recipients using the templates,
+    Build the email to the recipients using the templates, sent through the given
+    connection if any.
     """
     # recipients can be a list or single email
     if not isinstance(recipients, (list, tuple)):
@@ -32,6 +35,16 @@ def send_the_email(sender_email, recipients, subject, template, context):
     subject = f"{SUBJECT_PREFIX} {subject}"
     text_message = render_to_string("%s.txt" % template, context)
     html_message = render_to_string("%s.html" % template, context)
-    msg = EmailMultiAlternatives(subject, text_message, sender_email, recipients)
+    msg = EmailMultiAlternatives(
+        subject, text_message, sender_email, recipients, connection=connection
+    )
     msg.attach_alternative(html_message, "text/html")
+    return msg
+
+
+def send_the_email(sender_email, recipients, subject, template, context):
+    """
+    Send an email to the recipients using the templates,
+    """
+    msg = build_the_email(sender_email, recipients, subject, template, context)
     msg.send(fail_silently=False)
@@ -7,9 +7,12 @@ Notification class does not have any target at the moment.
 from datetime import datetime
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 from django.conf import settings
 
@@ -63,6 +66,18 @@ class NotificationQuerySet(models.QuerySet):
     def ordered(self):
         return self.order_by("-time")
 
+    def unread(self, user):
+        return self.filter(recipient=user, dismissed=False, dispatch_in_app=True)
+
+    def with_content_objects(self):
+        """
+        Fetch the recipients and content types along, and the content objects with
+        one query per content type instead of one per notification.
+        """
+        return self.select_related("recipient", "content_type").prefetch_related(
+            "content_object"
+        )
+
 
 class NotificationManager(models.Manager):
     def get_queryset(self):
@@ -71,6 +86,12 @@ class NotificationManager(models.Manager):
     def ordered(self):
         return self.get_queryset().ordered()
 
+    def unread(self, user):
+        return self.get_queryset().unread(user)
+
+    def with_content_objects(self):
+        return self.get_queryset().with_content_objects()
+
 
 class Notification(models.Model):
     class Meta:
@@ -97,9 +118,9 @@ class Notification(models.Model):
     objects = NotificationManager()
 
     def get_absolute_url(self):
-        model_class = self.content_type.model_class()
-        if hasattr(model_class, "get_absolute_url"):
-            return model_class.objects.get(pk=self.object_id).get_absolute_url()
+        content_object = self.content_object
+        if hasattr(content_object, "get_absolute_url"):
+            return content_object.get_absolute_url()
         return None
 
     def get_full_url(self):
@@ -144,3 +165,33 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"N: {self.recipient} {self.verb} {self.object_id} {self.time}"
+
+
+UNREAD_COUNT_KEY = "notifications:unread:{}"
+
+
+def get_unread_count(user) -> int:
+    """
+    Number of in-app notifications the user has not dismissed yet, cached until
+    the notifications of the user change.
+    """
+    key = UNREAD_COUNT_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.unread(user).count()
+        cache.set(
+            key,
+            count,
+            timeout=getattr(settings, "NOTIFICATIONS_UNREAD_COUNT_TIMEOUT", 300),
+        )
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([UNREAD_COUNT_KEY.format(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=Notification, dispatch_uid="notification_saved")
+@receiver(post_delete, sender=Notification, dispatch_uid="notification_deleted")
+def notification_changed(sender, instance, **kwargs):
+    invalidate_unread_counts([instance.recipient_id])
@@ -1,13 +1,17 @@
-from datetime import datetime
+from datetime import datetime, date
 from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
+from typing import List
 
-from celery import shared_task
+from celery import group, shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
-from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
+from django.db.models.functions import TruncDate
 
 from notification import NotifyMixin
-from notification.email_sender import send_the_email
+from notification.email_sender import build_the_email
 from notification.models import Notification
 
 
@@ -35,50 +39,140 @@ def create_notifications_for_entities(execution_date: str = None):
         cls.make_notifications(exec_date)
 
 
-def report_notifications_upcoming_events_errors_for_admin(
-    user, execution_date: datetime
+def get_pending_email_notifications(exec_date: date):
+    """
+    Notifications to send by email that are not processed yet, up to the execution date.
+    """
+    return Notification.objects.filter(
+        dispatch_by_email=True,
+        processing_date=None,
+        time__date__lte=exec_date,
+    )
+
+
+def group_by_content_type(notifications: List[Notification]) -> dict:
+    notifications_by_content_type = defaultdict(list)
+    for notif in notifications:
+        notifications_by_content_type[notif.content_type].append(notif)
+    return dict(notifications_by_content_type)
+
+
+def build_notifications_upcoming_events_errors_report(
+    user, notifications: List[Notification], connection=None
 ):
     """
-    Send upcoming events notifications errors report for admin, if any.
+    Build the upcoming events notifications errors report for admin.
 
     Params:
         user: The user for which the notifications sending failed
-        execution_date: The date of the execution of the task. FORMAT: YYYY-MM-DD
+        notifications: The notifications that are not processed
+        connection: The connection to the mail server to send the report through
     """
-    logger.info("Sending upcoming events notifications errors for admin")
+    context = {
+        "notifications": group_by_content_type(notifications),
+        "error_message": "Please find below the notifications that failed to be sent to user: "
+        + user.full_name,
+    }
+    return build_the_email(
+        settings.EMAIL_DONOTREPLY,
+        settings.ADMIN_NOTIFICATIONS_EMAIL,
+        "Notifications",
+        "notification/email_admin_notifications_error",
+        context,
+        connection=connection,
+    )
 
-    notifications_not_processed = Notification.objects.filter(
-        recipient=user.id,
-        dispatch_by_email=True,
-        processing_date=None,
-        time__date__lte=execution_date,
+
+@shared_task
+def send_notifications_digests(
+    recipient_ids: List[int], execution_date: str, only_one_day: bool = False
+):
+    """
+    Send upcoming events notification report for the given users, through a single
+    connection to the mail server, and report the notifications not processed to admin.
+
+    Params:
+        recipient_ids: The ids of the users to send the report to
+        execution_date: The date of the execution of the task. FORMAT: YYYY-MM-DD
+        only_one_day: If true send the notifications of the execution date only.
+    """
+    exec_date = datetime.strptime(execution_date, "%Y-%m-%d").date()
+
+    notifications = list(
+        get_pending_email_notifications(exec_date)
+        .filter(recipient_id__in=recipient_ids)
+        .annotate(day=TruncDate("time"))
+        .select_related("content_type", "recipient")
+        .order_by("recipient_id", "time")
     )
 
-    # Send email to admin in case of errors
-    if notifications_not_processed:
-        logger.error("Some notification are not processed: ")
-        logger.error(notifications_not_processed)
+    sent = set()
+    connection = get_connection()
+    try:
+        with connection:
+            for user, user_notifications in groupby(
+                notifications, key=attrgetter("recipient")
+            ):
+                notifications_exec_date = [
+                    notif
+                    for notif in user_notifications
+                    if not only_one_day or notif.day == exec_date
+                ]
+                if not notifications_exec_date:
+                    continue
+
+                context = {
+                    "user": user.full_name,
+                    "notifications": group_by_content_type(notifications_exec_date),
+                }
+                try:
+                    connection.send_messages(
+                        [
+                            build_the_email(
+                                settings.EMAIL_DONOTREPLY,
+                                user.email,
+                                "Notifications",
+                                "notification/email_list_notifications",
+                                context,
+                                connection=connection,
+                            )
+                        ]
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Failed: An error occurred while sending upcoming events Email notification for user {user.full_name}."
+                        f" Error: {e}"
+                    )
+                    continue
+                sent.update(notif.pk for notif in notifications_exec_date)
+    except Exception as e:
+        logger.error(
+            f"Failed: An error occurred while connecting to the mail server. Error: {e}"
+        )
 
-        notifications_not_processed_by_content_type = defaultdict(list)
+    if sent:
+        Notification.objects.filter(pk__in=sent).update(
+            processing_date=datetime.now().date()
+        )
 
-        for notif in notifications_not_processed:
-            notifications_not_processed_by_content_type[notif.content_type].append(
-                notif
+    # Report the missed notifications to admin, if any
+    reports = []
+    for user, user_notifications in groupby(notifications, key=attrgetter("recipient")):
+        notifications_not_processed = [
+            notif for notif in user_notifications if notif.pk not in sent
+        ]
+        if notifications_not_processed:
+            logger.error(f"Some notification are not processed for user {user}: ")
+            logger.error(notifications_not_processed)
+            reports.append(
+                build_notifications_upcoming_events_errors_report(
+                    user, notifications_not_processed, connection=connection
+                )
             )
-
-        context = {
-            "notifications": dict(notifications_not_processed_by_content_type),
-            "error_message": "Please find below the notifications that failed to be sent to user: "
-            + user.full_name,
-        }
+    if reports:
+        logger.info("Sending upcoming events notifications errors for admin")
         try:
-            send_the_email(
-                settings.EMAIL_DONOTREPLY,
-                settings.ADMIN_NOTIFICATIONS_EMAIL,
-                "Notifications",
-                "notification/email_admin_notifications_error",
-                context,
-            )
+            connection.send_messages(reports)
         except Exception as e:
             logger.error(
                 f"Failed: An error occurred while sending Email notification error report for admin."
@@ -92,6 +186,8 @@ def send_notifications_for_user_upcoming_events(
 ):
     """
     Send upcoming events notification report for all users, if any.
+    The users are dispatched by chunks of NOTIFICATIONS_DISPATCH_CHUNK_SIZE, each chunk
+    being sent by a subtask when there are more than one.
 
     Params:
         execution_date: The date of the execution of the task. FORMAT: YYYY-MM-DD (DEFAULT: Today)
@@ -110,58 +206,25 @@ def send_notifications_for_user_upcoming_events(
         exec_date = datetime.now().date()
     else:
         exec_date = datetime.strptime(execution_date, "%Y-%m-%d").date()
+    execution_date = exec_date.strftime("%Y-%m-%d")
 
-    users = get_user_model().objects.all()
-
-    for user in users:
-        if only_one_day:
-            notifications_exec_date = Notification.objects.filter(
-                recipient=user.id,
-                dispatch_by_email=True,
-                processing_date=None,
-                time__date=exec_date,
-            )
-        else:
-            notifications_exec_date = Notification.objects.filter(
-                recipient=user.id,
-                dispatch_by_email=True,
-                processing_date=None,
-                time__date__lte=exec_date,
-            )
-
-        # send notification report to user, if any
-        if not notifications_exec_date:
-            # Checks if there is missed notification for this user and report errors to admin, if any
-            report_notifications_upcoming_events_errors_for_admin(user, exec_date)
-            continue
-
-        # group notifications per content type and set processed to today
-        notifications_by_content_type = defaultdict(list)
-        for notif in notifications_exec_date:
-            notifications_by_content_type[notif.content_type].append(notif)
-
-        context = {
-            "user": user.full_name,
-            "notifications": dict(notifications_by_content_type),
-        }
-
-        try:
-            send_the_email(
-                settings.EMAIL_DONOTREPLY,
-                user.email,
-                "Notifications",
-                "notification/email_list_notifications",
-                context,
-            )
-            for notif in notifications_exec_date:
-                notif.processing_date = datetime.now().date()
-                notif.save()
-        except Exception as e:
-            logger.error(
-                f"Failed: An error occurred while sending upcoming events Email notification for user {user.full_name}."
-                f" Error: {e}"
-            )
-        finally:
-            # report error to admin
-            report_notifications_upcoming_events_errors_for_admin(user, exec_date)
-            continue
+    recipient_ids = list(
+        get_pending_email_notifications(exec_date)
+        .order_by("recipient_id")
+        .values_list("recipient_id", flat=True)
+        .distinct()
+    )
+    chunk_size = settings.NOTIFICATIONS_DISPATCH_CHUNK_SIZE
+    chunks = [
+        recipient_ids[i : i + chunk_size]
+        for i in range(0, len(recipient_ids), chunk_size)
+    ]
+
+    if len(chunks) == 1:
+        send_notifications_digests(chunks[0], execution_date, only_one_day)
+    elif chunks:
+        logger.info(f"Dispatching {len(recipient_ids)} users in {len(chunks)} chunks")
+        group(
+            send_notifications_digests.s(chunk, execution_date, only_one_day)
+            for chunk in chunks
+        ).apply_async()
@@ -147,6 +147,31 @@ def test_dismiss_notification(
     assert notification.dismissed
 
 
+def test_dismiss_notification_returns_only_the_dismissed_one(
+    client: "Client",
+    user_normal: "settings.AUTH_USER_MODEL",
+    notifications_for_user: callable,
+):
+    """
+    Test that the api returns the dismissed notification alone, the other
+    notifications of its category are left untouched
+
+    :param client: Django test client
+    :param user_normal: User fixture with normal permissions
+    :param notifications_for_user: Fixture to create notifications for a given user
+    """
+    notification, other = notifications_for_user(user_normal, 2)
+    assert client.login(
+        username=user_normal.username, password="password"
+    ), "Login failed"
+
+    json_response = client.patch(reverse("api_dismiss", args=[notification.pk]))
+    data = is_valid_api_response(json_response, 1)
+    assert data[0]["id"] == notification.pk
+    assert data[0]["dismissed"]
+    assert not Notification.objects.get(pk=other.pk).dismissed
+
+
 def test_dismiss_notification_wrong_user(
     client: "Client",
     user_normal: "settings.AUTH_USER_MODEL",
@@ -198,3 +223,97 @@ def test_dismiss_all_notifications(
     notifications = Notification.objects.filter(recipient=user_normal)
     for notif in notifications:
         assert notif.dismissed
+
+
+def test_api_get_notifications_pagination(
+    client: "Client",
+    user_normal: "settings.AUTH_USER_MODEL",
+    notifications_for_user: callable,
+):
+    """
+    Test that the notifications are paginated, most recent first, with `limit` and `after`
+
+    :param client: Django test client
+    :param user_normal: User fixture with normal permissions
+    :param notifications_for_user: Fixture to create notifications for a given user
+    """
+    notifications = notifications_for_user(user_normal, 5)
+    expected_ids = sorted((n.pk for n in notifications), reverse=True)
+    assert client.login(
+        username=user_normal.username, password="password"
+    ), "Login failed"
+
+    received_ids = []
+    params = {"limit": 2}
+    while True:
+        json_response = client.get(reverse("api_notifications"), params)
+        assert json_response.status_code == 200
+        page = json_response.json()
+        received_ids += [n["id"] for n in page["data"]]
+        if page["next"] is None:
+            break
+        params["after"] = page["next"]
+    assert received_ids == expected_ids
+
+    json_response = client.get(reverse("api_notifications"), {"limit": "none"})
+    assert json_response.status_code == 400
+
+
+def test_api_get_notifications_query_count(
+    client: "Client",
+    user_normal: "settings.AUTH_USER_MODEL",
+    notifications_for_user: callable,
+):
+    """
+    Test that the content objects of the notifications are fetched in batch
+
+    :param client: Django test client
+    :param user_normal: User fixture with normal permissions
+    :param notifications_for_user: Fixture to create notifications for a given user
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    assert client.login(
+        username=user_normal.username, password="password"
+    ), "Login failed"
+
+    def count_queries(number):
+        notifications_for_user(user_normal, number)
+        with CaptureQueriesContext(connection) as context:
+            json_response = client.get(reverse("api_notifications"))
+        assert json_response.status_code == 200
+        return len(context.captured_queries)
+
+    assert count_queries(2) == count_queries(20)
+
+
+def test_api_get_notifications_number(
+    client: "Client",
+    user_normal: "settings.AUTH_USER_MODEL",
+    notifications_for_user: callable,
+):
+    """
+    Test that the cached number of unread notifications follows creations and dismissals
+
+    :param client: Django test client
+    :param user_normal: User fixture with normal permissions
+    :param notifications_for_user: Fixture to create notifications for a given user
+    """
+    notifications = notifications_for_user(user_normal, 3)
+    assert client.login(
+        username=user_normal.username, password="password"
+    ), "Login failed"
+
+    def get_number():
+        return client.get(reverse("api_notif_number")).json()["data"]
+
+    assert get_number() == 3
+    notifications_for_user(user_normal, 1)
+    assert get_number() == 4
+    client.patch(reverse("api_dismiss", args=[notifications[0].pk]))
+    assert get_number() == 3
+    client.patch(
+        reverse("api_dismiss_all", args=[user_normal.__class__.__name__.lower()])
+    )
+    assert get_number() == 0
@@ -225,3 +225,66 @@ def test_send_no_notifications(user_normal):
         recipient=user_normal.id, dispatch_by_email=True, processing_date=None
     )
     assert len(notifications_after_sending) == 1
+
+
+@pytest.mark.django_db
+@override_settings(NOTIFICATIONS_DISABLED=False)
+def test_send_notifications_digests_batch(user_normal, user_staff):
+    """
+    Test notification reports of several users sent by a single task
+    """
+    from django.core import mail
+
+    for user in (user_normal, user_staff):
+        NotificationSetting(user=user, send_email=True).save()
+        for _ in range(2):
+            Notification(
+                recipient=user,
+                content_object=DatasetFactory(),
+                dispatch_by_email=True,
+                verb=NotificationVerb.expire,
+            ).save()
+
+    tasks.send_notifications_for_user_upcoming_events()
+
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        user_staff.email,
+        user_normal.email,
+    ]
+    assert not Notification.objects.filter(processing_date=None).exists()
+
+
+@pytest.mark.django_db
+@override_settings(NOTIFICATIONS_DISABLED=False, NOTIFICATIONS_DISPATCH_CHUNK_SIZE=1)
+def test_send_notifications_for_user_upcoming_events_chunks(
+    user_normal, user_staff, monkeypatch
+):
+    """
+    Test notification reports dispatched by chunks of users to subtasks
+    """
+    for user in (user_normal, user_staff):
+        Notification(
+            recipient=user,
+            content_object=DatasetFactory(),
+            dispatch_by_email=True,
+            verb=NotificationVerb.expire,
+        ).save()
+
+    dispatched = []
+
+    class FakeGroup:
+        def __init__(self, signatures):
+            dispatched.extend(signatures)
+
+        def apply_async(self):
+            for signature in dispatched:
+                signature.apply()
+
+    monkeypatch.setattr(tasks, "group", FakeGroup)
+    tasks.send_notifications_for_user_upcoming_events()
+
+    assert sorted(signature.args[0] for signature in dispatched) == [
+        [user_normal.id],
+        [user_staff.id],
+    ]
+    assert not Notification.objects.filter(processing_date=None).exists()
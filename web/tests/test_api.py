@@ -19,6 +19,8 @@ from test.factories import (
     CohortFactory,
     ContractFactory,
 )
+from core import api_keys
+from core.importer.datasets_exporter import DatasetsExporter
 from core.constants import Permissions
 from core.models import DiseaseTerm
 from web.views.api import create_error_response, protect_api
@@ -26,6 +28,46 @@ from web.views.api import create_error_response, protect_api
 pytestmark = pytest.mark.django_db
 
 
+def test_protect_api_key_cache(settings):
+    settings.CACHE_IS_SHARED = True
+    user = UserFactory.create()
+    old_key = user.api_key
+    endpoint = EndpointFactory()
+
+    @protect_api()
+    def dummy_view(request):
+        return JsonResponse("Success", safe=False)
+
+    factory = RequestFactory()
+    for _ in range(2):
+        assert dummy_view(factory.get("", HTTP_X_API_KEY=old_key)).status_code == 200
+        assert (
+            dummy_view(factory.get("", HTTP_X_API_KEY=endpoint.api_key)).status_code
+            == 200
+        )
+
+    # changing or revoking a key invalidates its cached resolution
+    user.api_key = "a-new-api-key"
+    user.save()
+    assert dummy_view(factory.get("", HTTP_X_API_KEY=old_key)).status_code == 401
+    assert dummy_view(factory.get("", HTTP_X_API_KEY=user.api_key)).status_code == 200
+
+    endpoint_key = endpoint.api_key
+    endpoint.delete()
+    assert dummy_view(factory.get("", HTTP_X_API_KEY=endpoint_key)).status_code == 401
+
+
+def test_api_key_not_cached_in_local_cache(settings, mocker):
+    settings.CACHE_IS_SHARED = False
+    user = UserFactory.create()
+    lookup = mocker.spy(api_keys, "lookup_api_key")
+
+    for _ in range(2):
+        assert api_keys.resolve_api_key(user.api_key) == (api_keys.USER, user.pk)
+    # a revocation would not reach the other processes, every key is looked up
+    assert lookup.call_count == 2
+
+
 def test_create_error_response():
     assert type(create_error_response("test")) == JsonResponse
     assert create_error_response("test").status_code == 500
@@ -177,6 +219,58 @@ def test_project_export_api_with_fields():
     assert "description" in test_project
 
 
+def test_dataset_export_api_stream():
+    endpoint = EndpointFactory()
+    ExposureFactory(endpoint=endpoint, dataset=DatasetFactory(title="Streamed"))
+    path = reverse("api_datasets")
+
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key})
+    expected = loads(api.datasets(request).content)
+
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key, "stream": "true", "compact": "true"}
+    )
+    response = api.datasets(request)
+    content = b"".join(response.streaming_content)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    assert b"\n" not in content
+    assert loads(content) == expected
+    assert expected["items"][0]["name"] == "Streamed"
+
+
+def test_dataset_export_api_stream_failure(mocker):
+    endpoint = EndpointFactory()
+    path = reverse("api_datasets")
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key, "stream": "true", "limit": "10"}
+    )
+
+    def failing_items(*args, **kwargs):
+        raise ValueError("Broken dataset")
+        yield
+
+    mocker.patch.object(DatasetsExporter, "iter_items", failing_items)
+    response = api.datasets(request)
+
+    assert response.status_code == 500
+    assert loads(response.content)["more"] == "Broken dataset"
+
+    def interrupted_items(*args, **kwargs):
+        yield {"name": "First"}
+        raise ValueError("Broken dataset")
+
+    mocker.patch.object(DatasetsExporter, "iter_items", interrupted_items)
+    response = api.datasets(request)
+    document = loads(b"".join(response.streaming_content))
+
+    assert response.status_code == 200
+    assert document["items"] == [{"name": "First"}]
+    assert document["error"] == "Broken dataset"
+    assert "next" not in document
+
+
 def test_partners_public_access():
     PartnerFactory(name="Published Partner", _is_published=True)
     PartnerFactory(name="Unpublished Partner", _is_published=False)
@@ -304,6 +398,36 @@ def test_termsearch_endpoint():
     assert "pagination" in data
 
 
+def test_termsearch_ranking_and_pagination():
+    DiseaseTerm.objects.create(label="Parkinsonism, juvenile", term_id="TEST:001")
+    DiseaseTerm.objects.create(label="Early onset Parkinson", term_id="TEST:002")
+    DiseaseTerm.objects.create(label="parkinson", term_id="TEST:003")
+    DiseaseTerm.objects.bulk_create(
+        DiseaseTerm(label=f"Parkinson disease {i}", term_id=f"TEST:1{i:02}")
+        for i in range(30)
+    )
+
+    path = reverse("api_termsearch", kwargs={"category": "disease"})
+    request = RequestFactory().get(path, {"search": "Parkinson", "page": 1})
+    data = loads(api.termsearch(request, "disease").content)
+
+    labels = [r["text"] for r in data["results"]]
+    assert len(labels) == 25
+    # the exact match first, then the labels starting with the search
+    assert labels[0] == "parkinson"
+    assert "Early onset Parkinson" not in labels
+    assert data["pagination"]["more"] is True
+
+    request = RequestFactory().get(path, {"search": "Parkinson", "page": 2})
+    data = loads(api.termsearch(request, "disease").content)
+    assert len(data["results"]) == 8
+    assert data["results"][-1]["text"] == "Early onset Parkinson"
+    assert data["pagination"]["more"] is False
+
+    request = RequestFactory().get(path, {"search": "Parkinson", "page": 3})
+    assert api.termsearch(request, "disease").status_code == 400
+
+
 def test_contracts_endpoint():
     project = ProjectFactory()
     dataset = DatasetFactory(project=project)
@@ -424,3 +548,122 @@ def test_write_operations_require_global_key():
 
     assert response.status_code == 403
     assert "global api key" in loads(response.content).get("description", "").lower()
+
+
+def test_dataset_export_api_snapshot(settings):
+    settings.CACHE_IS_SHARED = True
+    endpoint = EndpointFactory()
+    dataset = DatasetFactory(title="Cached")
+    ExposureFactory(endpoint=endpoint, dataset=dataset)
+    path = reverse("api_datasets")
+
+    response = api.datasets(RequestFactory().get(path, {"API_KEY": endpoint.api_key}))
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert loads(response.content)["items"][0]["name"] == "Cached"
+
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key}, HTTP_IF_NONE_MATCH=etag
+    )
+    assert api.datasets(request).status_code == 304
+
+    dataset.title = "Changed"
+    dataset.save()
+    request = RequestFactory().get(
+        path, {"API_KEY": endpoint.api_key}, HTTP_IF_NONE_MATCH=etag
+    )
+    response = api.datasets(request)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert loads(response.content)["items"][0]["name"] == "Changed"
+
+
+def test_dataset_export_api_snapshot_follows_related_entities(settings):
+    settings.CACHE_IS_SHARED = True
+    endpoint = EndpointFactory()
+    custodian = UserFactory(email="before@uni.lu")
+    dataset = DatasetFactory(title="Cached", local_custodians=[custodian])
+    ExposureFactory(endpoint=endpoint, dataset=dataset)
+    path = reverse("api_datasets")
+
+    etag = api.datasets(RequestFactory().get(path, {"API_KEY": endpoint.api_key}))[
+        "ETag"
+    ]
+    # the e-mail of a local custodian is exported with the dataset
+    custodian.email = "after@uni.lu"
+    custodian.save()
+    response = api.datasets(
+        RequestFactory().get(
+            path, {"API_KEY": endpoint.api_key}, HTTP_IF_NONE_MATCH=etag
+        )
+    )
+    assert response.status_code == 200
+    assert "after@uni.lu" in response.content.decode()
+
+
+def test_exported_models():
+    from core.importer.export_cache import get_exported_models
+    from core.models import (
+        Access,
+        Contact,
+        Dataset,
+        DataLocation,
+        Partner,
+        Project,
+        Publication,
+        Share,
+        UseCondition,
+        User,
+    )
+
+    models = get_exported_models(Dataset.objects.for_export()) | get_exported_models(
+        Project.objects.for_export()
+    )
+    assert {
+        Access,
+        Contact,
+        DataLocation,
+        Partner,
+        Publication,
+        Share,
+        UseCondition,
+        User,
+        Dataset.local_custodians.through,
+    } <= models
+
+
+def test_dataset_export_api_no_snapshot_in_local_cache(settings):
+    settings.CACHE_IS_SHARED = False
+    endpoint = EndpointFactory()
+    ExposureFactory(endpoint=endpoint, dataset=DatasetFactory(title="Not cached"))
+
+    response = api.datasets(
+        RequestFactory().get(reverse("api_datasets"), {"API_KEY": endpoint.api_key})
+    )
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
+    assert not response.has_header("Last-Modified")
+
+
+def test_dataset_export_api_pagination():
+    endpoint = EndpointFactory()
+    DatasetFactory(title="Not exposed")
+    exposed = [DatasetFactory(title=f"Exposed {i}") for i in range(5)]
+    for dataset in exposed:
+        ExposureFactory(endpoint=endpoint, dataset=dataset)
+    path = reverse("api_datasets")
+
+    names, after = [], None
+    for _ in range(3):
+        params = {"API_KEY": endpoint.api_key, "limit": 2}
+        if after is not None:
+            params["after"] = after
+        body = loads(api.datasets(RequestFactory().get(path, params)).content)
+        assert len(body["items"]) <= 2
+        names += [item["name"] for item in body["items"]]
+        after = body["next"]
+    assert after is None
+    assert names == [dataset.title for dataset in exposed]
+
+    request = RequestFactory().get(path, {"API_KEY": endpoint.api_key, "limit": "x"})
+    assert api.datasets(request).status_code == 400
@@ -1,3 +1,6 @@
+import csv
+import io
+
 import pytest
 from test import factories
 
@@ -30,3 +33,19 @@ def test_excel_export(permissions, client_user_data_steward, url_name, factory):
     # with io.BytesIO(response.content) as fh:
     #    pass
     #    df = pd.io.excel.read_excel(fh, sheetname=0)
+
+
+def test_csv_export(permissions, client_user_data_steward):
+    """
+    Test the streamed csv export, one row per record.
+    """
+    factories.DatasetFactory.create_batch(3)
+    response = client_user_data_steward.get(
+        reverse("datasets_export"), {"format": "csv"}
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert len(rows) == 4
+    assert "name" in rows[0]
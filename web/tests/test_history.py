@@ -1,6 +1,10 @@
+from core import log_entry_fields
 from core.models import Dataset, Access
 from core.utils import DaisyLogger
+from web.views.log_entry import LogEntryListView
 
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, transaction
 from django.shortcuts import reverse
 
 import datetime
@@ -52,3 +56,65 @@ def test_access_history(client, is_steward, user_vip, user_data_steward):
         )
         assert res.status_code == 200
         assert len(res.context["object_list"]) == 2
+
+
+def test_history_pages_and_fields_catalogue(
+    client, user_data_steward, django_capture_on_commit_callbacks
+):
+    dataset = Dataset(title="Paged dataset")
+    dataset.save()
+    access = Access(dataset=dataset, created_by=user_data_steward)
+    access.save()
+
+    access_type = ContentType.objects.get_for_model(Access)
+    catalogue = log_entry_fields.get_catalogue()
+    assert "id" in catalogue["fields"][access_type.pk]
+    assert "grant_expires_on" not in catalogue["fields"][access_type.pk]
+
+    # the cached catalogue is kept up to date, with the committed entries only
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(DatabaseError):
+            with transaction.atomic():
+                access.access_notes = "rolled back"
+                access.save()
+                raise DatabaseError()
+    access.refresh_from_db()
+    fields = log_entry_fields.get_catalogue()["fields"][access_type.pk]
+    assert "access_notes" not in fields
+
+    with django_capture_on_commit_callbacks(execute=True):
+        access.grant_expires_on = datetime.date.today()
+        access.save()
+    fields = log_entry_fields.get_catalogue()["fields"][access_type.pk]
+    assert "grant_expires_on" in fields
+
+    for i in range(LogEntryListView.PAGE_SIZE):
+        access.access_notes = f"notes {i}"
+        access.save()
+
+    client.login(
+        username=user_data_steward.username, password=user_data_steward.password
+    )
+    res = client.get(reverse("history"))
+    assert res.status_code == 200
+    assert len(res.context["object_list"]) == LogEntryListView.PAGE_SIZE
+    assert res.context["has_next"]
+    assert "access" in res.context["models_list"]
+
+    res = client.get(reverse("history"), {"page": 2})
+    assert len(res.context["object_list"]) == 2
+    assert not res.context["has_next"]
+
+    res = client.get(
+        reverse("history"), {"entity_name": "access", "entity_attr": "grant_expires_on"}
+    )
+    assert len(res.context["object_list"]) == 1
+
+
+def test_fields_catalogue_timeout(settings):
+    settings.LOG_ENTRY_FIELDS_CACHE_TIMEOUT = 3600
+    settings.CACHE_IS_SHARED = True
+    assert log_entry_fields.get_timeout() == 3600
+    # the other processes would not update a process-local catalogue
+    settings.CACHE_IS_SHARED = False
+    assert log_entry_fields.get_timeout() == log_entry_fields.LOCAL_CACHE_TIMEOUT
@@ -6,7 +6,10 @@ from faker import Faker
 
 from core.models import Access
 from core.models import Contact
-from core.synchronizers import ExternalUserNotFoundException
+from core.synchronizers import (
+    DummySynchronizationBackend,
+    ExternalUserNotFoundException,
+)
 from core.utils import DaisyLogger
 from test.factories import UserFactory, DatasetFactory, ContactFactory
 
@@ -451,3 +454,45 @@ def test_rems_handler_contact_created(client, user_vip, user_data_steward, mocke
     assert contact.email == email
     assert contact.oidc_id == "12345"
     assert contact.type.name == "Other"
+
+
+def test_rems_handler_batch(client, user_vip, user_data_steward, mocker):
+    email = "john.doe@test.com"
+    patch_get_external_user_info(mocker, email=email)
+    lookups = mocker.spy(DummySynchronizationBackend, "get_external_user_info")
+    expiration_date = datetime.date.today() + datetime.timedelta(days=1)
+    user = UserFactory(oidc_id="12345", email=email)
+    user.save()
+    datasets = [
+        DatasetFactory(title=f"Test {index}", elu_accession=f"TEST-2-5591E3-{index}")
+        for index in range(3)
+    ]
+    data = [
+        {
+            "application": 4056 + index,
+            "resource": dataset.elu_accession,
+            "user": user.oidc_id,
+            "mail": email,
+            "end": expiration_date.strftime("%Y-%m-%d") + "T23:59:59.000Z",
+        }
+        for index, dataset in enumerate(datasets)
+    ]
+    # the same entitlement sent twice
+    data.append(dict(data[0]))
+
+    response = client.post(
+        reverse("api_rems_endpoint"), json.dumps(data), content_type="application/json"
+    )
+    assert response.status_code == 200, response.content
+    assert lookups.call_count == 1
+    for dataset in datasets:
+        accesses = Access.objects.filter(dataset=dataset, user=user).all()
+        assert len(accesses) == 1
+        assert accesses[0].was_generated_automatically
+        assert accesses[0].history.count() == 1
+
+    response = client.post(
+        reverse("api_rems_endpoint"), json.dumps(data), content_type="application/json"
+    )
+    assert response.status_code == 200, response.content
+    assert Access.objects.filter(user=user).count() == 3
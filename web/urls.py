@@ -72,6 +72,8 @@ from web.views.export import (
     contacts_export,
     contracts_export,
     datasets_export,
+    export_job,
+    export_job_download,
     partners_export,
     projects_export,
 )
@@ -215,6 +217,12 @@ web_urls = [
     path("dataset/wizard/", dataset_wizard_view, name="dataset_wizard"),
     path("datasets/", dataset_list, name="datasets"),
     path("datasets/export", datasets_export, name="datasets_export"),
+    path("exports/<int:pk>/", export_job, name="export_job"),
+    path(
+        "exports/<int:pk>/download",
+        export_job_download,
+        name="export_job_download",
+    ),
     path("dataset/add/", DatasetCreateView.as_view(), name="dataset_add"),
     path("dataset/<int:pk>/", DatasetDetailView.as_view(), name="dataset"),
     path("dataset/<int:pk>/delete", DatasetDelete.as_view(), name="dataset_delete"),
@@ -2,18 +2,20 @@ import json
 import sys
 from functools import wraps
 from io import StringIO
+from itertools import chain, islice
 from typing import Dict, Optional
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.core.paginator import Paginator
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.db.models import Count
-from django.contrib.auth.hashers import get_hasher
 from django.contrib.auth.decorators import login_not_required
-from guardian.shortcuts import get_objects_for_user
 
+from core import api_keys, term_search
+from core.importer import export_cache
 from core.importer.datasets_exporter import DatasetsExporter
 from core.importer.projects_exporter import ProjectsExporter
 from core.lcsb.rems import handle_rems_callback
@@ -22,12 +24,11 @@ from core.models import (
     User,
     Cohort,
     Partner,
-    DiseaseTerm,
-    Endpoint,
 )
 from core.constants import Permissions
-from core.models.term_model import TermCategory, PhenotypeTerm, StudyTerm, GeneTerm
-from core.utils import DaisyLogger
+from core.permissions import filter_by_permission
+from core.models.term_model import TERM_MODELS
+from core.utils import DaisyLogger, is_cache_shared
 from web.views.utils import get_client_ip, get_user_or_contact_by_oidc_id
 
 
@@ -46,16 +47,117 @@ def create_error_response(
 def filter_by_user_permissions(request, queryset, model_name):
     if getattr(request, "api_user", None):
         permission = f"core.{Permissions.PROTECTED.value}_{model_name.lower()}"
-        return get_objects_for_user(
-            request.api_user,
-            permission,
-            klass=queryset,
-            use_groups=True,
-            accept_global_perms=True,
-        )
+        return filter_by_permission(request.api_user, permission, queryset)
     return queryset
 
 
+def paginate_by_keyset(request, objects):
+    """
+    Opt-in keyset pagination, `?limit=<n>&after=<id>` selects the first n objects
+    whose id is greater than the given one.
+    Returns the objects of the page and the cursor of the next one (None on the last page).
+    Raises ValueError on invalid parameters.
+    """
+    if "limit" not in request.GET:
+        return objects, None
+    limit = int(request.GET.get("limit"))
+    after = int(request.GET.get("after", 0))
+    if limit < 1:
+        raise ValueError("'limit' must be positive")
+    ids = list(
+        objects.filter(pk__gt=after)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .distinct()[: limit + 1]
+    )
+    next_cursor = ids[limit - 1] if len(ids) > limit else None
+    return objects.filter(pk__in=ids[:limit]).order_by("pk"), next_cursor
+
+
+def get_page_envelope(request, next_cursor) -> Optional[Dict]:
+    if "limit" not in request.GET:
+        return None
+    return {"next": next_cursor}
+
+
+def get_flag(request, name: str) -> bool:
+    return request.GET.get(name, "false").lower() == "true"
+
+
+def create_export_response(request, exporter, **kwargs) -> HttpResponse:
+    """
+    Render the export of the given exporter.
+    * `stream=true` sends the items one by one as they are serialized
+    * `compact=true` disables the indentation of the JSON output
+
+    The first item of a streamed export is serialized before the response is returned,
+    so that a failing export is still answered with an error status; a later failure
+    ends the document with an "error" key instead of the remaining items.
+    """
+    indent = None if get_flag(request, "compact") else 4
+    if get_flag(request, "stream"):
+        chunks = exporter.export_to_stream(indent=indent, error_key="error", **kwargs)
+        head = list(islice(chunks, 2))
+        return StreamingHttpResponse(
+            chain(head, chunks), content_type="application/json"
+        )
+    buffer = exporter.export_to_buffer(StringIO(), indent=indent, **kwargs)
+    return HttpResponse(buffer.getvalue())
+
+
+def get_export_snapshot_key(request) -> Optional[str]:
+    """
+    Exports are cached per API key type, endpoint and query parameters,
+    except for user API keys, whose exports depend on their permissions,
+    and for streamed exports.
+    They are not cached at all when the cache is process-local: the other processes
+    would not see the invalidations and would keep serving stale snapshots.
+    """
+    if getattr(request, "api_user", None) or get_flag(request, "stream"):
+        return None
+    if not is_cache_shared():
+        return None
+    params = sorted((k, v) for k, v in request.GET.items() if k != "API_KEY")
+    global_export = getattr(request, "is_global_api", False)
+    endpoint_id = getattr(request, "api_endpoint_id", None)
+    return f"{request.path}:{global_export}:{endpoint_id}:{urlencode(params)}"
+
+
+def get_export_etag(request, *args, **kwargs) -> Optional[str]:
+    if key := get_export_snapshot_key(request):
+        return export_cache.get_etag(key)
+    return None
+
+
+def get_export_last_modified(request, *args, **kwargs):
+    if get_export_snapshot_key(request):
+        return export_cache.get_last_modified()
+    return None
+
+
+def cache_export(view):
+    """
+    Serve the export from its snapshot while the exported entities do not change,
+    and answer conditional requests with 304 Not Modified.
+    """
+
+    @condition(etag_func=get_export_etag, last_modified_func=get_export_last_modified)
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = get_export_snapshot_key(request)
+        if key is None:
+            return view(request, *args, **kwargs)
+        etag = export_cache.get_etag(key)
+        if (content := export_cache.get_snapshot(etag)) is not None:
+            return HttpResponse(content)
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            export_cache.set_snapshot(etag, response.content.decode())
+        return response
+
+    return wrapper
+
+
 def protect_api(write_required=False):
     """
     Checks if there is a GET or POST parameter that:
@@ -84,13 +186,13 @@ def protect_api(write_required=False):
                     "Write operations require global API key", status=403
                 )
 
-            if user := User.objects.filter(api_key=key).first():
-                request.api_user = user
-                return view(request, *args, **kwargs)
-
-            hashed_key = get_hasher("default").encode(key, salt=settings.SECRET_KEY)
-            if endpoint := Endpoint.objects.filter(api_key=hashed_key).first():
-                request.api_endpoint_id = endpoint.id
+            owner_type, owner_id = api_keys.resolve_api_key(key)
+            if owner_type == api_keys.USER:
+                if user := User.objects.filter(id=owner_id).first():
+                    request.api_user = user
+                    return view(request, *args, **kwargs)
+            elif owner_type == api_keys.ENDPOINT:
+                request.api_endpoint_id = owner_id
                 return view(request, *args, **kwargs)
             return create_error_response("Invalid API key", status=401)
 
@@ -157,42 +259,27 @@ def termsearch(request, category):
     if not search or not page:
         return create_error_response("Missing 'search' or 'page' parameter", status=400)
 
-    if category == TermCategory.disease.value:
-        matching_terms = DiseaseTerm.objects.filter(label__icontains=search).order_by(
-            "id"
-        )
-    elif category == TermCategory.phenotype.value:
-        matching_terms = PhenotypeTerm.objects.filter(label__icontains=search).order_by(
-            "id"
-        )
-    elif category == TermCategory.study.value:
-        matching_terms = StudyTerm.objects.filter(label__icontains=search).order_by(
-            "id"
-        )
-    elif category == TermCategory.gene.value:
-        matching_terms = GeneTerm.objects.filter(label__icontains=search).order_by("id")
-    else:
-        matching_terms = []
-
-    paginator = Paginator(matching_terms, 25)
-
-    if int(page) > paginator.num_pages:
+    try:
+        page = int(page)
+    except ValueError:
+        return create_error_response("Invalid 'page' parameter", status=400)
+    if page < 1:
         return create_error_response("Page number out of range", status=400)
 
-    matching_terms_on_page = paginator.get_page(page)
-
-    results = []
-    for matching_term in matching_terms_on_page:
-        results.append({"id": matching_term.id, "text": matching_term.label})
+    if category in TERM_MODELS:
+        results, more = term_search.search_terms(category, search, page)
+    else:
+        results, more = [], False
+    if page > 1 and not results:
+        return create_error_response("Page number out of range", status=400)
 
-    return JsonResponse(
-        {"results": results, "pagination": {"more": int(page) < paginator.num_pages}}
-    )
+    return JsonResponse({"results": results, "pagination": {"more": more}})
 
 
 @login_not_required
 @csrf_exempt
 @protect_api()
+@cache_export
 def datasets(request):
     endpoint_id = getattr(request, "api_endpoint_id", None)
     global_export = getattr(request, "is_global_api", False)
@@ -204,16 +291,24 @@ def datasets(request):
     if "project_title" in request.GET:
         project_title = request.GET.get("project_title", "")
         objects = objects.filter(project__title__iexact=project_title)
+    include_unpublished = global_export or hasattr(request, "api_user")
+    if not include_unpublished:
+        # pages are made of exposed datasets only
+        objects = objects.filter(exposures__endpoint__id=endpoint_id)
+    try:
+        objects, next_cursor = paginate_by_keyset(request, objects)
+    except ValueError:
+        return create_error_response("Invalid 'limit' or 'after' parameter", status=400)
     exporter = DatasetsExporter(
         objects=objects,
         endpoint_id=endpoint_id,
-        include_unpublished=global_export or hasattr(request, "api_user"),
+        include_unpublished=include_unpublished,
     )
 
     try:
-        buffer = exporter.export_to_buffer(StringIO())
-
-        return HttpResponse(buffer.getvalue())
+        return create_export_response(
+            request, exporter, extra=get_page_envelope(request, next_cursor)
+        )
     except Exception as e:
         return create_error_response(
             "Something went wrong during exporting the datasets", {"more": str(e)}
@@ -241,6 +336,10 @@ def contracts(request):
     if "project_id" in request.GET:
         project_id = request.GET.get("project_id", "")
         objects = objects.filter(project__id=project_id)
+    try:
+        objects, next_cursor = paginate_by_keyset(request, objects)
+    except ValueError:
+        return create_error_response("Invalid 'limit' or 'after' parameter", status=400)
     try:
         object_dicts = []
         for contract in objects:
@@ -248,7 +347,11 @@ def contracts(request):
             cd["source"] = settings.SERVER_URL
             object_dicts.append(cd)
         objects_json_buffer = StringIO()
-        json.dump({"items": object_dicts}, objects_json_buffer, indent=4)
+        json.dump(
+            {"items": object_dicts, **(get_page_envelope(request, next_cursor) or {})},
+            objects_json_buffer,
+            indent=4,
+        )
         return HttpResponse(objects_json_buffer.getvalue())
     except Exception as e:
         return create_error_response(
@@ -259,6 +362,7 @@ def contracts(request):
 @login_not_required
 @csrf_exempt
 @protect_api()
+@cache_export
 def projects(request):
     endpoint_id = getattr(request, "api_endpoint_id", None)
     global_export = getattr(request, "is_global_api", False)
@@ -268,6 +372,10 @@ def projects(request):
     if "project_id" in request.GET:
         project_id = request.GET.get("project_id", "")
         objects = objects.filter(id=project_id)
+    try:
+        objects, next_cursor = paginate_by_keyset(request, objects)
+    except ValueError:
+        return create_error_response("Invalid 'limit' or 'after' parameter", status=400)
 
     exporter = ProjectsExporter(
         objects=objects,
@@ -276,9 +384,12 @@ def projects(request):
     )
 
     try:
-        buffer = exporter.export_to_buffer(StringIO(), fields=fields)
-
-        return HttpResponse(buffer.getvalue())
+        return create_export_response(
+            request,
+            exporter,
+            fields=fields,
+            extra=get_page_envelope(request, next_cursor),
+        )
     except Exception as e:
         return create_error_response(
             "Something went wrong during exporting the projects", {"more": str(e)}
@@ -1,52 +1,120 @@
+import tempfile
+
 from django.conf import settings
-from django.http import HttpResponse
+from django.db import transaction
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from django.contrib.auth.decorators import user_passes_test, login_required
-
-from excel_response import ExcelResponse
-
-from core.models import Cohort, Contact, Contract, Dataset, Partner, Project
+from django.shortcuts import get_object_or_404, redirect, render
+
+from core.importer.export_jobs import JSON_EXPORTERS
+from core.importer.tabular_exporter import iter_csv, iter_values, write_xlsx
+from core.models import (
+    Cohort,
+    Contact,
+    Contract,
+    Dataset,
+    ExportJob,
+    Partner,
+    Project,
+)
+from core.tasks import run_export_job
 from core.utils import DaisyLogger
 from web.views.utils import is_data_steward
 from . import facet_view_utils
 
 log = DaisyLogger(__name__)
 
+# number of search results fetched from Solr at once
+CHUNK_SIZE = 500
+
+
+def _get_ids(request, object_model_class):
+    """
+    Return the ids of the objects matching the search, in the order of the results,
+    fetching only the ids from Solr, page by page.
+    """
+    results = facet_view_utils.search_objects(
+        request,
+        filters=request.GET.getlist("filters"),
+        query=request.GET.get("query", ""),
+        object_model=object_model_class,
+        # the export does not use the facet counts
+        facets=None,
+        order_by=request.GET.get("order_by", ""),
+    ).values_list("pk", flat=True)
+    ids = []
+    for start in range(0, results.count(), CHUNK_SIZE):
+        ids.extend(int(pk) for pk in results[start : start + CHUNK_SIZE])
+    return ids
+
+
+def _csv_response(values, filename):
+    response = StreamingHttpResponse(iter_csv(values), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _xlsx_response(values, filename):
+    output = tempfile.TemporaryFile()
+    write_xlsx(values, output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=f"{filename}.xlsx")
+
+
+def _start_export_job(request, object_name, export_format, ids):
+    job = ExportJob.objects.create(
+        user=request.user,
+        object_name=object_name,
+        format=export_format,
+        object_ids=ids,
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.pk))
+    log.debug("Export job started", job=job.pk, model=object_name, number=len(ids))
+    return redirect(job)
+
 
 @login_required
 @user_passes_test(is_data_steward)
 def generic_export(request, object_model_class, object_name):
-    def _get_objects(request, object_model_class, object_name):
-        query = request.GET.get("query", "")
-        order_by = request.GET.get("order_by", "")
-        objects = facet_view_utils.search_objects(
-            request,
-            filters=request.GET.getlist("filters"),
-            query=query,
-            object_model=object_model_class,
-            facets=settings.FACET_FIELDS[object_name],
-            order_by=order_by,
-        )
-
-        objects_ids = [obj.__dict__["pk"] for obj in objects]
-        objects = object_model_class.objects.filter(id__in=objects_ids)
-        values = [obj.serialize_to_export() for obj in objects]
-        return values
-
-    def _do_export(values):
-        if len(values) == 0:
-            raise ValueError("There are no values to export - your selection was empty")
-        return ExcelResponse(values)
-
+    """
+    Export the search results as a xlsx file, or as a csv file with `?format=csv`,
+    serializing the objects chunk by chunk.
+    The exports of more than EXPORT_ASYNC_THRESHOLD records, and the JSON exports
+    (`?format=json`), are produced in the background by an export job.
+    """
+    export_format = request.GET.get("format", ExportJob.FORMATS.xlsx)
+    if export_format not in ExportJob.FORMATS or (
+        export_format == ExportJob.FORMATS.json and object_name not in JSON_EXPORTERS
+    ):
+        return HttpResponse(f"The {object_name}s cannot be exported as {export_format}")
     try:
-        values = _get_objects(request, object_model_class, object_name)
+        ids = _get_ids(request, object_model_class)
     except Exception as e:
         return HttpResponse(
             f"There was a problem with serialization during export: \r\n{str(e)}"
         )
+    if len(ids) == 0:
+        return HttpResponse(
+            "There was a problem during export to Excel file: \r\n"
+            "There are no values to export - your selection was empty"
+        )
+
+    threshold = getattr(settings, "EXPORT_ASYNC_THRESHOLD", 1000)
+    if export_format == ExportJob.FORMATS.json or (threshold and len(ids) > threshold):
+        return _start_export_job(request, object_name, export_format, ids)
 
+    log.debug("Exporting objects", model=object_name, number=len(ids))
+    values = iter_values(object_model_class, ids)
+    filename = f"{object_name}s"
     try:
-        response = _do_export(values)
-        return response
+        if export_format == ExportJob.FORMATS.csv:
+            return _csv_response(values, filename)
+        return _xlsx_response(values, filename)
     except Exception as e:
         return HttpResponse(
             f"There was a problem during export to Excel file: \r\n{str(e)}"
@@ -75,3 +143,21 @@ def partners_export(request):
 
 def projects_export(request):
     return generic_export(request, Project, "project")
+
+
+@login_required
+def export_job(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    return render(request, "exports/export_job.html", {"job": job})
+
+
+@login_required
+def export_job_download(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+    if job.status != ExportJob.STATUSES.done or not job.file:
+        raise Http404("The export is not available")
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=f"{job.object_name}s.{job.format}",
+    )
@@ -5,6 +5,7 @@ from django.db.models import Q
 from haystack.inputs import Exact, AutoQuery
 from haystack.query import SearchQuerySet
 
+from core import facet_cache
 from core.utils import DaisyLogger
 
 log = DaisyLogger(__name__)
@@ -14,6 +15,30 @@ Utility method to rapidly build a facetted view of a search index.
 """
 
 
+class FacetCachedSearchQuerySet(SearchQuerySet):
+    """
+    SearchQuerySet whose facet counts are served from (and stored in) the facet cache.
+    """
+
+    facet_cache_key = None
+    cached_facet_counts = None
+
+    def _clone(self, klass=None):
+        clone = super()._clone(klass=klass)
+        clone.facet_cache_key = self.facet_cache_key
+        clone.cached_facet_counts = self.cached_facet_counts
+        return clone
+
+    def facet_counts(self):
+        if self.cached_facet_counts is not None:
+            return self.cached_facet_counts
+        counts = super().facet_counts()
+        if self.facet_cache_key is not None:
+            facet_cache.set_counts(self.facet_cache_key, counts)
+            self.cached_facet_counts = counts
+        return counts
+
+
 def _filter_facets(facets):
     """
     Filter facets that are empty or that all terms have 0 results
@@ -63,7 +88,7 @@ def _search_objects(query, filters, facets, model_object, order_by=None):
         order_by=order_by,
     )
     # start queryset
-    queryset = SearchQuerySet().models(
+    queryset = FacetCachedSearchQuerySet().models(
         model_object
     )  # .narrow("namespace:(%s)" % namespace.name)
     # filter by facets filters
@@ -84,7 +109,14 @@ def _search_objects(query, filters, facets, model_object, order_by=None):
     # execute the query
     if query:
         queryset = queryset.filter(content=AutoQuery(query))
-    # get facets
+    # get facets, unless they are cached: paging or re-sorting does not change them
+    if facets and facet_cache.get_timeout():
+        queryset.facet_cache_key = facet_cache.get_key(
+            model_object._meta.label, filters, query, facets
+        )
+        queryset.cached_facet_counts = facet_cache.get_counts(queryset.facet_cache_key)
+        if queryset.cached_facet_counts is not None:
+            facets = None
     if facets:
         for field in facets:
             queryset = queryset.facet(field)
@@ -1,21 +1,21 @@
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.views.generic import ListView
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import FieldDoesNotExist, PermissionDenied
 
-from core import constants
+from core import constants, log_entry_fields
 from core.models.user import User
 from core.permissions import CheckerMixin
 from auditlog.models import LogEntry
 from auditlog.registry import auditlog
 
-from collections import defaultdict
 import datetime
-import json
 
 
 class LogEntryListView(CheckerMixin, ListView):
     DATE_FORMAT = "%Y-%m-%d"
+    PAGE_SIZE = 50
     model = LogEntry
     allow_empty = True
     permission_required = constants.Permissions.PROTECTED
@@ -27,59 +27,72 @@ class LogEntryListView(CheckerMixin, ListView):
         "dataset": "dataset",
     }
 
-    # TODO
-    #  - Make cleaner
-    def get_list_of_model_fields(self):
-        fields_per_model = (
-            LogEntry.objects.values("content_type", "changes").distinct().all()
-        )
-        tmp_dict = defaultdict(lambda: {})
-        for entry in fields_per_model:
-            entry_content_type = ContentType.objects.get(pk=entry["content_type"])
-            entry_model = entry_content_type.model_class()
-            entry_model_name = entry_content_type.name
-            changed_fields = entry["changes"]
-
-            for key in changed_fields:
-                field_name = self.get_verbose_field_name(entry_model, key)
-                tmp_dict[entry_model_name].update({key: field_name})
-
-        model_fields_dict = {
-            key: {
-                name: verbose_name
-                for name, verbose_name in sorted(values.items(), key=lambda x: x[1])
+    def get_list_of_model_fields(self, catalogue):
+        """
+        Return {model name: {field name: verbose name}} from the cached catalogue of the audit log.
+        """
+        model_fields_dict = {}
+        for content_type_id, field_names in catalogue["fields"].items():
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            entry_model = content_type.model_class()
+            if entry_model is None:
+                continue
+            fields = {
+                key: self.get_verbose_field_name(entry_model, key)
+                for key in field_names
             }
-            for key, values in tmp_dict.items()
-        }
+            model_fields_dict[content_type.model] = dict(
+                sorted(fields.items(), key=lambda x: x[1])
+            )
         return model_fields_dict
 
     def get_verbose_field_name(self, model, field_name):
         # Copy of method used by LogEntry.changes_display_dict
         model_fields = auditlog.get_model_fields(model._meta.model)
-        field = model._meta.get_field(field_name)
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            # the field has been removed since
+            return field_name.title()
         verbose_name = model_fields.get("mappings_fields", {}).get(
             field.name, getattr(field, "verbose_name", field.name)
         )
         return verbose_name.title()
 
+    def get_page(self, filters):
+        try:
+            return max(int(filters.get("page", 1)), 1)
+        except ValueError:
+            return 1
+
     def get_context_data(self, object_list=None, filters=None, **kwargs):
         query_filters = {}
         hidden_filters = {}
+        logs = None
 
         start_date = (
-            datetime.datetime.strptime(filters["start_date"], self.DATE_FORMAT)
+            datetime.datetime.strptime(filters["start_date"], self.DATE_FORMAT).date()
             if "start_date" in filters
             else datetime.date.today() - datetime.timedelta(days=90)
         )
-
-        query_filters.update({"timestamp__date__gte": start_date})
-
         end_date = (
-            datetime.datetime.strptime(filters["end_date"], self.DATE_FORMAT)
+            datetime.datetime.strptime(filters["end_date"], self.DATE_FORMAT).date()
             if "end_date" in filters
-            else datetime.datetime.now()
+            else datetime.date.today()
+        )
+        # a range on the timestamp itself, unlike a filter on its date, uses its index
+        query_filters.update(
+            {
+                "timestamp__gte": timezone.make_aware(
+                    datetime.datetime.combine(start_date, datetime.time.min)
+                ),
+                "timestamp__lt": timezone.make_aware(
+                    datetime.datetime.combine(
+                        end_date + datetime.timedelta(days=1), datetime.time.min
+                    )
+                ),
+            }
         )
-        query_filters.update({"timestamp__date__lte": end_date})
 
         if "action" in filters:
             query_filters.update({"action__exact": filters["action"]})
@@ -92,33 +105,23 @@ class LogEntryListView(CheckerMixin, ListView):
             hidden_filters.update({"entity_name": filters["entity_name"]})
             if "entity_attr" in filters:
                 field = filters["entity_attr"]
-                query_filters.update({"changes__regex": rf'"{field}": \['})
+                query_filters.update({"changes__has_key": field})
 
             if "entity_id" in filters:
                 entity_class = get_object_or_404(
                     ContentType, model=filters["entity_name"]
                 ).model_class()
                 entity_object = get_object_or_404(entity_class, pk=filters["entity_id"])
-                self.object_list = [
-                    {"action": log.Action.choices[log.action], "log": log}
-                    for log in entity_object.history.filter(**query_filters).all()
-                ]
+                logs = entity_object.history.filter(**query_filters)
                 hidden_filters.update({"entity_id": filters["entity_id"]})
             else:
                 if "parent_entity_name" in filters and "parent_entity_id" in filters:
                     entity_class = get_object_or_404(
                         ContentType, model=filters["entity_name"]
                     ).model_class()
-                    entity_ids_list = [
-                        o.pk
-                        for o in entity_class.objects.filter(
-                            **{
-                                filters["parent_entity_name"]: filters[
-                                    "parent_entity_id"
-                                ]
-                            }
-                        )
-                    ]
+                    entity_ids_list = entity_class.objects.filter(
+                        **{filters["parent_entity_name"]: filters["parent_entity_id"]}
+                    ).values_list("pk", flat=True)
                     query_filters.update({"object_id__in": entity_ids_list})
                     hidden_filters.update(
                         {
@@ -127,32 +130,44 @@ class LogEntryListView(CheckerMixin, ListView):
                         }
                     )
 
-        if not hasattr(self, "object_list"):
-            self.object_list = [
-                {"action": log.Action.choices[log.action], "log": log}
-                for log in LogEntry.objects.filter(**query_filters).all()
+        if logs is None:
+            logs = LogEntry.objects.filter(**query_filters)
+
+        # only the entries of the page are fetched, one more tells whether there is a next page
+        page = self.get_page(filters)
+        start = (page - 1) * self.PAGE_SIZE
+        page_logs = list(
+            logs.select_related("actor", "content_type").order_by("-timestamp", "-pk")[
+                start : start + self.PAGE_SIZE + 1
             ]
+        )
+        self.object_list = [
+            {"action": log.Action.choices[log.action], "log": log}
+            for log in page_logs[: self.PAGE_SIZE]
+        ]
 
         context = super().get_context_data(**kwargs)
 
-        models_list_fk = LogEntry.objects.values("content_type").distinct().all()
-        models_list_names = [
-            ct["model"]
-            for ct in ContentType.objects.values("model")
-            .filter(pk__in=models_list_fk)
-            .all()
-        ]
-        users_list_fk = LogEntry.objects.values("actor").distinct().all()
+        catalogue = log_entry_fields.get_catalogue()
+        model_fields = self.get_list_of_model_fields(catalogue)
         users_list_names = (
-            User.objects.values("pk", "full_name").filter(pk__in=users_list_fk).all()
+            User.objects.values("pk", "full_name")
+            .filter(pk__in=catalogue["actors"])
+            .order_by("full_name")
         )
-        context["models_list"] = models_list_names
+        page_query = filters.copy()
+        page_query.pop("page", None)
+        context["models_list"] = sorted(model_fields)
         context["users_list"] = users_list_names
         context["start_date"] = start_date.strftime(self.DATE_FORMAT)
         context["end_date"] = end_date.strftime(self.DATE_FORMAT)
         context["hidden_filters"] = hidden_filters
         context["log_actions"] = LogEntry.Action.choices
-        context["model_fields"] = self.get_list_of_model_fields()
+        context["model_fields"] = model_fields
+        context["page"] = page
+        context["has_previous"] = page > 1
+        context["has_next"] = len(page_logs) > self.PAGE_SIZE
+        context["page_query"] = page_query.urlencode()
 
         return context
 